@@ -0,0 +1,261 @@
+"""Накопительные итоги тренировок по спортсменам и окнам времени.
+
+Каждое сообщение о тренировке обновляет итоги за O(1): общий итог,
+итоги фиксированных (tumbling) окон и скользящих (sliding) окон.
+Итоги хранятся для пары (спортсмен, тип тренировки); итог по всем типам
+собирается при запросе из нескольких пар. Те же итоги ведутся для пары
+(ALL_ATHLETES, тип тренировки) — по всем спортсменам сразу.
+"""
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from homework import InfoMessage
+
+HOUR: int = 60 * 60
+DAY: int = 24 * HOUR
+# Спортсмен, под которым хранятся итоги по всем спортсменам.
+ALL_ATHLETES = '*'
+Key = Tuple[str, str]
+
+
+@dataclass
+class Totals:
+    """Суммы показателей за набор тренировок."""
+    sessions: int = 0
+    duration: float = 0.0
+    distance: float = 0.0
+    calories: float = 0.0
+
+    def add(self, info: InfoMessage, sign: int = 1) -> None:
+        """Прибавить (или при sign=-1 вычесть) одну тренировку."""
+        self.sessions += sign
+        self.duration += sign * info.duration
+        self.distance += sign * info.distance
+        self.calories += sign * info.calories
+
+    def merge(self, other: 'Totals', sign: int = 1) -> None:
+        """Прибавить (или при sign=-1 вычесть) итоги другого набора."""
+        self.sessions += sign * other.sessions
+        self.duration += sign * other.duration
+        self.distance += sign * other.distance
+        self.calories += sign * other.calories
+
+    @property
+    def mean_speed(self) -> float:
+        """Средняя скорость за все тренировки набора, км/ч."""
+        return self.distance / self.duration if self.duration else 0.0
+
+
+class TumblingWindow:
+    """Итоги по непересекающимся окнам длиной size секунд.
+
+    Для каждой пары хранятся только history последних окон, считая от
+    окна самой поздней тренировки: старые окна забываются в add. Поздняя
+    тренировка, окно которой уже забыто, в окна не попадает.
+    """
+
+    def __init__(self, size: float, history: int = 2) -> None:
+        self.size = size
+        self.history = history
+        self.buckets: Dict[Key, Dict[int, Totals]] = {}
+        self.latest: Dict[Key, int] = {}
+
+    def add(self, key: Key, timestamp: float, info: InfoMessage) -> None:
+        buckets = self.buckets.setdefault(key, {})
+        bucket = int(timestamp // self.size)
+        latest = self.latest.get(key)
+        if latest is None or bucket > latest:
+            latest = self.latest[key] = bucket
+            # Окон не больше history + 1, поэтому просмотр — O(1).
+            first = latest - self.history + 1
+            for old in [old for old in buckets if old < first]:
+                del buckets[old]
+        elif bucket <= latest - self.history:
+            return
+        buckets.setdefault(bucket, Totals()).add(info)
+
+    def get(self, key: Key, timestamp: float) -> Totals:
+        """Итоги окна, в которое попадает timestamp."""
+        bucket = int(timestamp // self.size)
+        return self.buckets.get(key, {}).get(bucket, Totals())
+
+    def evict_before(self, timestamp: float) -> None:
+        """Забыть окна всех пар, которые закончились до timestamp.
+
+        Просматривает все пары; нужно только для пар, тренировки которых
+        давно перестали приходить.
+        """
+        first = int(timestamp // self.size)
+        for buckets in self.buckets.values():
+            for bucket in [bucket for bucket in buckets if bucket < first]:
+                del buckets[bucket]
+
+
+class SlidingWindow:
+    """Итоги за последние size секунд до самой поздней тренировки.
+
+    Тренировки пары собираются в корзины по step секунд, и окно состоит
+    из ceil(size / step) последних корзин. Память на пару зависит от
+    размера окна, а не от числа тренировок; граница окна округляется
+    до step. Поздняя тренировка, корзина которой уже вышла из окна, в
+    окно не попадает.
+    """
+
+    def __init__(self, size: float, step: float = HOUR) -> None:
+        self.size = size
+        self.step = step
+        self.count = max(1, math.ceil(size / step))
+        self.totals: Dict[Key, Totals] = {}
+        # Корзины пары по возрастанию номера: (номер, итоги корзины).
+        self.buckets: Dict[Key, 'deque[Tuple[int, Totals]]'] = {}
+
+    def add(self, key: Key, timestamp: float, info: InfoMessage) -> None:
+        bucket = int(timestamp // self.step)
+        buckets = self.buckets.setdefault(key, deque())
+        totals = self.totals.setdefault(key, Totals())
+        if not buckets or bucket > buckets[-1][0]:
+            buckets.append((bucket, Totals()))
+            self._expire(key, bucket)
+        elif bucket <= buckets[-1][0] - self.count:
+            return
+        totals.add(info)
+        self._bucket(buckets, bucket).add(info)
+
+    @staticmethod
+    def _bucket(buckets: 'deque[Tuple[int, Totals]]',
+                bucket: int) -> Totals:
+        """Корзина с номером bucket; поздняя вставляется на своё место."""
+        for index in range(len(buckets) - 1, -1, -1):
+            number, totals = buckets[index]
+            if number == bucket:
+                return totals
+            if number < bucket:
+                break
+        else:
+            index = -1
+        totals = Totals()
+        buckets.insert(index + 1, (bucket, totals))
+        return totals
+
+    def _expire(self, key: Key, latest: int) -> None:
+        buckets = self.buckets[key]
+        totals = self.totals[key]
+        while buckets[0][0] <= latest - self.count:
+            totals.merge(buckets.popleft()[1], sign=-1)
+
+    def get(self, key: Key, now: Optional[float] = None) -> Totals:
+        """Итоги окна, которое заканчивается в now.
+
+        Без now — окно, которое заканчивается последней тренировкой.
+        now раньше корзины последней тренировки — ValueError: старые
+        корзины уже забыты. Запрос не меняет состояние окна.
+        """
+        if key not in self.totals:
+            return Totals()
+        totals = Totals()
+        totals.merge(self.totals[key])
+        if now is not None:
+            bucket = int(now // self.step)
+            if bucket < self.buckets[key][-1][0]:
+                raise ValueError(f'Скользящее окно {key} уже сдвинуто '
+                                 f'дальше момента {now}')
+            for number, part in self.buckets[key]:
+                if number > bucket - self.count:
+                    break
+                totals.merge(part, sign=-1)
+        return totals
+
+
+class AggregationStore:
+    """Хранилище итогов по спортсменам, типам тренировок и окнам."""
+
+    def __init__(self,
+                 tumbling: Optional[Dict[str, float]] = None,
+                 sliding: Optional[Dict[str, float]] = None,
+                 history: int = 2,
+                 step: float = HOUR) -> None:
+        if tumbling is None:
+            tumbling = {'week': 7 * DAY, 'month': 30 * DAY}
+        if sliding is None:
+            sliding = {'last_7_days': 7 * DAY, 'last_30_days': 30 * DAY}
+        self.totals: Dict[Key, Totals] = {}
+        self.tumbling = {name: TumblingWindow(size, history)
+                         for name, size in tumbling.items()}
+        self.sliding = {name: SlidingWindow(size, step)
+                        for name, size in sliding.items()}
+        self.training_types: Dict[str, Set[str]] = {}
+        self.latest: Dict[str, float] = {}
+
+    def add(self, athlete_id: str, timestamp: float,
+            info: InfoMessage) -> None:
+        """Учесть одну тренировку спортсмена и итоги по всем спортсменам."""
+        if athlete_id == ALL_ATHLETES:
+            raise ValueError(f'Идентификатор {ALL_ATHLETES!r} занят итогами '
+                             f'по всем спортсменам')
+        self._add(athlete_id, timestamp, info)
+        self._add(ALL_ATHLETES, timestamp, info)
+
+    def _add(self, athlete_id: str, timestamp: float,
+             info: InfoMessage) -> None:
+        key = (athlete_id, info.training_type)
+        self.training_types.setdefault(athlete_id, set()).add(
+            info.training_type
+        )
+        self.latest[athlete_id] = max(timestamp,
+                                      self.latest.get(athlete_id, timestamp))
+        self.totals.setdefault(key, Totals()).add(info)
+        for window in self.tumbling.values():
+            window.add(key, timestamp, info)
+        for window in self.sliding.values():
+            window.add(key, timestamp, info)
+
+    def add_many(self,
+                 records: Iterable[Tuple[str, float, InfoMessage]]) -> None:
+        """Учесть тренировки вида (athlete_id, timestamp, info)."""
+        for athlete_id, timestamp, info in records:
+            self.add(athlete_id, timestamp, info)
+
+    def add_columns(self,
+                    athlete_ids: Iterable[str],
+                    timestamps: Iterable[float],
+                    columns: Dict[str, Iterable]) -> None:
+        """Учесть результат batch.compute_packages по колонкам."""
+        names = ('training_type', 'duration', 'distance', 'speed',
+                 'calories')
+        rows = zip(*(list(columns[name]) for name in names))
+        for athlete_id, timestamp, row in zip(athlete_ids, timestamps, rows):
+            self.add(athlete_id, timestamp, InfoMessage(*row))
+
+    def snapshot(self,
+                 athlete_id: str,
+                 training_type: Optional[str] = None,
+                 at: Optional[float] = None) -> Dict[str, Totals]:
+        """Итоги спортсмена: общий и по каждому окну.
+
+        Без training_type итоги суммируются по всем типам тренировок.
+        С athlete_id=ALL_ATHLETES — итоги по всем спортсменам.
+        at — момент времени для окон, по умолчанию время последней
+        тренировки спортсмена. Для скользящих окон at не может быть
+        раньше корзины последней тренировки пары: это ValueError.
+        """
+        if at is None:
+            at = self.latest.get(athlete_id, 0.0)
+        if training_type is None:
+            types = sorted(self.training_types.get(athlete_id, ()))
+        else:
+            types = [training_type]
+        keys = [(athlete_id, name) for name in types]
+        result: Dict[str, Totals] = {'total': Totals()}
+        for key in keys:
+            result['total'].merge(self.totals.get(key, Totals()))
+        for name, window in self.tumbling.items():
+            result[name] = Totals()
+            for key in keys:
+                result[name].merge(window.get(key, at))
+        for name, window in self.sliding.items():
+            result[name] = Totals()
+            for key in keys:
+                result[name].merge(window.get(key, at))
+        return result
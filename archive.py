@@ -0,0 +1,217 @@
+"""Архив рассчитанных тренировок на диске, хранимый по колонкам.
+
+Архив — каталог с порциями (chunk) записей и файлом index.json. Каждая
+порция отсортирована по времени; в индексе для неё хранятся границы
+времени, число записей и типы тренировок. Запрос по интервалу времени и
+типу тренировки читает только подходящие порции. Несжатые порции
+отображаются в память, сжатые читаются целиком. Строки хранятся
+фиксированной длины; слишком длинные идентификатор спортсмена и
+название тренировки отклоняются, а не обрезаются.
+"""
+import json
+import os
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from homework import InfoMessage
+
+SESSION_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('athlete_id', '<U32'),
+    ('training_type', '<U16'),
+    ('duration', '<f8'),
+    ('distance', '<f8'),
+    ('speed', '<f8'),
+    ('calories', '<f8'),
+])
+INFO_FIELDS = ('training_type', 'duration', 'distance', 'speed', 'calories')
+INDEX_FILE = 'index.json'
+COMPACT_ROWS: int = 1 << 20
+# Наибольшая длина строковых полей в символах: UTF-32, по 4 байта.
+TEXT_LENGTHS: Dict[str, int] = {
+    name: SESSION_DTYPE[name].itemsize // 4
+    for name in ('athlete_id', 'training_type')
+}
+
+
+def check_lengths(name: str, values: Iterable[str]) -> None:
+    """Выбросить ValueError, если строка не помещается в поле name."""
+    values = np.asarray(values if isinstance(values, np.ndarray)
+                        else list(values))
+    if not values.size:
+        return
+    if values.dtype.kind != 'U':
+        values = values.astype(str)
+    limit = TEXT_LENGTHS[name]
+    if values.dtype.itemsize // 4 <= limit:
+        return
+    longest = int(np.char.str_len(values).max())
+    if longest > limit:
+        raise ValueError(f'{name}: значение длиной {longest} длиннее '
+                         f'{limit} символов')
+
+
+class SessionArchive:
+    """Архив тренировок с добавлением порций и запросами по индексу."""
+
+    def __init__(self, path: str, compress: bool = True) -> None:
+        self.path = path
+        self.compress = compress
+        os.makedirs(path, exist_ok=True)
+        index_path = os.path.join(path, INDEX_FILE)
+        self.chunks: List[Dict] = []
+        if os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as stream:
+                self.chunks = json.load(stream)
+        self._next = max((chunk['number'] for chunk in self.chunks),
+                         default=0) + 1
+
+    def __len__(self) -> int:
+        return sum(chunk['rows'] for chunk in self.chunks)
+
+    def append(self,
+               records: Iterable[Tuple[str, float, InfoMessage]]) -> int:
+        """Добавить тренировки вида (athlete_id, timestamp, info)."""
+        rows = [(timestamp, athlete_id,
+                 *(getattr(info, name) for name in INFO_FIELDS))
+                for athlete_id, timestamp, info in records]
+        check_lengths('athlete_id', [row[1] for row in rows])
+        check_lengths('training_type', [row[2] for row in rows])
+        return self.append_array(np.array(rows, dtype=SESSION_DTYPE))
+
+    def append_columns(self,
+                       athlete_ids: Iterable[str],
+                       timestamps: Iterable[float],
+                       columns: Dict[str, np.ndarray]) -> int:
+        """Добавить результат batch.compute_packages по колонкам."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        athlete_ids = np.asarray(list(athlete_ids))
+        check_lengths('athlete_id', athlete_ids)
+        check_lengths('training_type', columns['training_type'])
+        sessions = np.empty(timestamps.shape[0], dtype=SESSION_DTYPE)
+        sessions['timestamp'] = timestamps
+        sessions['athlete_id'] = athlete_ids
+        for name in INFO_FIELDS:
+            sessions[name] = columns[name]
+        return self.append_array(sessions)
+
+    def append_array(self, sessions: np.ndarray) -> int:
+        """Записать массив SESSION_DTYPE новой порцией."""
+        if not len(sessions):
+            return 0
+        self._write_chunks([np.sort(sessions, order='timestamp')])
+        return len(sessions)
+
+    def _write_chunk(self, sessions: np.ndarray) -> Dict:
+        """Записать порцию на диск и вернуть её запись индекса."""
+        number = self._next
+        self._next += 1
+        name = f'chunk-{number:06d}'
+        if self.compress:
+            name += '.npz'
+            np.savez_compressed(os.path.join(self.path, name),
+                                sessions=sessions)
+        else:
+            name += '.npy'
+            np.save(os.path.join(self.path, name), sessions)
+        return {
+            'number': number,
+            'file': name,
+            'rows': int(len(sessions)),
+            'start': float(sessions['timestamp'][0]),
+            'end': float(sessions['timestamp'][-1]),
+            'training_types': sorted(set(sessions['training_type'].tolist())),
+        }
+
+    def _write_chunks(self, parts: List[np.ndarray]) -> None:
+        """Записать порции на диск и добавить их в индекс."""
+        for sessions in parts:
+            self.chunks.append(self._write_chunk(sessions))
+        self._save_index()
+
+    def _save_index(self) -> None:
+        self.chunks.sort(key=lambda chunk: (chunk['start'], chunk['number']))
+        self._write_index()
+
+    def _write_index(self) -> None:
+        index_path = os.path.join(self.path, INDEX_FILE)
+        with open(index_path + '.tmp', 'w', encoding='utf-8') as stream:
+            json.dump(self.chunks, stream)
+        os.replace(index_path + '.tmp', index_path)
+
+    def _load(self, chunk: Dict) -> np.ndarray:
+        path = os.path.join(self.path, chunk['file'])
+        if chunk['file'].endswith('.npz'):
+            with np.load(path) as data:
+                return data['sessions']
+        return np.load(path, mmap_mode='r')
+
+    def query(self,
+              start: Optional[float] = None,
+              end: Optional[float] = None,
+              training_type: Optional[str] = None,
+              athlete_id: Optional[str] = None) -> np.ndarray:
+        """Тренировки с start <= timestamp <= end, отсортированные по времени.
+
+        Порции, которые не пересекаются с интервалом или не содержат
+        нужного типа тренировки, не читаются.
+        """
+        low = -np.inf if start is None else start
+        high = np.inf if end is None else end
+        starts = [chunk['start'] for chunk in self.chunks]
+        parts: List[np.ndarray] = []
+        for chunk in self.chunks[:bisect_right(starts, high)]:
+            if chunk['end'] < low:
+                continue
+            if (training_type is not None
+                    and training_type not in chunk['training_types']):
+                continue
+            sessions = self._load(chunk)
+            times = sessions['timestamp']
+            sessions = sessions[np.searchsorted(times, low, 'left'):
+                                np.searchsorted(times, high, 'right')]
+            if training_type is not None:
+                sessions = sessions[sessions['training_type']
+                                    == training_type]
+            if athlete_id is not None:
+                sessions = sessions[sessions['athlete_id'] == athlete_id]
+            parts.append(np.asarray(sessions))
+        if not parts:
+            return np.empty(0, dtype=SESSION_DTYPE)
+        result = np.concatenate(parts)
+        return result[np.argsort(result['timestamp'], kind='stable')]
+
+    def compact(self, rows: int = COMPACT_ROWS) -> None:
+        """Переписать архив порциями по rows записей без пересечений.
+
+        Порции читаются по одной в порядке начала. Записи раньше начала
+        следующей порции уже не изменят порядок, поэтому они пишутся
+        новыми порциями, а в памяти остаются только хвост меньше rows и
+        записи, пересекающиеся со следующими порциями. Новые порции
+        записываются до удаления старых, поэтому при сбое в середине
+        архив остаётся читаемым по старому индексу.
+        """
+        if len(self.chunks) < 2:
+            return
+        old = list(self.chunks)
+        written: List[Dict] = []
+        pending = np.empty(0, dtype=SESSION_DTYPE)
+        for position, chunk in enumerate(old):
+            pending = np.concatenate([pending, np.asarray(self._load(chunk))])
+            pending = pending[np.argsort(pending['timestamp'],
+                                         kind='stable')]
+            if position + 1 < len(old):
+                ready = int(np.searchsorted(pending['timestamp'],
+                                            old[position + 1]['start']))
+                full = ready - ready % rows
+            else:
+                full = len(pending)
+            for index in range(0, full, rows):
+                written.append(self._write_chunk(pending[index:index + rows]))
+            pending = pending[full:]
+        self.chunks = written
+        self._save_index()
+        for chunk in old:
+            os.remove(os.path.join(self.path, chunk['file']))
@@ -0,0 +1,226 @@
+"""Пакетный (колоночный) расчёт показателей тренировок на NumPy.
+
+По умолчанию расчёт идёт в float64 и совпадает с классами тренировок.
+С dtype=np.float32 колонки занимают вдвое меньше памяти, а ошибка
+ограничена error_bound: не больше FLOAT32_ERROR от масштаба значения.
+Масштаб — модуль значения, а для калорий бега к нему прибавляется
+вычитаемая поправка формулы. При масштабе до 2000 ошибка меньше 0.001,
+то есть выведенные с тремя знаками числа отличаются не больше чем на
+единицу последнего знака. Исключение — калории ходьбы, когда
+speed ** 2 / height почти целое: целая часть частного может отличаться
+на 1, и калории — на целый шаг HEIGHT_MULTIPLIER * weight * минуты.
+Для таких записей error_bound включает этот шаг.
+"""
+from typing import IO, Dict, Optional, Sequence
+
+import numpy as np
+
+from homework import (InfoMessage, Running, SportsWalking, Swimming,
+                      check_implemented, compile_message)
+
+# Колонки, которые принимает compute_batch. Имена совпадают с параметрами
+# конструкторов классов тренировок.
+COLUMNS = ('action', 'duration', 'weight', 'height',
+           'length_pool', 'count_pool')
+
+# Граница ошибки расчёта в float32 в долях масштаба значения: восемь
+# единиц округления float32 (2 ** -24).
+FLOAT32_ERROR: float = 2.0 ** -21
+# Относительная ошибка частного speed ** 2 / height в float32 с запасом:
+# ближе к целому целая часть частного может быть другой.
+FLOOR_MARGIN: float = 2.0 ** -18
+
+WORKOUT_COLUMNS: Dict[str, Sequence[str]] = {
+    'SWM': ('action', 'duration', 'weight', 'length_pool', 'count_pool'),
+    'RUN': ('action', 'duration', 'weight'),
+    'WLK': ('action', 'duration', 'weight', 'height'),
+}
+
+
+def _distance(cls: type, action: np.ndarray) -> np.ndarray:
+    """Дистанция в км: повторяет Training.get_distance."""
+    return action * cls.LEN_STEP / cls.M_IN_KM
+
+
+def _running(col: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    distance = _distance(Running, col['action'])
+    speed = distance / col['duration']
+    calories = (
+        (Running.CALORIES_MEAN_SPEED_MULTIPLIER * speed
+         - Running.CALORIES_MEAN_SPEED_SUBSTRACT) * col['weight']
+        / Running.M_IN_KM * (col['duration'] * Running.HOUR_TO_MIN)
+    )
+    return {'distance': distance, 'speed': speed, 'calories': calories}
+
+
+def _walking(col: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    distance = _distance(SportsWalking, col['action'])
+    speed = distance / col['duration']
+    calories = (
+        (SportsWalking.WEIGHT_MULTIPLIER * col['weight']
+         + np.floor_divide(np.square(speed), col['height'])
+         * SportsWalking.HEIGHT_MULTIPLIER * col['weight'])
+        * (col['duration'] * SportsWalking.HOUR_TO_MIN)
+    )
+    return {'distance': distance, 'speed': speed, 'calories': calories}
+
+
+def _swimming(col: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    distance = _distance(Swimming, col['action'])
+    speed = (
+        col['length_pool'] * col['count_pool']
+        / Swimming.M_IN_KM / col['duration']
+    )
+    calories = (
+        (speed + Swimming.MEAN_SPEED_SUMMAND)
+        * Swimming.CALORIES_MEAN_SPEED_MULTIPLIER * col['weight']
+    )
+    return {'distance': distance, 'speed': speed, 'calories': calories}
+
+
+BATCH_FORMULAS = {
+    'SWM': _swimming,
+    'RUN': _running,
+    'WLK': _walking,
+}
+
+# Классы тренировок, формулы которых повторяет пакетный расчёт.
+TRAINING_CLASSES: Dict[str, type] = {
+    'SWM': Swimming,
+    'RUN': Running,
+    'WLK': SportsWalking,
+}
+
+TRAINING_NAMES: Dict[str, str] = {
+    code: training_class.__name__
+    for code, training_class in TRAINING_CLASSES.items()
+}
+
+
+def compute_batch(workout_types: Sequence[str],
+                  columns: Dict[str, Sequence[float]],
+                  dtype: type = np.float64) -> Dict[str, np.ndarray]:
+    """Рассчитать дистанцию, скорость и калории для массива пакетов.
+
+    workout_types — коды тренировок ('SWM', 'RUN', 'WLK'), columns —
+    словарь колонок с именами из COLUMNS одинаковой длины. Колонки,
+    которые не нужны ни одному типу в пакете, можно не передавать.
+    Возвращает колонки duration, distance, speed и calories типа dtype
+    (float64 или float32).
+    """
+    types = np.asarray(workout_types)
+    size = types.shape[0]
+    col = {name: np.asarray(values, dtype=dtype)
+           for name, values in columns.items()}
+    result = {name: np.empty(size, dtype=dtype)
+              for name in ('distance', 'speed', 'calories')}
+    known = np.zeros(size, dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for code, formula in BATCH_FORMULAS.items():
+            mask = types == code
+            if not mask.any():
+                continue
+            check_implemented(code, len(WORKOUT_COLUMNS[code]),
+                              TRAINING_CLASSES)
+            known |= mask
+            part = formula({name: col[name][mask]
+                            for name in WORKOUT_COLUMNS[code]})
+            for name, values in part.items():
+                result[name][mask] = values
+    if not known.all():
+        code = str(types[~known][0])
+        raise ValueError(f'Пакетный расчёт не поддерживает тренировку '
+                         f'{code}')
+    result['duration'] = col['duration']
+    return result
+
+
+def error_bound(workout_types: Sequence[str],
+                columns: Dict[str, Sequence[float]],
+                result: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Граница абсолютной ошибки расчёта в float32 для каждой записи.
+
+    Считается по результату compute_batch в float64 или float32. Для
+    ходьбы, у которой speed ** 2 / height ближе к целому, чем
+    FLOOR_MARGIN от частного, в границу калорий входит шаг целой части.
+    """
+    types = np.asarray(workout_types)
+    bounds = {name: FLOAT32_ERROR * np.abs(result[name]).astype(np.float64)
+              for name in ('distance', 'speed', 'calories')}
+    running = types == 'RUN'
+    if running.any():
+        weight = np.asarray(columns['weight'], dtype=np.float64)[running]
+        duration = np.asarray(columns['duration'],
+                              dtype=np.float64)[running]
+        bounds['calories'][running] += (
+            FLOAT32_ERROR * Running.CALORIES_MEAN_SPEED_SUBSTRACT * weight
+            / Running.M_IN_KM * duration * Running.HOUR_TO_MIN
+        )
+    walking = types == 'WLK'
+    if walking.any():
+        action, duration, weight, height = (
+            np.asarray(columns[name], dtype=np.float64)[walking]
+            for name in ('action', 'duration', 'weight', 'height')
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            quotient = np.square(_distance(SportsWalking, action)
+                                 / duration) / height
+            near = (np.abs(quotient - np.round(quotient))
+                    <= FLOOR_MARGIN * np.abs(quotient))
+        bounds['calories'][walking] += np.where(
+            near,
+            np.abs(SportsWalking.HEIGHT_MULTIPLIER * weight
+                   * duration * SportsWalking.HOUR_TO_MIN),
+            0.0,
+        )
+    return bounds
+
+
+def training_names(workout_types: np.ndarray) -> np.ndarray:
+    """Названия классов тренировок для колонки кодов."""
+    names = np.empty(workout_types.shape[0], dtype='<U13')
+    for code, name in TRAINING_NAMES.items():
+        names[workout_types == code] = name
+    return names
+
+
+def packages_to_columns(packages: Sequence[tuple],
+                        dtype: type = np.float64) -> Dict[str, np.ndarray]:
+    """Переложить пакеты вида (workout_type, data) в колонки dtype."""
+    size = len(packages)
+    columns = {name: np.zeros(size, dtype=dtype) for name in COLUMNS}
+    types = np.empty(size, dtype='<U3')
+    for index, (workout_type, data) in enumerate(packages):
+        check_implemented(workout_type, len(data), TRAINING_CLASSES)
+        types[index] = workout_type
+        for name, value in zip(WORKOUT_COLUMNS[workout_type], data):
+            columns[name][index] = value
+    columns['workout_type'] = types
+    return columns
+
+
+def compute_packages(packages: Sequence[tuple],
+                     dtype: type = np.float64) -> Dict[str, np.ndarray]:
+    """Пакетный аналог read_package(...).show_training_info()."""
+    columns = packages_to_columns(packages, dtype)
+    types = columns.pop('workout_type')
+    result = compute_batch(types, columns, dtype)
+    result['training_type'] = training_names(types)
+    return result
+
+
+def render_columns(result: Dict[str, np.ndarray],
+                   out: Optional[IO[str]] = None) -> str:
+    """Отформатировать результат compute_packages как render_many.
+
+    Строки собираются прямо из колонок, без объектов InfoMessage.
+    """
+    template, _ = compile_message(InfoMessage.INFO_MESSAGE)
+    rows = zip(*(result[name].tolist() for name in (
+        'training_type', 'duration', 'distance', 'speed', 'calories')))
+    lines = [template % row for row in rows]
+    lines.append('')
+    text = '\n'.join(lines)
+    if out is not None:
+        out.write(text)
+    return text
@@ -0,0 +1,591 @@
+"""Замеры производительности модуля расчёта тренировок."""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from timeit import default_timer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from homework import InfoMessage, read_package, render_many
+
+Package = Tuple[str, List[float]]
+
+
+def _common(rnd: random.Random) -> List[float]:
+    """Шаги или гребки, длительность и вес спортсмена."""
+    return [rnd.randint(100, 30000), rnd.uniform(0.25, 3),
+            rnd.uniform(40, 120)]
+
+
+GENERATORS: Dict[str, Callable[[random.Random], List[float]]] = {
+    'SWM': lambda rnd: _common(rnd) + [rnd.choice((25, 50)),
+                                       rnd.randint(4, 80)],
+    'RUN': _common,
+    'WLK': lambda rnd: _common(rnd) + [rnd.uniform(140, 210)],
+}
+
+
+def make_packages(count: int,
+                  seed: int = 0,
+                  workout_types: Sequence[str] = ('SWM', 'RUN', 'WLK')
+                  ) -> List[Package]:
+    """Сгенерировать случайные пакеты заданных типов тренировок."""
+    rnd = random.Random(seed)
+    packages: List[Package] = []
+    for _ in range(count):
+        workout_type = rnd.choice(workout_types)
+        packages.append((workout_type, GENERATORS[workout_type](rnd)))
+    return packages
+
+
+def timed(func: Callable[[], object], repeat: int = 3) -> float:
+    """Лучшее время из repeat запусков func в секундах."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = default_timer()
+        func()
+        best = min(best, default_timer() - start)
+    return best
+
+
+def per_object(packages: List[Package]) -> None:
+    """Эталонный путь: read_package -> Training -> InfoMessage."""
+    for workout_type, data in packages:
+        read_package(workout_type, data).show_training_info()
+
+
+def bench_batch(count: int) -> None:
+    """Сравнить пакетный расчёт на NumPy с расчётом по объектам."""
+    from batch import compute_batch, packages_to_columns
+
+    packages = make_packages(count)
+    columns = packages_to_columns(packages)
+    types = columns.pop('workout_type')
+    objects = timed(lambda: per_object(packages))
+    vectorized = timed(lambda: compute_batch(types, columns))
+    print(f'per-object: {objects:.4f} с '
+          f'({count / objects:,.0f} пакетов/с)')
+    print(f'batch:      {vectorized:.4f} с '
+          f'({count / vectorized:,.0f} пакетов/с, '
+          f'x{objects / vectorized:.1f})')
+
+
+def write_csv(packages: List[Package], path: str) -> None:
+    """Записать пакеты в CSV в формате pipeline.read_csv."""
+    with open(path, 'w', encoding='utf-8') as stream:
+        for workout_type, data in packages:
+            stream.write(','.join([workout_type, *map(str, data)]) + '\n')
+
+
+def bench_parallel(count: int) -> None:
+    """Замерить масштабирование run_parallel по числу процессов."""
+    from parallel import run_parallel
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'packages.csv')
+        write_csv(make_packages(count), path)
+        with open(os.devnull, 'w', encoding='utf-8') as out:
+            single = None
+            workers = 1
+            while workers <= (os.cpu_count() or 1):
+                elapsed = timed(
+                    lambda: run_parallel(path, out, workers=workers,
+                                         chunk_size=1 << 20),
+                    repeat=1,
+                )
+                single = single or elapsed
+                print(f'workers={workers}: {elapsed:.3f} с '
+                      f'(x{single / elapsed:.1f})')
+                workers *= 2
+
+
+def bench_cluster(count: int) -> None:
+    """Замерить координатор с разным числом локальных обработчиков."""
+    from cluster import run_cluster
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'packages.csv')
+        write_csv(make_packages(count), path)
+        for workers in (1, 2, 4):
+            start = default_timer()
+            report = run_cluster([path], workers, shard_size=1 << 20)
+            elapsed = default_timer() - start
+            print(f'workers={workers}: {count / elapsed:,.0f} пакетов/с, '
+                  f'шардов {len(report.shards)}, '
+                  f'отстающих {len(report.stragglers)}')
+
+
+def allocated(func: Callable[[], object]) -> Tuple[int, object]:
+    """Сколько байт памяти удерживает результат func()."""
+    tracemalloc.start()
+    try:
+        result = func()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size, result
+
+
+def bench_float32(count: int) -> None:
+    """Сравнить расчёт колонок в float64 и float32: время, память, ошибка."""
+    import numpy as np
+
+    from batch import compute_batch, packages_to_columns
+
+    packages = make_packages(min(count, 100_000))
+    base = packages_to_columns(packages)
+    repeats = -(-count // len(packages))
+    types = np.tile(base.pop('workout_type'), repeats)[:count]
+    reference = None
+    for dtype in (np.float64, np.float32):
+        columns = {name: np.tile(values, repeats)[:count].astype(dtype)
+                   for name, values in base.items()}
+        size = sum(values.nbytes for values in columns.values())
+        elapsed = timed(lambda: compute_batch(types, columns, dtype))
+        result = compute_batch(types, columns, dtype)
+        line = (f'{np.dtype(dtype).name}: {count / elapsed:,.0f} пакетов/с, '
+                f'колонки {size / 2 ** 20:.0f} МБ')
+        if reference is None:
+            reference = result
+        else:
+            error = max(np.abs(result[name] - reference[name]).max()
+                        for name in ('distance', 'speed', 'calories'))
+            line += f', наибольшая ошибка {error:.2e}'
+        print(line)
+
+
+def bench_memory(count: int) -> None:
+    """Сравнить память и скорость обычных и компактных тренировок."""
+    import compact
+
+    packages = make_packages(count)
+    for title, read in (('homework', read_package),
+                        ('compact', compact.read_package)):
+        size, trainings = allocated(
+            lambda: [read(*package) for package in packages]
+        )
+        elapsed = timed(
+            lambda: [read(*package).show_training_info()
+                     for package in packages]
+        )
+        print(f'{title:>8}: {size / count:.0f} байт/тренировка, '
+              f'{elapsed:.3f} с на расчёт')
+    size, _ = allocated(
+        lambda: [training.show_training_info() for training in trainings]
+    )
+    print(f'{"list":>8}: {size / count:.0f} байт/сообщение')
+    size, _ = allocated(
+        lambda: compact.InfoColumns(training.show_training_info()
+                                    for training in trainings)
+    )
+    print(f'{"columns":>8}: {size / count:.0f} байт/сообщение')
+
+
+def bench_frozen(count: int) -> None:
+    """Сравнить чтение калорий тренировок из 4 потоков."""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    import frozen
+
+    packages = make_packages(count)
+    lock = threading.Lock()
+
+    class Locked:
+        """Кэш показателей под блокировкой — для сравнения."""
+
+        def __init__(self, training) -> None:
+            self.training = training
+            self.calories = None
+
+        def get_spent_calories(self) -> float:
+            with lock:
+                if self.calories is None:
+                    self.calories = self.training.get_spent_calories()
+                return self.calories
+
+    variants = {
+        'обычные': [read_package(*package) for package in packages],
+        'с кэшем': [read_package(*package, cache_metrics=True)
+                    for package in packages],
+        'под блокировкой': [Locked(read_package(*package))
+                            for package in packages],
+        'неизменяемые': [frozen.read_package(*package)
+                         for package in packages],
+    }
+
+    def read_all(trainings) -> None:
+        for training in trainings:
+            training.get_spent_calories()
+
+    for name, trainings in variants.items():
+        with ThreadPoolExecutor(4) as executor:
+            elapsed = timed(lambda: list(executor.map(
+                read_all, [trainings] * 4
+            )))
+        print(f'{name:16}: {4 * count / elapsed:12,.0f} чтений/с')
+
+
+def bench_server(count: int) -> None:
+    """Нагрузочный тест локального asyncio-сервера."""
+    import asyncio
+
+    from server import PackageServer, load_test
+
+    async def run() -> dict:
+        server = await PackageServer().start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await load_test(make_packages(count), port=port)
+
+    stats = asyncio.run(run())
+    print(f'{stats["packages_per_second"]:,.0f} пакетов/с, '
+          f'p50 {stats["p50_ms"]:.2f} мс, p99 {stats["p99_ms"]:.2f} мс')
+
+
+def bench_binary(count: int) -> None:
+    """Сравнить чтение и расчёт пакетов из CSV и двоичного файла."""
+    from batch import compute_packages
+    from binary import iter_batches, write_packages
+    from pipeline import iter_packages
+
+    packages = make_packages(count)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'packages.csv')
+        bin_path = os.path.join(tmp, 'packages.bin')
+        write_csv(packages, csv_path)
+        write_packages(packages, bin_path)
+        from_csv = timed(
+            lambda: compute_packages(list(iter_packages(csv_path)))
+        )
+        from_binary = timed(lambda: list(iter_batches(bin_path)))
+    print(f'csv:    {count / from_csv:,.0f} пакетов/с')
+    print(f'binary: {count / from_binary:,.0f} пакетов/с '
+          f'(x{from_csv / from_binary:.0f})')
+
+
+def bench_archive(count: int) -> None:
+    """Сравнить запрос к архиву с просмотром текстового журнала."""
+    import re
+
+    from archive import SessionArchive
+    from batch import compute_packages
+
+    packages = make_packages(count)
+    columns = compute_packages(packages)
+    timestamps = [float(index) for index in range(count)]
+    athletes = [f'athlete-{index % 1000}' for index in range(count)]
+    low, high = count * 0.5, count * 0.501
+    line_re = re.compile(r'^(\S+) (\S+) Тип тренировки: (\w+);.*'
+                         r'Потрачено ккал: (\S+)\.$')
+
+    def scan_log(path: str) -> list:
+        found = []
+        with open(path, encoding='utf-8') as stream:
+            for line in stream:
+                timestamp, athlete, training_type, calories = (
+                    line_re.match(line).groups()
+                )
+                if low <= float(timestamp) <= high:
+                    found.append((athlete, training_type, float(calories)))
+        return found
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, 'sessions.log')
+        with open(log_path, 'w', encoding='utf-8') as stream:
+            for timestamp, athlete, package in zip(timestamps, athletes,
+                                                   packages):
+                info = read_package(*package).show_training_info()
+                stream.write(f'{timestamp} {athlete} '
+                             f'{info.get_message()}\n')
+        store = SessionArchive(os.path.join(tmp, 'archive'))
+        for start in range(0, count, 100_000):
+            part = slice(start, start + 100_000)
+            store.append_columns(
+                athletes[part], timestamps[part],
+                {name: values[part] for name, values in columns.items()},
+            )
+        from_log = timed(lambda: scan_log(log_path), repeat=1)
+        from_archive = timed(lambda: store.query(low, high))
+    print(f'журнал: {from_log * 1000:.1f} мс')
+    print(f'архив:  {from_archive * 1000:.1f} мс '
+          f'(x{from_log / from_archive:.0f})')
+
+
+def bench_dedup(count: int) -> None:
+    """Сравнить первую обработку фида с его повтором через DedupStore."""
+    import io
+
+    from dedup import DedupStore
+    from pipeline import run
+
+    packages = make_packages(count)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'packages.csv')
+        db_path = os.path.join(tmp, 'dedup.db')
+        write_csv(packages, csv_path)
+        plain = timed(lambda: run([csv_path], io.StringIO()), repeat=1)
+        with DedupStore(db_path, capacity=count) as dedup:
+            first = timed(lambda: run([csv_path], io.StringIO(),
+                                      dedup=dedup), repeat=1)
+        with DedupStore(db_path, capacity=count) as dedup:
+            replay = timed(lambda: run([csv_path], io.StringIO(),
+                                       dedup=dedup), repeat=1)
+            skipped = dedup.duplicates
+    print(f'без отсева:   {count / plain:,.0f} пакетов/с')
+    print(f'первый проход: {count / first:,.0f} пакетов/с')
+    print(f'повтор:       {count / replay:,.0f} пакетов/с, '
+          f'пропущено {skipped:,} из {count:,}')
+
+
+def bench_resultcache(count: int) -> None:
+    """Расчёт и кэш результатов на фиде из повторяющихся планов."""
+    import io
+
+    from pipeline import run
+    from resultcache import ResultCache
+
+    plans = make_packages(100)
+    packages = [plans[index % len(plans)] for index in range(count)]
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'packages.csv')
+        db_path = os.path.join(tmp, 'results.db')
+        write_csv(packages, csv_path)
+        plain = timed(lambda: run([csv_path], io.StringIO()), repeat=1)
+        with ResultCache(db_path) as cache:
+            first = timed(lambda: run([csv_path], io.StringIO(),
+                                      cache=cache), repeat=1)
+        with ResultCache(db_path) as cache:
+            warm = timed(lambda: run([csv_path], io.StringIO(),
+                                     cache=cache), repeat=1)
+            rate = cache.hit_rate
+    print(f'без кэша:      {count / plain:,.0f} пакетов/с')
+    print(f'первый проход: {count / first:,.0f} пакетов/с')
+    print(f'тёплый кэш:    {count / warm:,.0f} пакетов/с, '
+          f'попаданий {rate:.1%}')
+
+
+def bench_encoders(count: int) -> None:
+    """Скорость и размер вывода каждого кодировщика, со сжатием и без."""
+    import io
+    import re
+
+    from encoders import (COMPRESSORS, ENCODERS, decode_binary, encode_all,
+                          get_encoder)
+
+    messages = [read_package(*package).show_training_info()
+                for package in make_packages(count)]
+    for name in ENCODERS:
+        for compression in (None, *COMPRESSORS):
+            buffer = io.BytesIO()
+
+            def encode() -> None:
+                buffer.seek(0)
+                buffer.truncate()
+                out = (buffer if compression is None
+                       else COMPRESSORS[compression](buffer, 'wb'))
+                encode_all(messages, get_encoder(name), out)
+                if compression is not None:
+                    out.close()
+
+            elapsed = timed(encode, repeat=1)
+            print(f'{name:6} {compression or "-":4}: '
+                  f'{count / elapsed:12,.0f} сообщений/с, '
+                  f'{len(buffer.getvalue()) / count:5.1f} байт/сообщение')
+    text = render_many(messages)
+    pattern = re.compile(r'Тип тренировки: (\w+); Длительность: (\S+) ч\.; '
+                         r'Дистанция: (\S+) км; Ср\. скорость: (\S+) км/ч; '
+                         r'Потрачено ккал: (\S+)\.')
+    binary = io.BytesIO()
+    encode_all(messages, get_encoder('binary'), binary)
+    from_text = timed(lambda: [
+        InfoMessage(name, *map(float, values))
+        for name, *values in pattern.findall(text)
+    ], repeat=1)
+    from_binary = timed(lambda: decode_binary(binary.getvalue()), repeat=1)
+    print(f'разбор текста регулярным выражением: '
+          f'{count / from_text:,.0f} сообщений/с')
+    print(f'чтение двоичного формата:           '
+          f'{count / from_binary:,.0f} сообщений/с')
+
+
+STARTUP_BUDGET_MS: float = 150.0
+# Модули, которые не должны загружаться при импорте homework.
+LAZY_MODULES = ('numpy', 'asyncio', 'argparse', 'concurrent.futures',
+                'json', 'csv', 'importlib.metadata')
+
+
+def import_time(statement: str = 'import homework'
+                ) -> Dict[str, float]:
+    """Время импорта по модулям в мс по отчёту python -X importtime.
+
+    Ключ — имя модуля, значение — накопленное время с вложенными
+    импортами. Ключ 'total' — сумма по модулям верхнего уровня.
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    times: Dict[str, float] = {'total': 0.0}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1000
+        if not name.startswith('  '):
+            times['total'] += int(cumulative) / 1000
+    return times
+
+
+def run_time(argv: List[str], repeat: int = 3) -> float:
+    """Лучшее из repeat время запуска python homework.py argv в мс."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = default_timer()
+        subprocess.run([sys.executable, 'homework.py', *argv],
+                       capture_output=True, check=True,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        best = min(best, (default_timer() - start) * 1000)
+    return best
+
+
+def bench_startup(count: int) -> None:
+    """Отчёт о времени импорта homework, как у -X importtime."""
+    times = import_time()
+    slowest = sorted(times.items(), key=lambda item: -item[1])
+    for name, elapsed in slowest[:min(count, len(slowest))]:
+        print(f'{elapsed:8.2f} мс  {name}')
+    print(f'бюджет: {STARTUP_BUDGET_MS:.0f} мс')
+
+
+def measure_stages(workout_type: str, count: int) -> Dict[str, float]:
+    """Замерить стадии обработки для одного типа тренировки.
+
+    Для каждой стадии — время одной записи в наносекундах (лучшее из
+    нескольких прогонов по одной записи) и пропускная способность на
+    count записях в записях в секунду.
+    """
+    packages = make_packages(count, seed=1, workout_types=(workout_type,))
+    trainings = [read_package(*package) for package in packages]
+    messages = [training.show_training_info() for training in trainings]
+    package, training, message = packages[0], trainings[0], messages[0]
+    cls = type(training)
+    stages: Dict[str, Tuple[Callable[[], object], Callable[[], object]]] = {
+        'construct': (
+            lambda: cls(*package[1]),
+            lambda: [cls(*data) for _, data in packages],
+        ),
+        'dispatch': (
+            lambda: read_package(*package),
+            lambda: [read_package(*item) for item in packages],
+        ),
+        'metrics': (
+            training.show_training_info,
+            lambda: [item.show_training_info() for item in trainings],
+        ),
+        'format': (
+            message.get_message,
+            lambda: render_many(messages),
+        ),
+    }
+    results: Dict[str, float] = {}
+    for stage, (single, bulk) in stages.items():
+        results[f'{stage}_latency_ns'] = min(
+            timed(single, repeat=1) for _ in range(1000)
+        ) * 1e9
+        results[f'{stage}_per_second'] = count / timed(bulk)
+    return results
+
+
+def run_suite(count: int) -> Dict[str, Dict[str, float]]:
+    """Замерить стадии обработки для всех типов тренировок."""
+    return {workout_type: measure_stages(workout_type, count)
+            for workout_type in GENERATORS}
+
+
+def compare(results: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]],
+            threshold: float = 0.2) -> List[str]:
+    """Найти метрики, которые ухудшились больше чем на threshold.
+
+    Для задержек (_ns) хуже — больше, для пропускной способности —
+    меньше. Метрики, которых нет в базовой линии, не сравниваются.
+    """
+    regressions: List[str] = []
+    for workout_type, metrics in results.items():
+        for name, value in metrics.items():
+            base = baseline.get(workout_type, {}).get(name)
+            if not base:
+                continue
+            change = (value / base if name.endswith('_ns')
+                      else base / value) - 1
+            if change > threshold:
+                regressions.append(
+                    f'{workout_type}.{name}: {base:,.1f} -> {value:,.1f} '
+                    f'(хуже на {change:.0%})'
+                )
+    return regressions
+
+
+def bench_suite(count: int,
+                save: Optional[str] = None,
+                baseline: Optional[str] = None,
+                threshold: float = 0.2) -> int:
+    """Прогнать набор замеров, сохранить и сравнить с базовой линией.
+
+    Возвращает код выхода: 1, если найдены регрессии.
+    """
+    results = run_suite(count)
+    for workout_type, metrics in results.items():
+        for name, value in metrics.items():
+            print(f'{workout_type}.{name}: {value:,.1f}')
+    if save:
+        with open(save, 'w', encoding='utf-8') as stream:
+            json.dump(results, stream, indent=2, sort_keys=True)
+    if not baseline:
+        return 0
+    with open(baseline, encoding='utf-8') as stream:
+        regressions = compare(results, json.load(stream), threshold)
+    for line in regressions:
+        print(f'Регрессия: {line}')
+    return 1 if regressions else 0
+
+
+BENCHMARKS = {
+    'batch': bench_batch,
+    'float32': bench_float32,
+    'parallel': bench_parallel,
+    'cluster': bench_cluster,
+    'memory': bench_memory,
+    'server': bench_server,
+    'frozen': bench_frozen,
+    'binary': bench_binary,
+    'archive': bench_archive,
+    'dedup': bench_dedup,
+    'encoders': bench_encoders,
+    'resultcache': bench_resultcache,
+    'startup': bench_startup,
+    'suite': bench_suite,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('benchmark', choices=BENCHMARKS, nargs='?',
+                        default='suite')
+    parser.add_argument('count', type=int, nargs='?', default=100_000)
+    parser.add_argument('--save', help='сохранить результаты в JSON')
+    parser.add_argument('--baseline', help='JSON с базовой линией')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='допустимое ухудшение, доля')
+    args = parser.parse_args()
+    if args.benchmark != 'suite':
+        BENCHMARKS[args.benchmark](args.count)
+        sys.exit(0)
+    sys.exit(bench_suite(args.count, args.save, args.baseline,
+                         args.threshold))
@@ -0,0 +1,131 @@
+"""Двоичный формат пакетов с записями фиксированной длины.
+
+Файл начинается с заголовка: сигнатура FTPK, версия формата и длина
+записи. Дальше идут записи по 37 байт: код тренировки, число шагов или
+гребков, длительность, вес и два параметра тренировки (рост для ходьбы,
+длина бассейна и число бассейнов для плавания).
+"""
+import os
+import struct
+import sys
+from typing import (TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional,
+                    Tuple)
+
+import numpy as np
+
+from batch import TRAINING_CLASSES, compute_batch, training_names
+from homework import check_implemented
+from pipeline import iter_packages
+
+if TYPE_CHECKING:
+    from validation import Quarantine
+
+MAGIC = b'FTPK'
+VERSION: int = 1
+HEADER = struct.Struct('<4sHH')
+RECORD = struct.Struct('<BIdddd')
+RECORD_DTYPE = np.dtype([
+    ('type', 'u1'),
+    ('action', '<u4'),
+    ('duration', '<f8'),
+    ('weight', '<f8'),
+    ('param1', '<f8'),
+    ('param2', '<f8'),
+])
+WRITE_BATCH: int = 4096
+
+TYPE_CODES: Dict[str, int] = {'SWM': 1, 'RUN': 2, 'WLK': 3}
+TYPE_NAMES = np.array(['', 'SWM', 'RUN', 'WLK'])
+PARAMS: Dict[str, str] = {
+    'height': 'param1',
+    'length_pool': 'param1',
+    'count_pool': 'param2',
+}
+
+
+def pack_record(workout_type: str, data: List[float]) -> bytes:
+    """Упаковать пакет в виде (workout_type, data) в запись.
+
+    Число шагов или гребков хранится целым.
+    """
+    check_implemented(workout_type, len(data), TRAINING_CLASSES)
+    action, duration, weight, *params = data
+    params += [0.0] * (2 - len(params))
+    return RECORD.pack(TYPE_CODES[workout_type], int(action), duration,
+                       weight, *params)
+
+
+def write_packages(packages: Iterable[Tuple[str, List[float]]],
+                   path: str) -> int:
+    """Записать пакеты в двоичный файл, вернуть число записей."""
+    written = 0
+    with open(path, 'wb') as stream:
+        stream.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        chunk: List[bytes] = []
+        for workout_type, data in packages:
+            chunk.append(pack_record(workout_type, data))
+            if len(chunk) == WRITE_BATCH:
+                stream.write(b''.join(chunk))
+                written += len(chunk)
+                chunk.clear()
+        stream.write(b''.join(chunk))
+        written += len(chunk)
+    return written
+
+
+def open_records(path: str) -> np.ndarray:
+    """Отобразить записи файла в память без чтения в Python-объекты."""
+    with open(path, 'rb') as stream:
+        magic, version, size = HEADER.unpack(stream.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or size != RECORD.size:
+        raise ValueError(f'Файл {path} не в формате пакетов версии '
+                         f'{VERSION}')
+    if os.path.getsize(path) == HEADER.size:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r',
+                     offset=HEADER.size)
+
+
+def to_columns(records: np.ndarray
+               ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Коды тренировок и колонки для compute_batch.
+
+    Числовые колонки — представления записей без копирования.
+    """
+    codes = records['type']
+    if codes.size and codes.max() >= len(TYPE_NAMES):
+        raise ValueError('Не удалось определить тип тренировки')
+    columns = {name: records[name]
+               for name in ('action', 'duration', 'weight')}
+    for name, field in PARAMS.items():
+        columns[name] = records[field]
+    return TYPE_NAMES[codes], columns
+
+
+def iter_batches(path: str,
+                 batch_size: int = 1 << 20,
+                 quarantine: Optional['Quarantine'] = None,
+                 dtype: type = np.float64
+                 ) -> Iterator[Dict[str, np.ndarray]]:
+    """Рассчитать показатели файла порциями по batch_size записей.
+
+    С quarantine ошибочные записи отсеиваются векторной проверкой и
+    уходят в карантин. dtype — точность расчёта, см. batch.
+    """
+    records = open_records(path)
+    for start in range(0, len(records), batch_size):
+        types, columns = to_columns(records[start:start + batch_size])
+        if quarantine is not None:
+            types, columns = quarantine.filter_columns(types, columns)
+        result = compute_batch(types, columns, dtype)
+        result['training_type'] = training_names(types)
+        yield result
+
+
+def convert(source: str, target: str) -> int:
+    """Перевести файл CSV или JSON Lines в двоичный формат."""
+    return write_packages(iter_packages(source), target)
+
+
+if __name__ == '__main__':
+    print(convert(sys.argv[1], sys.argv[2]))
@@ -0,0 +1,373 @@
+"""Распределённая обработка файлов: координатор и обработчики.
+
+Координатор делит файлы на шарды — диапазоны байтов, как в parallel,
+— и раздаёт их обработчикам через сокеты multiprocessing.connection.
+Обработчик считает тренировки шарда через read_package и
+show_training_info и возвращает частичные итоги по типам тренировок.
+Шард, обработчик которого упал или вернул ошибку, отдаётся снова, не
+больше max_retries раз. Обработчики на других машинах запускаются
+командой worker и должны видеть файлы по тем же путям. С карантином
+обработчик возвращает ошибочные пакеты и строки шарда вместе с итогами,
+а координатор пишет их в свой поток карантина.
+
+Стороны соединения обмениваются объектами pickle, поэтому знающий ключ
+authkey может выполнить код на другой стороне. Для локальных
+обработчиков ключ случайный; для обработчиков на других машинах его
+нужно задать явно и держать в секрете.
+"""
+import os
+import queue
+import secrets
+import socket
+import statistics
+import sys
+import threading
+from dataclasses import asdict, dataclass, field
+from io import StringIO
+from multiprocessing import AuthenticationError, Process
+from multiprocessing.connection import Client, Connection, Listener
+from time import perf_counter
+from typing import (TYPE_CHECKING, Callable, Dict, Iterable, List, Optional,
+                    Tuple)
+
+from aggregation import Totals
+from parallel import CHUNK_SIZE, byte_ranges, read_range
+from pipeline import detect_format, process
+
+if TYPE_CHECKING:
+    from validation import Quarantine
+
+Address = Tuple[str, int]
+# Переменная окружения с ключом для команд cluster и worker.
+AUTHKEY_ENV = 'FITNESS_CLUSTER_AUTHKEY'
+AUTHKEY_BYTES: int = 32
+MAX_RETRIES: int = 2
+STRAGGLER_FACTOR: float = 3.0
+
+
+@dataclass
+class Shard:
+    """Диапазон байтов [start, end) файла path."""
+    shard_id: int
+    path: str
+    start: int
+    end: int
+    fmt: str
+    attempts: int = 0
+    quarantine: bool = False
+
+
+@dataclass
+class ShardResult:
+    """Сведения об обработанном шарде."""
+    shard_id: int
+    worker: str
+    packages: int
+    seconds: float
+    attempts: int
+
+    @property
+    def per_second(self) -> float:
+        return self.packages / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class ClusterReport:
+    """Итоги по типам тренировок и сведения о шардах."""
+    totals: Dict[str, Totals] = field(default_factory=dict)
+    shards: List[ShardResult] = field(default_factory=list)
+    failed: Dict[int, str] = field(default_factory=dict)
+    retries: int = 0
+    straggler_factor: float = STRAGGLER_FACTOR
+
+    @property
+    def stragglers(self) -> List[ShardResult]:
+        """Шарды, которые обрабатывались дольше straggler_factor медиан."""
+        if len(self.shards) < 2:
+            return []
+        median = statistics.median(shard.seconds for shard in self.shards)
+        return [shard for shard in self.shards
+                if shard.seconds > self.straggler_factor * median]
+
+    def render(self) -> str:
+        """Текстовый отчёт: итоги, шарды, отстающие и ошибки."""
+        lines = []
+        for training_type, totals in sorted(self.totals.items()):
+            lines.append(
+                f'{training_type}: тренировок {totals.sessions}, '
+                f'{totals.duration:.3f} ч., {totals.distance:.3f} км, '
+                f'{totals.calories:.3f} ккал'
+            )
+        for shard in sorted(self.shards, key=lambda shard: shard.shard_id):
+            lines.append(
+                f'шард {shard.shard_id} ({shard.worker}): '
+                f'{shard.packages} пакетов за {shard.seconds:.3f} с, '
+                f'{shard.per_second:,.0f} пакетов/с, '
+                f'попыток {shard.attempts}'
+            )
+        for shard in self.stragglers:
+            lines.append(f'отстающий шард {shard.shard_id} ({shard.worker})')
+        for shard_id, reason in sorted(self.failed.items()):
+            lines.append(f'шард {shard_id} не обработан: {reason}')
+        lines.append('')
+        return '\n'.join(lines)
+
+
+def make_shards(paths: Iterable[str],
+                shard_size: int = CHUNK_SIZE,
+                fmt: Optional[str] = None) -> List[Shard]:
+    """Разбить файлы на шарды по shard_size байт."""
+    shards: List[Shard] = []
+    for path in paths:
+        path_fmt = fmt or detect_format(path)
+        for start, end in byte_ranges(path, shard_size):
+            shards.append(Shard(len(shards), path, start, end, path_fmt))
+    return shards
+
+
+def aggregate_shard(shard: Shard,
+                    quarantine: Optional['Quarantine'] = None
+                    ) -> Tuple[Dict[str, Dict], int]:
+    """Частичные итоги шарда по типам тренировок и число пакетов.
+
+    С quarantine ошибочные пакеты и строки уходят в карантин.
+    """
+    totals: Dict[str, Totals] = {}
+    packages = 0
+    if quarantine is None:
+        infos = process(read_range(shard.path, shard.start, shard.end,
+                                   shard.fmt))
+    else:
+        infos = process(
+            quarantine.filter(read_range(shard.path, shard.start, shard.end,
+                                         shard.fmt, quarantine.reject_line)),
+            errors=quarantine.reject_error,
+        )
+    for info in infos:
+        totals.setdefault(info.training_type, Totals()).add(info)
+        packages += 1
+    return {name: asdict(value) for name, value in totals.items()}, packages
+
+
+def worker(address: Address,
+           authkey: bytes,
+           name: Optional[str] = None,
+           crash_after: Optional[int] = None) -> None:
+    """Обработчик: брать шарды у координатора, пока они есть.
+
+    crash_after — завершить процесс без ответа на crash_after-м шарде;
+    нужен, чтобы проверять повторы на одной машине.
+    """
+    name = name or f'{socket.gethostname()}:{os.getpid()}'
+    with Client(address, authkey=authkey) as connection:
+        connection.send(('hello', name))
+        received = 0
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                return
+            if message[0] == 'stop':
+                return
+            shard: Shard = message[1]
+            received += 1
+            if crash_after is not None and received >= crash_after:
+                os._exit(1)
+            start = perf_counter()
+            quarantine = None
+            if shard.quarantine:
+                from validation import Quarantine
+
+                quarantine = Quarantine(StringIO())
+            try:
+                totals, packages = aggregate_shard(shard, quarantine)
+            except Exception as error:
+                connection.send(('error', shard.shard_id,
+                                 f'{type(error).__name__}: {error}'))
+                continue
+            rejected = ('', {}) if quarantine is None else (
+                quarantine.out.getvalue(), dict(quarantine.reasons)
+            )
+            connection.send(('done', shard.shard_id, totals, packages,
+                             perf_counter() - start, *rejected))
+
+
+class Coordinator:
+    """Раздача шардов подключившимся обработчикам и сбор итогов."""
+
+    def __init__(self,
+                 shards: List[Shard],
+                 address: Address = ('127.0.0.1', 0),
+                 authkey: Optional[bytes] = None,
+                 max_retries: int = MAX_RETRIES,
+                 straggler_factor: float = STRAGGLER_FACTOR,
+                 quarantine: Optional['Quarantine'] = None) -> None:
+        self.authkey = authkey or secrets.token_bytes(AUTHKEY_BYTES)
+        self.listener = Listener(address, backlog=64, authkey=self.authkey)
+        self.max_retries = max_retries
+        self.quarantine = quarantine
+        self.pending: 'queue.Queue[Shard]' = queue.Queue()
+        for shard in shards:
+            shard.quarantine = quarantine is not None
+            self.pending.put(shard)
+        self.remaining = len(shards)
+        self.report = ClusterReport(straggler_factor=straggler_factor)
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        if not shards:
+            self.finished.set()
+
+    @property
+    def address(self) -> Address:
+        return self.listener.address
+
+    def start(self) -> None:
+        """Принимать обработчиков в фоновом потоке."""
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                connection = self.listener.accept()
+            except AuthenticationError:
+                continue
+            except OSError:
+                return
+            with self.lock:
+                self.connections += 1
+            threading.Thread(target=self._serve, args=(connection,),
+                             daemon=True).start()
+
+    def _settle(self, shard: Shard, reason: str) -> None:
+        """Повторить шард или, если попытки кончились, признать ошибку."""
+        with self.lock:
+            if shard.attempts <= self.max_retries:
+                self.report.retries += 1
+                self.pending.put(shard)
+                return
+            self.report.failed[shard.shard_id] = reason
+            self._complete()
+
+    def _complete(self) -> None:
+        self.remaining -= 1
+        if not self.remaining:
+            self.finished.set()
+
+    def _record(self, shard: Shard, name: str, reply: tuple) -> None:
+        """Учесть итоги и карантин обработанного шарда."""
+        _, _, totals, packages, seconds, rejected, reasons = reply
+        with self.lock:
+            if self.quarantine is not None:
+                self.quarantine.merge(rejected, reasons)
+            for training_type, values in totals.items():
+                self.report.totals.setdefault(
+                    training_type, Totals()
+                ).merge(Totals(**values))
+            self.report.shards.append(ShardResult(
+                shard.shard_id, name, packages, seconds, shard.attempts,
+            ))
+            self._complete()
+
+    def _serve(self, connection: Connection) -> None:
+        """Цикл одного обработчика: шард, ответ, следующий шард."""
+        try:
+            _, name = connection.recv()
+            while not self.finished.is_set():
+                try:
+                    shard = self.pending.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                shard.attempts += 1
+                try:
+                    connection.send(('shard', shard))
+                    reply = connection.recv()
+                except (EOFError, OSError):
+                    self._settle(shard, f'обработчик {name} отключился')
+                    return
+                if reply[0] == 'error':
+                    self._settle(shard, reply[2])
+                    continue
+                self._record(shard, name, reply)
+            connection.send(('stop',))
+        except (EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+            with self.lock:
+                self.connections -= 1
+
+    def wait(self,
+             alive: Callable[[], bool] = lambda: True,
+             poll: float = 0.1) -> ClusterReport:
+        """Дождаться всех шардов.
+
+        Если alive() ложно и подключённых обработчиков нет, оставшиеся
+        шарды признаются необработанными.
+        """
+        while not self.finished.wait(poll):
+            with self.lock:
+                orphaned = not alive() and not self.connections
+            if orphaned:
+                self._fail_pending('нет живых обработчиков')
+        return self.report
+
+    def close(self) -> None:
+        """Перестать принимать обработчиков."""
+        self.listener.close()
+
+    def _fail_pending(self, reason: str) -> None:
+        while True:
+            try:
+                shard = self.pending.get_nowait()
+            except queue.Empty:
+                return
+            with self.lock:
+                self.report.failed[shard.shard_id] = reason
+                self._complete()
+
+
+def run_cluster(paths: Iterable[str],
+                workers: int = 2,
+                shard_size: int = CHUNK_SIZE,
+                fmt: Optional[str] = None,
+                address: Address = ('127.0.0.1', 0),
+                max_retries: int = MAX_RETRIES,
+                authkey: Optional[bytes] = None,
+                crash_after: Optional[Dict[int, int]] = None,
+                quarantine: Optional['Quarantine'] = None
+                ) -> ClusterReport:
+    """Обработать файлы координатором и workers локальными процессами.
+
+    При workers=0 координатор ждёт внешних обработчиков на address, и
+    authkey обязателен. Без authkey локальные обработчики получают
+    случайный ключ. crash_after — {номер обработчика: номер шарда}, на
+    котором он упадёт. С quarantine ошибочные пакеты шардов уходят в
+    карантин.
+    """
+    if not workers and not authkey:
+        raise ValueError('Для внешних обработчиков нужен ключ authkey')
+    coordinator = Coordinator(make_shards(paths, shard_size, fmt), address,
+                              authkey, max_retries, quarantine=quarantine)
+    if not workers:
+        host, port = coordinator.address
+        sys.stderr.write(f'Координатор ждёт обработчиков на {host}:{port}\n')
+    nodes = [
+        Process(target=worker,
+                args=(coordinator.address, coordinator.authkey,
+                      f'worker-{index}', (crash_after or {}).get(index)),
+                daemon=True)
+        for index in range(workers)
+    ]
+    # Процессы запускаются до потоков координатора: fork при работающем
+    # потоке может унаследовать захваченную им блокировку импорта.
+    for node in nodes:
+        node.start()
+    coordinator.start()
+    report = coordinator.wait(
+        lambda: not nodes or any(node.is_alive() for node in nodes)
+    )
+    for node in nodes:
+        node.join(timeout=5)
+    coordinator.close()
+    return report
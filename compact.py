@@ -0,0 +1,145 @@
+"""Компактные варианты классов тренировок без __dict__ у экземпляров.
+
+Классы называются так же, как в homework, и используют те же формулы и
+константы, поэтому show_training_info() возвращает те же сообщения.
+"""
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Type
+
+import homework
+from homework import InfoMessage
+
+
+def formulas_from(original: type,
+                  methods: bool = True) -> Callable[[type], type]:
+    """Перенести константы и методы расчёта из класса модуля homework.
+
+    Переносятся атрибуты original, которых нет в самом классе, кроме
+    служебных; при methods=False — только константы (имена в верхнем
+    регистре). Исходный класс сохраняется в атрибуте FORMULAS.
+    """
+    def decorator(cls: type) -> type:
+        for name, value in vars(original).items():
+            if (name.startswith('__') or name in vars(cls)
+                    or not (methods or name.isupper())):
+                continue
+            setattr(cls, name, value)
+        cls.FORMULAS = original
+        return cls
+    return decorator
+
+
+@formulas_from(homework.Training)
+class Training:
+    """Базовый класс тренировки."""
+    __slots__ = ('action_count', 'duration_hr', 'weight_kg')
+
+    def __init__(self,
+                 action: int,
+                 duration: float,
+                 weight: float) -> None:
+        self.action_count = action
+        self.duration_hr = duration
+        self.weight_kg = weight
+
+
+@formulas_from(homework.Running)
+class Running(Training):
+    """Тренировка: бег."""
+    __slots__ = ()
+
+
+@formulas_from(homework.SportsWalking)
+class SportsWalking(Training):
+    """Тренировка: спортивная ходьба."""
+    __slots__ = ('height_m',)
+
+    def __init__(self,
+                 action: int,
+                 duration: float,
+                 weight: float,
+                 height: float) -> None:
+        super().__init__(action, duration, weight)
+        self.height_m = height
+
+
+@formulas_from(homework.Swimming)
+class Swimming(Training):
+    """Тренировка: плавание."""
+    __slots__ = ('length_pool_m', 'count_pool')
+
+    def __init__(self,
+                 action: int,
+                 duration: float,
+                 weight: float,
+                 length_pool: float,
+                 count_pool: float) -> None:
+        super().__init__(action, duration, weight)
+        self.length_pool_m = length_pool
+        self.count_pool = count_pool
+
+
+TRAININGS: Dict[str, Type[Training]] = {
+    'SWM': Swimming,
+    'RUN': Running,
+    'WLK': SportsWalking,
+}
+# Классы homework, формулы которых повторяют компактные классы.
+IMPLEMENTED: Dict[str, type] = {
+    code: training.FORMULAS for code, training in TRAININGS.items()
+}
+
+
+def read_package(workout_type: str, data: List[int]) -> Training:
+    """Прочитать данные датчиков в компактный объект тренировки.
+
+    Компактные классы есть только у встроенных тренировок; для кода из
+    плагина или переопределённого класса выбрасывается ValueError.
+    """
+    homework.check_implemented(workout_type, len(data), IMPLEMENTED)
+    return TRAININGS[workout_type](*data)
+
+
+class InfoColumns:
+    """Набор информационных сообщений, хранимый по колонкам.
+
+    Вместо списка объектов InfoMessage хранит каждое поле в своём
+    массиве array: 8 байт на число вместо отдельного объекта float.
+    """
+    NUMERIC_FIELDS = ('duration', 'distance', 'speed', 'calories')
+
+    def __init__(self, messages: Iterable[InfoMessage] = ()) -> None:
+        self.training_types: List[str] = []
+        self.type_codes = array('B')
+        self.columns: Dict[str, array] = {
+            name: array('d') for name in self.NUMERIC_FIELDS
+        }
+        self.extend(messages)
+
+    def append(self, message: InfoMessage) -> None:
+        """Добавить сообщение в конец набора."""
+        if message.training_type not in self.training_types:
+            self.training_types.append(message.training_type)
+        self.type_codes.append(
+            self.training_types.index(message.training_type)
+        )
+        for name, column in self.columns.items():
+            column.append(getattr(message, name))
+
+    def extend(self, messages: Iterable[InfoMessage]) -> None:
+        """Добавить сообщения в конец набора."""
+        for message in messages:
+            self.append(message)
+
+    def __len__(self) -> int:
+        return len(self.type_codes)
+
+    def __getitem__(self, index: int) -> InfoMessage:
+        return InfoMessage(
+            self.training_types[self.type_codes[index]],
+            *(self.columns[name][index] for name in self.NUMERIC_FIELDS)
+        )
+
+    def __iter__(self) -> Iterator[InfoMessage]:
+        for index in range(len(self)):
+            yield self[index]
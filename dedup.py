@@ -0,0 +1,225 @@
+"""Отсев повторно присланных пакетов.
+
+Ключ пакета — хеш кода тренировки, параметров и, если есть, номера
+пакета. Без номера одинаковые по коду и параметрам пакеты считаются
+повтором, даже если это новая тренировка в другой день, поэтому шлюзу
+стоит присылать номер пакета (поле "package_id" в JSON).
+
+Сначала ключ проверяется фильтром Блума фиксированного размера: если
+фильтр ключа не видел, пакет точно новый. Если фильтр говорит
+«возможно, видел», ключ ищется в точном хранилище SQLite. Фильтр и
+ключи сохраняются в одном файле, поэтому повторная обработка фида
+не пересчитывает уже обработанные пакеты. Ключ сохраняется только после
+подтверждения, что сообщение пакета записано, поэтому пакеты, на
+которых обработка прервалась, при повторе обрабатываются заново.
+"""
+import math
+import sqlite3
+import struct
+from collections import deque
+from hashlib import blake2b
+from itertools import islice
+from typing import (Dict, Iterable, Iterator, List, Optional, Set, Tuple,
+                    Union)
+
+Package = Tuple[str, List[Union[int, float]]]
+NumberedPackage = Tuple[str, List[Union[int, float]], Optional[str]]
+
+DEDUP_CAPACITY: int = 1_000_000
+DEDUP_ERROR_RATE: float = 0.001
+FLUSH_KEYS: int = 10_000
+# Ключей в одном запросе к базе: не больше лимита параметров SQLite.
+QUERY_KEYS: int = 500
+
+
+def package_key(workout_type: str,
+                data: Iterable[Union[int, float]],
+                package_id: Optional[str] = None) -> bytes:
+    """Ключ пакета: 16 байт хеша.
+
+    Числа хешируются как double, поэтому 1 и 1.0 дают один ключ.
+    """
+    data = tuple(data)
+    prefix = f'{workout_type}|{package_id or ""}|'.encode()
+    return blake2b(prefix + struct.pack(f'<{len(data)}d', *data),
+                   digest_size=16).digest()
+
+
+class BloomFilter:
+    """Фильтр Блума с двойным хешированием по 16-байтным ключам."""
+
+    def __init__(self, capacity: int = DEDUP_CAPACITY,
+                 error_rate: float = DEDUP_ERROR_RATE,
+                 bits: Optional[bytes] = None,
+                 hashes: Optional[int] = None) -> None:
+        size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        if bits is None:
+            bits = bytes((size + 7) // 8)
+        self.bits = bytearray(bits)
+        self.size = len(self.bits) * 8
+        self.hashes = hashes or max(
+            1, round(self.size / capacity * math.log(2))
+        )
+
+    def _positions(self, key: bytes) -> List[int]:
+        value = int.from_bytes(key[:16], 'little')
+        first, step = value & 0xFFFFFFFFFFFFFFFF, (value >> 64) | 1
+        size = self.size
+        return [(first + index * step) % size
+                for index in range(self.hashes)]
+
+    def add(self, key: bytes) -> None:
+        bits = self.bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self.bits
+        for position in self._positions(key):
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+
+class DedupStore:
+    """Фильтр Блума с точной проверкой по SQLite.
+
+    Без path всё хранится в памяти процесса. Новый ключ сначала только
+    ждёт подтверждения: ack(count) подтверждает count самых старых
+    ключей, когда их пакеты обработаны и записаны. Подтверждённые ключи
+    пишутся в базу порциями по FLUSH_KEYS вместе с состоянием фильтра,
+    так что после сбоя фильтр и точное хранилище остаются
+    согласованными. При обычном закрытии подтверждаются все ключи, при
+    закрытии из-за исключения — сохраняются только подтверждённые.
+    """
+
+    def __init__(self, path: Optional[str] = None,
+                 capacity: int = DEDUP_CAPACITY,
+                 error_rate: float = DEDUP_ERROR_RATE) -> None:
+        self.db = sqlite3.connect(path or ':memory:')
+        self.db.execute('CREATE TABLE IF NOT EXISTS seen '
+                        '(key BLOB PRIMARY KEY) WITHOUT ROWID')
+        self.db.execute('CREATE TABLE IF NOT EXISTS bloom '
+                        '(id INTEGER PRIMARY KEY, hashes INTEGER, bits BLOB)')
+        row = self.db.execute(
+            'SELECT hashes, bits FROM bloom WHERE id = 1'
+        ).fetchone()
+        if row is None:
+            self.bloom = BloomFilter(capacity, error_rate)
+        else:
+            self.bloom = BloomFilter(capacity, error_rate, row[1], row[0])
+        # Ключи этого запуска, которых ещё нет в базе.
+        self.pending: Set[bytes] = set()
+        self.unacked: 'deque[bytes]' = deque()
+        # Ключ пакета с номером -> ключ тех же кода и параметров.
+        self.contents: Dict[bytes, bytes] = {}
+        self.acked: List[bytes] = []
+        self.unique = 0
+        self.duplicates = 0
+        self.false_positives = 0
+
+    def seen(self, key: bytes) -> bool:
+        """Проверить ключ и запомнить его; True — пакет уже был."""
+        return self.seen_many([key])[0]
+
+    def seen_many(self, keys: List[bytes]) -> List[bool]:
+        """Аналог seen для порции ключей с одним запросом к базе."""
+        maybe = [key for key in keys if key in self.bloom]
+        stored: Set[bytes] = set()
+        for start in range(0, len(maybe), QUERY_KEYS):
+            part = maybe[start:start + QUERY_KEYS]
+            stored.update(row[0] for row in self.db.execute(
+                'SELECT key FROM seen WHERE key IN '
+                f'({",".join("?" * len(part))})', part
+            ))
+        result: List[bool] = []
+        for key in keys:
+            if key in stored or key in self.pending:
+                self.duplicates += 1
+                result.append(True)
+                continue
+            if key in self.bloom:
+                self.false_positives += 1
+            self.pending.add(key)
+            self.unacked.append(key)
+            self.unique += 1
+            result.append(False)
+        return result
+
+    def ack(self, count: int) -> None:
+        """Подтвердить count самых старых новых ключей."""
+        for _ in range(min(count, len(self.unacked))):
+            key = self.unacked.popleft()
+            self.contents.pop(key, None)
+            self.bloom.add(key)
+            self.acked.append(key)
+        if len(self.acked) >= FLUSH_KEYS:
+            self.flush()
+
+    def forget(self, key: bytes, by_content: bool = False) -> None:
+        """Снять неподтверждённый ключ: пакет не был обработан.
+
+        При by_content=True key — ключ кода и параметров без номера, и
+        снимается самый старый неподтверждённый пакет с ними.
+        """
+        if by_content:
+            key = next((unacked for unacked in self.unacked
+                        if self.contents.get(unacked, unacked) == key), key)
+        try:
+            self.unacked.remove(key)
+        except ValueError:
+            return
+        self.contents.pop(key, None)
+        self.pending.discard(key)
+        self.unique -= 1
+
+    def filter(self, packages: Iterable[Union[Package, NumberedPackage]]
+               ) -> Iterator[Package]:
+        """Пропустить только пакеты, которых ещё не было.
+
+        Пакет — (код, параметры) или (код, параметры, номер); номер
+        входит в ключ, а пропущенные пакеты возвращаются без номера.
+        Пакеты проверяются порциями по QUERY_KEYS. Пропущенные пакеты
+        подтверждайте через ack после записи их сообщений.
+        """
+        packages = iter(packages)
+        while True:
+            chunk = list(islice(packages, QUERY_KEYS))
+            if not chunk:
+                return
+            keys = [package_key(*package) for package in chunk]
+            for package, key, duplicate in zip(chunk, keys,
+                                               self.seen_many(keys)):
+                if duplicate:
+                    continue
+                if len(package) > 2 and package[2] is not None:
+                    self.contents[key] = package_key(package[0], package[1])
+                yield package[0], package[1]
+
+    def flush(self) -> None:
+        """Записать подтверждённые ключи и состояние фильтра в базу."""
+        with self.db:
+            self.db.executemany('INSERT OR IGNORE INTO seen VALUES (?)',
+                                ((key,) for key in self.acked))
+            self.db.execute(
+                'INSERT OR REPLACE INTO bloom VALUES (1, ?, ?)',
+                (self.bloom.hashes, bytes(self.bloom.bits))
+            )
+        self.pending.difference_update(self.acked)
+        self.acked.clear()
+
+    def close(self, failed: bool = False) -> None:
+        """Сохранить ключи и закрыть базу.
+
+        При failed=True неподтверждённые ключи не сохраняются.
+        """
+        if not failed:
+            self.ack(len(self.unacked))
+        self.flush()
+        self.db.close()
+
+    def __enter__(self) -> 'DedupStore':
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        self.close(failed=exc_type is not None)
@@ -0,0 +1,246 @@
+"""Кодировщики информационных сообщений для других систем.
+
+Кроме текста для людей сообщения можно выводить в JSON Lines, CSV и
+двоичном формате с записями фиксированной длины. Кодировщик получает
+порцию сообщений и возвращает её байты целиком, поэтому запись идёт
+крупными блоками. Выходной файл можно сжать gzip, bz2 или lzma.
+"""
+import bz2
+import gzip
+import json
+import lzma
+import struct
+import sys
+from math import isfinite
+from typing import (IO, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Type)
+
+from homework import InfoMessage, render_many
+
+FIELDS = ('training_type', 'duration', 'distance', 'speed', 'calories')
+MAGIC = b'FTIM'
+VERSION: int = 1
+HEADER = struct.Struct('<4sHH')
+# Длина имени тренировки в записи двоичного формата, байт UTF-8.
+NAME_BYTES: int = 16
+RECORD = struct.Struct(f'<{NAME_BYTES}sdddd')
+WRITE_BUFFER: int = 1 << 20
+
+COMPRESSORS: Dict[str, Callable[..., IO[bytes]]] = {
+    'gzip': gzip.open,
+    'bz2': bz2.open,
+    'lzma': lzma.open,
+}
+SUFFIXES = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'lzma'}
+
+# Имя формата -> класс кодировщика.
+ENCODERS: Dict[str, Type['Encoder']] = {}
+
+
+def register_encoder(name: str) -> Callable[[type], type]:
+    """Декоратор: зарегистрировать кодировщик под именем name."""
+    def decorator(encoder_class: type) -> type:
+        ENCODERS[name] = encoder_class
+        return encoder_class
+    return decorator
+
+
+class Encoder:
+    """Базовый кодировщик: заголовок и порции сообщений в байтах.
+
+    Объект кодировщика обслуживает один выходной поток: заголовок
+    пишется перед первой порцией, а если порций не было — в finish.
+    """
+
+    def __init__(self) -> None:
+        self.started = False
+
+    def header(self) -> bytes:
+        return b''
+
+    def encode(self, messages: Sequence[InfoMessage]) -> bytes:
+        raise NotImplementedError
+
+    def write(self, messages: Sequence[InfoMessage], out: IO[bytes]) -> None:
+        """Записать порцию сообщений одним вызовом out.write."""
+        data = self.encode(messages)
+        if not self.started:
+            data = self.header() + data
+            self.started = True
+        out.write(data)
+
+    def finish(self, out: IO[bytes]) -> None:
+        """Закончить поток: записать заголовок, если его ещё нет."""
+        if not self.started:
+            self.write([], out)
+
+
+@register_encoder('text')
+class TextEncoder(Encoder):
+    """Текст для людей, как у InfoMessage.get_message()."""
+
+    def encode(self, messages: Sequence[InfoMessage]) -> bytes:
+        return render_many(messages).encode() if messages else b''
+
+
+@register_encoder('jsonl')
+class JsonLinesEncoder(Encoder):
+    """JSON Lines: объект с полями InfoMessage на строку.
+
+    В JSON нет бесконечности и NaN, поэтому сообщение с такими числами
+    отклоняется с ValueError.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.names: Dict[str, str] = {}
+
+    def encode(self, messages: Sequence[InfoMessage]) -> bytes:
+        lines: List[str] = []
+        for message in messages:
+            name = self.names.get(message.training_type)
+            if name is None:
+                name = json.dumps(message.training_type, ensure_ascii=False)
+                self.names[message.training_type] = name
+            values = (float(message.duration), float(message.distance),
+                      float(message.speed), float(message.calories))
+            if not all(map(isfinite, values)):
+                raise ValueError(f'Нечисловое значение в сообщении для '
+                                 f'JSON: {message}')
+            lines.append(
+                '{"training_type": %s, "duration": %r, "distance": %r, '
+                '"speed": %r, "calories": %r}\n' % (name, *values)
+            )
+        return ''.join(lines).encode()
+
+
+@register_encoder('csv')
+class CsvEncoder(Encoder):
+    """CSV со строкой заголовка и полной точностью чисел.
+
+    Числа всегда выводятся как float, чтобы длительность 1 из пакета и
+    1.0 из пакетного расчёта давали одинаковый вывод.
+    """
+
+    def header(self) -> bytes:
+        return (','.join(FIELDS) + '\n').encode()
+
+    def encode(self, messages: Sequence[InfoMessage]) -> bytes:
+        return ''.join([
+            '%s,%r,%r,%r,%r\n' % (message.training_type,
+                                  float(message.duration),
+                                  float(message.distance),
+                                  float(message.speed),
+                                  float(message.calories))
+            for message in messages
+        ]).encode()
+
+
+@register_encoder('binary')
+class BinaryEncoder(Encoder):
+    """Записи по 48 байт: имя тренировки в UTF-8 и четыре double.
+
+    Имя длиннее NAME_BYTES байт не обрезается, а отклоняется с
+    ValueError.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.names: Dict[str, bytes] = {}
+
+    def header(self) -> bytes:
+        return HEADER.pack(MAGIC, VERSION, RECORD.size)
+
+    def _name(self, training_type: str) -> bytes:
+        name = training_type.encode()
+        if len(name) > NAME_BYTES:
+            raise ValueError(f'Имя тренировки {training_type!r} длиннее '
+                             f'{NAME_BYTES} байт UTF-8')
+        self.names[training_type] = name
+        return name
+
+    def encode(self, messages: Sequence[InfoMessage]) -> bytes:
+        pack = RECORD.pack
+        names = self.names
+        return b''.join([
+            pack(names.get(message.training_type)
+                 or self._name(message.training_type), message.duration,
+                 message.distance, message.speed, message.calories)
+            for message in messages
+        ])
+
+
+def decode_binary(data: bytes) -> List[InfoMessage]:
+    """Прочитать сообщения, записанные BinaryEncoder."""
+    if (len(data) < HEADER.size
+            or (len(data) - HEADER.size) % RECORD.size):
+        raise ValueError(f'Данные не в формате сообщений версии {VERSION}')
+    magic, version, size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or size != RECORD.size:
+        raise ValueError(f'Данные не в формате сообщений версии {VERSION}')
+    return [
+        InfoMessage(name.rstrip(b'\0').decode(), *values)
+        for name, *values in RECORD.iter_unpack(data[HEADER.size:])
+    ]
+
+
+def get_encoder(name: str) -> Encoder:
+    """Новый кодировщик формата name."""
+    if name not in ENCODERS:
+        raise ValueError(f'Неизвестный формат вывода: {name}')
+    return ENCODERS[name]()
+
+
+def compression_for(path: str) -> Optional[str]:
+    """Сжатие по расширению файла: .gz, .bz2 или .xz."""
+    for suffix, compression in SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+
+def open_output(path: str, compression: Optional[str] = None) -> IO[bytes]:
+    """Открыть файл для записи байтов, при необходимости со сжатием.
+
+    Без compression сжатие выбирается по расширению. Путь '-' означает
+    stdout; закрытие такого потока не закрывает stdout.
+    """
+    compression = compression or compression_for(path)
+    if compression is not None and compression not in COMPRESSORS:
+        raise ValueError(f'Неизвестное сжатие: {compression}')
+    if path != '-':
+        if compression is None:
+            return open(path, 'wb', buffering=WRITE_BUFFER)
+        return COMPRESSORS[compression](path, 'wb')
+    sys.stdout.flush()
+    if compression is None:
+        return open(sys.stdout.fileno(), 'wb', buffering=WRITE_BUFFER,
+                    closefd=False)
+    return COMPRESSORS[compression](sys.stdout.buffer, 'wb')
+
+
+def messages_from_columns(result: Dict[str, Sequence]
+                          ) -> Iterator[InfoMessage]:
+    """Сообщения из результата batch.compute_packages."""
+    columns = [result[name] for name in FIELDS]
+    columns[1:] = [column.tolist() if hasattr(column, 'tolist') else column
+                   for column in columns[1:]]
+    for row in zip(*columns):
+        yield InfoMessage(str(row[0]), *row[1:])
+
+
+def encode_all(messages: Iterable[InfoMessage], encoder: Encoder,
+               out: IO[bytes], batch_size: int = 4096) -> int:
+    """Записать сообщения порциями по batch_size, вернуть их число."""
+    written = 0
+    chunk: List[InfoMessage] = []
+    for message in messages:
+        chunk.append(message)
+        if len(chunk) == batch_size:
+            encoder.write(chunk, out)
+            written += len(chunk)
+            chunk = []
+    if chunk:
+        encoder.write(chunk, out)
+    encoder.finish(out)
+    return written + len(chunk)
@@ -0,0 +1,105 @@
+"""Неизменяемые варианты классов тренировок для общего доступа из потоков.
+
+Показатели считаются один раз в конструкторе по формулам классов
+homework, после чего объект не меняется: присвоение атрибута вызывает
+FrozenInstanceError. Объект публикуется другим потокам уже полностью
+построенным, поэтому чтение показателей — обычное чтение атрибута без
+блокировок и без повторного расчёта. Объекты хешируемы и сравниваются
+по параметрам тренировки, их можно использовать как ключи словарей.
+"""
+from dataclasses import astuple, dataclass
+from typing import Dict, List, Type
+
+import homework
+from compact import formulas_from
+from homework import InfoMessage
+
+
+@formulas_from(homework.Training, methods=False)
+@dataclass(frozen=True)
+class Training:
+    """Базовый класс тренировки.
+
+    Показатели distance, speed и calories лежат в слотах, но не
+    являются полями dataclass: они не участвуют в сравнении и хеше.
+    Формулы homework берутся только из FORMULAS в __post_init__, а
+    методы get_* лишь читают слоты.
+    """
+    __slots__ = ('action_count', 'duration_hr', 'weight_kg',
+                 'distance', 'speed', 'calories')
+    action_count: float
+    duration_hr: float
+    weight_kg: float
+
+    def __post_init__(self) -> None:
+        # Порядок важен: скорость может считаться через дистанцию,
+        # а калории — через скорость.
+        formulas = self.FORMULAS
+        object.__setattr__(self, 'distance', formulas.get_distance(self))
+        object.__setattr__(self, 'speed', formulas.get_mean_speed(self))
+        object.__setattr__(self, 'calories',
+                           formulas.get_spent_calories(self))
+
+    def __reduce__(self) -> tuple:
+        # Слоты замороженного объекта нельзя восстановить присвоением,
+        # поэтому объект пересобирается конструктором.
+        return type(self), astuple(self)
+
+    def get_distance(self) -> float:
+        return self.distance
+
+    def get_mean_speed(self) -> float:
+        return self.speed
+
+    def get_spent_calories(self) -> float:
+        return self.calories
+
+    def show_training_info(self) -> InfoMessage:
+        """Вернуть информационное сообщение о выполненной тренировке."""
+        return InfoMessage(type(self).__name__, self.duration_hr,
+                           self.distance, self.speed, self.calories)
+
+
+@formulas_from(homework.Running, methods=False)
+@dataclass(frozen=True)
+class Running(Training):
+    """Тренировка: бег."""
+    __slots__ = ()
+
+
+@formulas_from(homework.SportsWalking, methods=False)
+@dataclass(frozen=True)
+class SportsWalking(Training):
+    """Тренировка: спортивная ходьба."""
+    __slots__ = ('height_m',)
+    height_m: float
+
+
+@formulas_from(homework.Swimming, methods=False)
+@dataclass(frozen=True)
+class Swimming(Training):
+    """Тренировка: плавание."""
+    __slots__ = ('length_pool_m', 'count_pool')
+    length_pool_m: float
+    count_pool: float
+
+
+TRAININGS: Dict[str, Type[Training]] = {
+    'SWM': Swimming,
+    'RUN': Running,
+    'WLK': SportsWalking,
+}
+# Классы homework, формулы которых повторяют неизменяемые варианты.
+IMPLEMENTED: Dict[str, type] = {
+    code: training.FORMULAS for code, training in TRAININGS.items()
+}
+
+
+def read_package(workout_type: str, data: List[float]) -> Training:
+    """Прочитать пакет в неизменяемую тренировку.
+
+    Неизменяемые варианты есть только у встроенных тренировок; для кода
+    из плагина или переопределённого класса выбрасывается ValueError.
+    """
+    homework.check_implemented(workout_type, len(data), IMPLEMENTED)
+    return TRAININGS[workout_type](*data)
@@ -1,10 +1,46 @@
-from typing import Dict, List
-from dataclasses import dataclass, asdict
+import re
+from contextlib import ExitStack
+from functools import lru_cache
+from operator import attrgetter
+from string import Formatter
+from typing import (IO, Callable, Dict, Iterable, List, Optional, Tuple,
+                    Type)
+from dataclasses import dataclass
+
+PERCENT_SPEC = re.compile(r'(\.\d+[fFeE])?')
+
+
+@lru_cache(maxsize=None)
+def compile_message(template: str) -> Tuple[str, Callable]:
+    """Перевести шаблон str.format в шаблон оператора %.
+
+    Возвращает шаблон и функцию, которая достаёт значения полей из
+    сообщения в нужном порядке. Результат форматирования совпадает с
+    template.format(...) посимвольно.
+    """
+    parts: List[str] = []
+    fields: List[str] = []
+    for literal, field, spec, conversion in Formatter().parse(template):
+        parts.append(literal.replace('%', '%%'))
+        if field is None:
+            continue
+        if (conversion or not field.isidentifier()
+                or not PERCENT_SPEC.fullmatch(spec)):
+            raise ValueError(f'Неподдерживаемое поле шаблона: {field}')
+        parts.append('%' + (spec or 's'))
+        fields.append(field)
+    if len(fields) > 1:
+        return ''.join(parts), attrgetter(*fields)
+    return ''.join(parts), lambda message: tuple(
+        getattr(message, name) for name in fields
+    )
 
 
 @dataclass
 class InfoMessage:
     """Информационное сообщение о тренировке."""
+    __slots__ = ('training_type', 'duration', 'distance', 'speed',
+                 'calories')
     training_type: str
     duration: float
     distance: float
@@ -17,7 +53,80 @@ class InfoMessage:
                     + 'Потрачено ккал: {calories:.3f}.')
 
     def get_message(self) -> str:
-        return self.INFO_MESSAGE.format(**asdict(self))
+        template, values = compile_message(self.INFO_MESSAGE)
+        return template % values(self)
+
+
+def render_many(messages: Iterable[InfoMessage],
+                out: Optional[IO[str]] = None) -> str:
+    """Отформатировать сообщения одной строкой, по сообщению на строку.
+
+    Если передан поток out, текст записывается в него одним вызовом.
+    """
+    lines: List[str] = []
+    for message in messages:
+        template, values = compile_message(message.INFO_MESSAGE)
+        lines.append(template % values(message))
+    lines.append('')
+    text = '\n'.join(lines)
+    if out is not None:
+        out.write(text)
+    return text
+
+
+# Код тренировки -> класс и число параметров его конструктора.
+TRAINING_TYPES: Dict[str, Tuple[Type['Training'], int]] = {}
+ENTRY_POINT_GROUP = 'fitness_tracker.trainings'
+# Загружать точки входа при первом незарегистрированном коде; командная
+# строка выключает это флагом --no-plugins.
+LOAD_PLUGINS: bool = True
+_plugins_loaded = False
+
+
+def register_training(workout_type: str) -> Callable[[type], type]:
+    """Декоратор: зарегистрировать класс тренировки под кодом пакета."""
+    def decorator(training_class: type) -> type:
+        arity = training_class.__init__.__code__.co_argcount - 1
+        TRAINING_TYPES[workout_type] = (training_class, arity)
+        return training_class
+    return decorator
+
+
+def load_entry_points(group: str = ENTRY_POINT_GROUP) -> List[str]:
+    """Зарегистрировать классы тренировок из точек входа пакетов.
+
+    Имя точки входа — код тренировки, значение — класс. Возвращает
+    зарегистрированные коды.
+    """
+    from importlib.metadata import entry_points
+
+    found = entry_points()
+    if hasattr(found, 'select'):
+        found = found.select(group=group)
+    else:
+        found = found.get(group, ())
+    codes: List[str] = []
+    for entry_point in found:
+        register_training(entry_point.name)(entry_point.load())
+        codes.append(entry_point.name)
+    return codes
+
+
+def is_registered(workout_type: str) -> bool:
+    """Есть ли класс для кода, с загрузкой точек входа при промахе.
+
+    Точки входа загружаются не больше одного раза за процесс и только
+    при LOAD_PLUGINS, поэтому встроенные тренировки не платят за поиск
+    установленных пакетов.
+    """
+    global _plugins_loaded
+    if workout_type in TRAINING_TYPES:
+        return True
+    if _plugins_loaded or not LOAD_PLUGINS:
+        return False
+    _plugins_loaded = True
+    load_entry_points()
+    return workout_type in TRAINING_TYPES
 
 
 class Training:
@@ -59,6 +168,7 @@ class Training:
                            self.get_spent_calories())
 
 
+@register_training('RUN')
 class Running(Training):
     """Тренировка: бег."""
     CALORIES_MEAN_SPEED_MULTIPLIER: int = 18
@@ -75,6 +185,7 @@ class Running(Training):
         return calories_kcal
 
 
+@register_training('WLK')
 class SportsWalking(Training):
     """Тренировка: спортивная ходьба."""
     WEIGHT_MULTIPLIER: float = 0.035
@@ -104,6 +215,7 @@ class SportsWalking(Training):
         return distance_km
 
 
+@register_training('SWM')
 class Swimming(Training):
     """Тренировка: плавание."""
     LEN_STEP: float = 1.38
@@ -142,16 +254,110 @@ class Swimming(Training):
         return distance_km
 
 
-def read_package(workout_type: str, data: List[int]) -> Training:
-    """Прочитать данные полученные от датчиков."""
-    trainings: Dict[str, Training] = {'SWM': Swimming,
-                                      'RUN': Running,
-                                      'WLK': SportsWalking}
+class CachedMetrics:
+    """Примесь, которая запоминает рассчитанные показатели тренировки.
+
+    Запомненные значения сбрасываются при изменении любого атрибута
+    экземпляра: action_count, duration_hr, weight_kg и остальных.
+    """
+
+    def __setattr__(self, name: str, value) -> None:
+        super().__setattr__(name, value)
+        self.__dict__.pop('_metrics', None)
+
+    def _cached(self, name: str, compute: Callable[[], float]) -> float:
+        metrics: Dict[str, float] = self.__dict__.setdefault('_metrics', {})
+        if name not in metrics:
+            metrics[name] = compute()
+        return metrics[name]
+
+    def get_distance(self) -> float:
+        return self._cached('distance', super().get_distance)
+
+    def get_mean_speed(self) -> float:
+        return self._cached('speed', super().get_mean_speed)
 
-    if workout_type not in trainings:
+    def get_spent_calories(self) -> float:
+        return self._cached('calories', super().get_spent_calories)
+
+
+@lru_cache(maxsize=None)
+def with_cached_metrics(training_class: type) -> type:
+    """Вариант класса тренировки с запоминанием показателей.
+
+    Имя класса не меняется, поэтому сообщения остаются прежними.
+    """
+    return type(training_class.__name__,
+                (CachedMetrics, training_class),
+                {'__doc__': training_class.__doc__})
+
+
+def training_class_for(workout_type: str, size: int) -> Type[Training]:
+    """Класс тренировки для пакета с size параметрами."""
+    if not is_registered(workout_type):
         raise ValueError('Не удалось определить тип тренировки')
-    else:
-        return trainings[workout_type](*data)
+    training_class, arity = TRAINING_TYPES[workout_type]
+    if size != arity:
+        raise ValueError(f'Неверное число параметров для {workout_type}: '
+                         f'{size} вместо {arity}')
+    return training_class
+
+
+def check_implemented(workout_type: str, size: int,
+                      implemented: Dict[str, type]) -> Type[Training]:
+    """Проверить, что режим умеет считать пакет, и вернуть класс.
+
+    implemented — классы тренировок, формулы которых повторяет режим.
+    Для кода из плагина или переопределённого класса ValueError.
+    """
+    training_class = training_class_for(workout_type, size)
+    if implemented.get(workout_type) is not training_class:
+        raise ValueError(f'Режим не поддерживает тренировку {workout_type} '
+                         f'({training_class.__name__})')
+    return training_class
+
+
+def read_package(workout_type: str,
+                 data: List[int],
+                 cache_metrics: bool = False) -> Training:
+    """Прочитать данные полученные от датчиков."""
+    training_class = training_class_for(workout_type, len(data))
+    if cache_metrics:
+        return with_cached_metrics(training_class)(*data)
+    return training_class(*data)
+
+
+def read_packages(packages: Iterable[Tuple[str, List[int]]]
+                  ) -> Dict[str, List[Training]]:
+    """Прочитать много пакетов, сгруппировав тренировки по коду.
+
+    Внутри группы тренировки идут в порядке пакетов.
+    """
+    groups: Dict[str, List[List[int]]] = {}
+    for workout_type, data in packages:
+        groups.setdefault(workout_type, []).append(data)
+    trainings: Dict[str, List[Training]] = {}
+    for workout_type, rows in groups.items():
+        # Класс ищется один раз для каждого числа параметров в группе.
+        for size in {len(data) for data in rows}:
+            training_class = training_class_for(workout_type, size)
+        trainings[workout_type] = [training_class(*data) for data in rows]
+    return trainings
+
+
+INFO_CACHE_SIZE: int = 65536
+
+
+@lru_cache(maxsize=INFO_CACHE_SIZE)
+def cached_training_info(workout_type: str,
+                         data: Tuple[float, ...]) -> InfoMessage:
+    """Информационное сообщение для пакета с общим LRU-кэшем.
+
+    Одинаковые пакеты считаются один раз; статистику попаданий и
+    промахов возвращает cached_training_info.cache_info(). Возвращаемое
+    сообщение общее для всех вызовов, изменять его нельзя.
+    """
+    return read_package(workout_type, list(data)).show_training_info()
 
 
 def main(training: Training):
@@ -160,13 +366,298 @@ def main(training: Training):
     print(info.get_message())
 
 
+def _open_quarantine(path: Optional[str], stack: ExitStack):
+    """Карантин в файле path или None, если path не задан."""
+    if not path:
+        return None
+    from validation import Quarantine
+
+    return Quarantine(stack.enter_context(open(path, 'w', encoding='utf-8')))
+
+
+def _command_run(args) -> None:
+    """Потоковая обработка файлов или stdin."""
+    from pipeline import run
+
+    stats = None
+    if args.stats:
+        from instrumentation import PipelineStats
+
+        stats = PipelineStats()
+    with ExitStack() as stack:
+        dedup = None
+        if args.dedup:
+            from dedup import DedupStore
+
+            dedup = stack.enter_context(DedupStore(args.dedup))
+        cache = None
+        if args.cache:
+            from resultcache import ResultCache
+
+            cache = stack.enter_context(
+                ResultCache(args.cache, args.cache_size)
+            )
+        encoder = out = None
+        if args.output_format or args.output:
+            from encoders import get_encoder, open_output
+
+            encoder = get_encoder(args.output_format or 'text')
+            out = stack.enter_context(
+                open_output(args.output or '-', args.compression)
+            )
+        run(args.files or ['-'], out, fmt=args.format, stats=stats,
+            quarantine=_open_quarantine(args.quarantine, stack),
+            dedup=dedup, encoder=encoder, cache=cache)
+    if cache is not None:
+        import sys
+
+        sys.stderr.write(cache.render())
+    if stats is not None:
+        stats.export(args.stats, args.stats_format)
+
+
+def _command_parallel(args) -> None:
+    """Обработка файла в пуле процессов."""
+    from parallel import run_parallel
+
+    with ExitStack() as stack:
+        run_parallel(args.file, workers=args.workers,
+                     chunk_size=args.chunk_size, ordered=not args.unordered,
+                     fmt=args.format,
+                     quarantine=_open_quarantine(args.quarantine, stack))
+
+
+def _command_batch(args) -> None:
+    """Пакетный расчёт на NumPy для CSV, JSON Lines или .bin файла."""
+    import sys
+    from itertools import islice
+
+    import numpy as np
+
+    from batch import compute_packages, render_columns
+
+    dtype = np.float32 if args.float32 else np.float64
+    with ExitStack() as stack:
+        quarantine = _open_quarantine(args.quarantine, stack)
+        if args.file.endswith('.bin'):
+            from binary import iter_batches
+
+            for result in iter_batches(args.file, args.batch_size,
+                                       quarantine, dtype):
+                render_columns(result, sys.stdout)
+            return
+        from pipeline import iter_packages
+
+        if quarantine is None:
+            packages = iter_packages(args.file, args.format)
+        else:
+            packages = quarantine.filter(iter_packages(
+                args.file, args.format, quarantine.reject_line
+            ))
+        while True:
+            chunk = list(islice(packages, args.batch_size))
+            if not chunk:
+                return
+            render_columns(compute_packages(chunk, dtype), sys.stdout)
+
+
+def _command_convert(args) -> None:
+    """Перевод файла с пакетами в двоичный формат."""
+    from binary import convert
+
+    convert(args.source, args.target)
+
+
+def _command_serve(args) -> None:
+    """Сервер пакетов на TCP-порту или Unix-сокете."""
+    import asyncio
+
+    from server import serve_forever
+
+    asyncio.run(serve_forever(args.host, args.port, args.unix,
+                              'json' if args.json else 'text'))
+
+
+def _command_sensor(args) -> None:
+    """Расчёт по потоку отсчётов датчиков."""
+    import sys
+    from contextlib import nullcontext
+
+    from sensor import SensorStream, read_events, render_results
+
+    stream = SensorStream(args.timeout, args.interim)
+    source = (nullcontext(sys.stdin) if args.file == '-'
+              else open(args.file, encoding='utf-8'))
+    with source as lines:
+        render_results(stream.feed(read_events(lines)), sys.stdout)
+
+
+def _address(text: str) -> Tuple[str, int]:
+    """Адрес вида host:port."""
+    host, _, port = text.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def _authkey(args, required: bool) -> Optional[bytes]:
+    """Ключ из --authkey или переменной окружения AUTHKEY_ENV."""
+    import os
+    import sys
+
+    from cluster import AUTHKEY_ENV
+
+    authkey = args.authkey or os.environ.get(AUTHKEY_ENV)
+    if not authkey and required:
+        sys.exit(f'Нужен общий ключ: --authkey или переменная окружения '
+                 f'{AUTHKEY_ENV}')
+    return authkey.encode() if authkey else None
+
+
+def _command_cluster(args) -> None:
+    """Координатор распределённой обработки с локальными обработчиками."""
+    import sys
+
+    from cluster import run_cluster
+
+    with ExitStack() as stack:
+        report = run_cluster(
+            args.files, args.workers, args.shard_size, args.format,
+            _address(args.listen), args.max_retries,
+            authkey=_authkey(args, required=not args.workers),
+            quarantine=_open_quarantine(args.quarantine, stack),
+        )
+    sys.stdout.write(report.render())
+    if report.failed:
+        sys.exit(1)
+
+
+def _command_worker(args) -> None:
+    """Обработчик шардов, который подключается к координатору."""
+    from cluster import worker
+
+    worker(_address(args.connect), _authkey(args, required=True), args.name)
+
+
+def cli(argv: Optional[List[str]] = None) -> None:
+    """Командная строка модуля.
+
+    Модули для отдельных режимов импортируются только при запуске этих
+    режимов, поэтому короткие запуски не платят за NumPy и asyncio.
+    Тренировки из точек входа регистрируются только при первом
+    незарегистрированном коде, если не указан --no-plugins.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='homework.py',
+        description='Расчёт информационных сообщений о тренировках.',
+    )
+    parser.set_defaults(handler=_command_run, files=[], format=None,
+                        stats=None, quarantine=None, dedup=None,
+                        output_format=None, output=None, compression=None,
+                        cache=None, cache_size=None)
+    parser.add_argument('--no-plugins', action='store_true',
+                        help='не искать тренировки в точках входа')
+    commands = parser.add_subparsers(title='режимы')
+    formats = ('csv', 'ndjson', 'jsonl', 'json')
+
+    run = commands.add_parser('run', help='потоковая обработка')
+    run.add_argument('files', nargs='*', help='файлы, - для stdin')
+    run.add_argument('--format', choices=formats)
+    run.add_argument('--stats', help='файл для статистики стадий')
+    run.add_argument('--stats-format', default='json',
+                     choices=('json', 'prometheus'))
+    run.add_argument('--quarantine',
+                     help='файл для ошибочных пакетов вместо остановки')
+    run.add_argument('--dedup',
+                     help='база уже обработанных пакетов для пропуска '
+                          'повторов')
+    run.add_argument('--output-format',
+                     choices=('text', 'jsonl', 'csv', 'binary'))
+    run.add_argument('--output', help='файл вывода, - для stdout')
+    run.add_argument('--compression', choices=('gzip', 'bz2', 'lzma'),
+                     help='по умолчанию — по расширению файла вывода')
+    run.add_argument('--cache',
+                     help='база рассчитанных сообщений между запусками')
+    run.add_argument('--cache-size', type=int, default=1_000_000,
+                     help='наибольшее число записей в кэше')
+    run.set_defaults(handler=_command_run)
+
+    parallel = commands.add_parser('parallel', help='пул процессов')
+    parallel.add_argument('file')
+    parallel.add_argument('--workers', type=int)
+    parallel.add_argument('--chunk-size', type=int, default=4 << 20)
+    parallel.add_argument('--unordered', action='store_true')
+    parallel.add_argument('--format', choices=formats)
+    parallel.add_argument('--quarantine',
+                          help='файл для ошибочных пакетов вместо остановки')
+    parallel.set_defaults(handler=_command_parallel)
+
+    batch = commands.add_parser('batch', help='пакетный расчёт на NumPy')
+    batch.add_argument('file')
+    batch.add_argument('--batch-size', type=int, default=1 << 16)
+    batch.add_argument('--format', choices=formats)
+    batch.add_argument('--quarantine',
+                       help='файл для ошибочных пакетов вместо остановки')
+    batch.add_argument('--float32', action='store_true',
+                       help='расчёт в float32, граница ошибки — '
+                            'batch.error_bound')
+    batch.set_defaults(handler=_command_batch)
+
+    convert = commands.add_parser('convert', help='в двоичный формат')
+    convert.add_argument('source')
+    convert.add_argument('target')
+    convert.set_defaults(handler=_command_convert)
+
+    serve = commands.add_parser('serve', help='сервер пакетов')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--unix', help='путь к Unix-сокету')
+    serve.add_argument('--json', action='store_true',
+                       help='отвечать JSON вместо текста')
+    serve.set_defaults(handler=_command_serve)
+
+    sensor = commands.add_parser('sensor', help='поток отсчётов датчиков')
+    sensor.add_argument('file', nargs='?', default='-',
+                        help='события в JSON Lines, - для stdin')
+    sensor.add_argument('--timeout', type=float, default=15 * 60,
+                        help='закрывать тренировку без отсчётов, секунд')
+    sensor.add_argument('--interim', type=int, default=0,
+                        help='промежуточные показатели каждые N отсчётов')
+    sensor.set_defaults(handler=_command_sensor)
+
+    cluster = commands.add_parser('cluster',
+                                  help='координатор распределённой обработки')
+    cluster.add_argument('files', nargs='+')
+    cluster.add_argument('--workers', type=int, default=2,
+                         help='локальные обработчики, 0 — только внешние')
+    cluster.add_argument('--listen', default='127.0.0.1:0',
+                         help='адрес для обработчиков, host:port')
+    cluster.add_argument('--shard-size', type=int, default=4 << 20)
+    cluster.add_argument('--max-retries', type=int, default=2)
+    cluster.add_argument('--format', choices=formats)
+    cluster.add_argument('--quarantine',
+                         help='файл для ошибочных пакетов вместо остановки')
+    cluster.add_argument('--authkey',
+                         help='общий ключ для внешних обработчиков; без '
+                              'него локальным — случайный')
+    cluster.set_defaults(handler=_command_cluster)
+
+    worker = commands.add_parser('worker', help='обработчик шардов')
+    worker.add_argument('connect', help='адрес координатора, host:port')
+    worker.add_argument('--name')
+    worker.add_argument('--authkey', help='общий ключ координатора')
+    worker.set_defaults(handler=_command_worker)
+
+    args = parser.parse_args(argv)
+    global LOAD_PLUGINS
+    LOAD_PLUGINS = not args.no_plugins
+    args.handler(args)
+
+
 if __name__ == '__main__':
-    packages = [
-        ('SWM', [720, 1, 80, 25, 40]),
-        ('RUN', [15000, 1, 75]),
-        ('WLK', [9000, 1, 75, 180]),
-    ]
+    import sys
 
-    for workout_type, data in packages:
-        training = read_package(workout_type, data)
-        main(training)
+    # Модули режимов импортируют homework; пусть они получат этот же
+    # модуль с тем же реестром, а не выполнят файл второй раз.
+    sys.modules.setdefault('homework', sys.modules[__name__])
+    cli()
@@ -0,0 +1,186 @@
+"""Замеры стадий обработки пакетов и профилирование порций.
+
+Обычный путь обработки ничего не замеряет. Замеры включаются, только
+если в pipeline.run() или pipeline.process() передан объект
+PipelineStats: тогда пакеты идут через его методы, которые засекают
+время стадий dispatch, construct, metrics и format.
+"""
+import cProfile
+import io
+import json
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from time import perf_counter_ns
+from typing import (IO, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Tuple)
+
+from homework import InfoMessage, compile_message, training_class_for
+
+# Верхние границы корзин гистограммы в наносекундах: 64 нс ... ~67 мс.
+BUCKETS: Tuple[int, ...] = tuple(1 << power for power in range(6, 27))
+
+
+class Histogram:
+    """Гистограмма задержек с корзинами по степеням двойки."""
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total_ns = 0
+
+    def add(self, elapsed_ns: int) -> None:
+        index = max(0, (elapsed_ns - 1).bit_length() - 6)
+        self.counts[min(index, len(BUCKETS))] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+
+    def to_dict(self) -> Dict:
+        return {'count': self.count, 'total_ns': self.total_ns,
+                'buckets': dict(zip([*map(str, BUCKETS), '+Inf'],
+                                    self.counts))}
+
+
+class PipelineStats:
+    """Счётчики и гистограммы задержек по стадиям и типам тренировок."""
+
+    def __init__(self) -> None:
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+
+    def record(self, stage: str, workout_type: str,
+               elapsed_ns: int) -> None:
+        """Учесть одно выполнение стадии."""
+        key = (stage, workout_type)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        self.histograms[key].add(elapsed_ns)
+
+    def process(self, packages: Iterable[Tuple[str, List[float]]],
+                errors: Optional[Callable[[str, List[float], Exception],
+                                          None]] = None
+                ) -> Iterator[InfoMessage]:
+        """Аналог pipeline.process с замером каждой стадии."""
+        for workout_type, data in packages:
+            start = perf_counter_ns()
+            training_class = training_class_for(workout_type, len(data))
+            dispatched = perf_counter_ns()
+            training = training_class(*data)
+            constructed = perf_counter_ns()
+            try:
+                info = training.show_training_info()
+            except ArithmeticError as error:
+                if errors is None:
+                    raise
+                errors(workout_type, data, error)
+                continue
+            computed = perf_counter_ns()
+            self.record('dispatch', workout_type, dispatched - start)
+            self.record('construct', workout_type,
+                        constructed - dispatched)
+            self.record('metrics', workout_type, computed - constructed)
+            yield info
+
+    def render_many(self, messages: Iterable[InfoMessage],
+                    out: Optional[IO[str]] = None) -> str:
+        """Аналог homework.render_many с замером форматирования."""
+        lines: List[str] = []
+        for message in messages:
+            start = perf_counter_ns()
+            template, values = compile_message(message.INFO_MESSAGE)
+            lines.append(template % values(message))
+            self.record('format', message.training_type,
+                        perf_counter_ns() - start)
+        lines.append('')
+        text = '\n'.join(lines)
+        if out is not None:
+            out.write(text)
+        return text
+
+    def to_dict(self) -> Dict[str, Dict[str, Dict]]:
+        """Статистика вида {стадия: {тип: гистограмма}}."""
+        result: Dict[str, Dict[str, Dict]] = {}
+        for (stage, workout_type), histogram in sorted(
+                self.histograms.items()):
+            result.setdefault(stage, {})[workout_type] = histogram.to_dict()
+        return result
+
+    def to_prometheus(self) -> str:
+        """Статистика в текстовом формате Prometheus."""
+        name = 'fitness_stage_duration_seconds'
+        lines = [f'# TYPE {name} histogram']
+        for (stage, workout_type), histogram in sorted(
+                self.histograms.items()):
+            labels = f'stage="{stage}",workout_type="{workout_type}"'
+            cumulative = 0
+            bounds = [*(str(bound / 1e9) for bound in BUCKETS), '+Inf']
+            for bound, count in zip(bounds, histogram.counts):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{name}_sum{{{labels}}} '
+                         f'{histogram.total_ns / 1e9}')
+            lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        lines.append('')
+        return '\n'.join(lines)
+
+    def export(self, path: str, fmt: str = 'json') -> None:
+        """Записать статистику в файл в формате json или prometheus."""
+        if fmt == 'json':
+            text = json.dumps(self.to_dict(), indent=2)
+        elif fmt == 'prometheus':
+            text = self.to_prometheus()
+        else:
+            raise ValueError(f'Неизвестный формат статистики: {fmt}')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(text)
+
+
+class BatchProfiler:
+    """Профилирование каждой every-й порции через cProfile и tracemalloc.
+
+    Результаты всех профилированных порций накапливаются.
+    """
+
+    def __init__(self, every: int = 1, memory: bool = False) -> None:
+        self.every = every
+        self.memory = memory
+        self.batches = 0
+        self.profile = cProfile.Profile()
+        self.snapshots: List[tracemalloc.Snapshot] = []
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Обернуть обработку одной порции."""
+        self.batches += 1
+        if (self.batches - 1) % self.every:
+            yield
+            return
+        if self.memory:
+            tracemalloc.start()
+        self.profile.enable()
+        try:
+            yield
+        finally:
+            self.profile.disable()
+            if self.memory:
+                self.snapshots.append(tracemalloc.take_snapshot())
+                tracemalloc.stop()
+
+    def report(self, limit: int = 20) -> str:
+        """Самые затратные функции и места выделения памяти."""
+        stream = io.StringIO()
+        try:
+            stats = pstats.Stats(self.profile, stream=stream)
+        except TypeError:
+            stream.write('Профиль пуст\n')
+        else:
+            stats.sort_stats('cumulative').print_stats(limit)
+        for snapshot in self.snapshots[-1:]:
+            for line in snapshot.statistics('lineno')[:limit]:
+                stream.write(f'{line}\n')
+        return stream.getvalue()
+
+    def dump(self, path: str) -> None:
+        """Сохранить профиль cProfile для pstats или snakeviz."""
+        self.profile.dump_stats(path)
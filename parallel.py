@@ -0,0 +1,128 @@
+"""Параллельная обработка больших файлов с пакетами в пуле процессов."""
+import os
+import sys
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                wait)
+from io import StringIO
+from typing import IO, TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from homework import render_many
+from pipeline import READERS, ErrorHandler, Package, detect_format, process
+
+if TYPE_CHECKING:
+    from validation import Quarantine
+
+CHUNK_SIZE: int = 4 << 20
+
+
+def byte_ranges(path: str, chunk_size: int = CHUNK_SIZE
+                ) -> Iterator[Tuple[int, int]]:
+    """Разбить файл на диапазоны байтов [start, end) по chunk_size.
+
+    Границы выравнивает сам обработчик диапазона: строка относится к
+    тому диапазону, в котором находится её первый байт.
+    """
+    size = os.path.getsize(path)
+    for start in range(0, size, chunk_size):
+        yield start, min(start + chunk_size, size)
+
+
+def _read_lines(path: str, start: int, end: int) -> List[str]:
+    """Прочитать строки, которые начинаются внутри [start, end)."""
+    lines: List[str] = []
+    with open(path, 'rb') as stream:
+        if start:
+            stream.seek(start - 1)
+            stream.readline()
+        while stream.tell() < end:
+            line = stream.readline()
+            if not line:
+                break
+            lines.append(line.decode('utf-8'))
+    return lines
+
+
+def read_range(path: str, start: int, end: int, fmt: str,
+               errors: Optional[ErrorHandler] = None) -> Iterator[Package]:
+    """Пакеты из строк, которые начинаются внутри [start, end)."""
+    return READERS[fmt](_read_lines(path, start, end), errors)
+
+
+def process_range(path: str, start: int, end: int, fmt: str) -> str:
+    """Обработать диапазон файла и вернуть текст сообщений."""
+    return render_many(process(read_range(path, start, end, fmt)))
+
+
+def process_range_quarantined(path: str, start: int, end: int, fmt: str
+                              ) -> Tuple[str, str, Dict[str, int]]:
+    """Аналог process_range с карантином.
+
+    Возвращает текст сообщений, записи карантина и счётчик причин для
+    Quarantine.merge в главном процессе.
+    """
+    from validation import Quarantine
+
+    quarantine = Quarantine(StringIO())
+    packages = quarantine.filter(
+        read_range(path, start, end, fmt, quarantine.reject_line)
+    )
+    text = render_many(process(packages, errors=quarantine.reject_error))
+    return text, quarantine.out.getvalue(), dict(quarantine.reasons)
+
+
+def _results(futures: 'deque[Future]', ordered: bool) -> Iterator:
+    """Выдать результаты готовых задач, освобождая место в очереди."""
+    if ordered:
+        yield futures.popleft().result()
+        return
+    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+    for future in done:
+        futures.remove(future)
+        yield future.result()
+
+
+def run_parallel(path: str,
+                 out: Optional[IO[str]] = None,
+                 workers: Optional[int] = None,
+                 chunk_size: int = CHUNK_SIZE,
+                 ordered: bool = True,
+                 fmt: Optional[str] = None,
+                 quarantine: Optional['Quarantine'] = None) -> None:
+    """Обработать файл в workers процессах.
+
+    При ordered=True сообщения выводятся в порядке пакетов во входном
+    файле, иначе — по мере готовности диапазонов. В работе одновременно
+    не больше 2 * workers диапазонов, поэтому память не растёт с
+    размером файла. С quarantine ошибочные пакеты и строки уходят в
+    карантин, как в pipeline.run.
+    """
+    if out is None:
+        out = sys.stdout
+    fmt = fmt or detect_format(path)
+    workers = workers or os.cpu_count() or 1
+    task = process_range if quarantine is None else process_range_quarantined
+
+    def write(result) -> None:
+        if quarantine is None:
+            out.write(result)
+            return
+        text, rejected, reasons = result
+        out.write(text)
+        quarantine.merge(rejected, reasons)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures: 'deque[Future]' = deque()
+        for start, end in byte_ranges(path, chunk_size):
+            futures.append(executor.submit(task, path, start, end, fmt))
+            if len(futures) >= 2 * workers:
+                for result in _results(futures, ordered):
+                    write(result)
+        while futures:
+            for result in _results(futures, ordered):
+                write(result)
+    out.flush()
+
+
+if __name__ == '__main__':
+    run_parallel(sys.argv[1])
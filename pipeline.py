@@ -0,0 +1,265 @@
+"""Потоковая обработка пакетов из файлов и стандартного ввода."""
+import csv
+import json
+import sys
+from contextlib import nullcontext
+from itertools import islice
+from typing import (IO, TYPE_CHECKING, Callable, Iterable, Iterator, List,
+                    Optional, Tuple, Union)
+
+from homework import (InfoMessage, cached_training_info, read_package,
+                      render_many)
+
+if TYPE_CHECKING:
+    from dedup import DedupStore
+    from encoders import Encoder
+    from instrumentation import BatchProfiler, PipelineStats
+    from resultcache import ResultCache
+    from validation import Quarantine
+
+Package = Tuple[str, List[Union[int, float]]]
+# Пакет с номером от шлюза: (код, параметры, номер или None).
+NumberedPackage = Tuple[str, List[Union[int, float]], Optional[str]]
+# Обработчик строки, которую не удалось разобрать: (строка, причина).
+ErrorHandler = Callable[[str, str], None]
+# Обработчик пакета, расчёт которого не удался: (код, параметры, ошибка).
+PackageErrorHandler = Callable[[str, List[Union[int, float]], Exception],
+                               None]
+
+READ_CHUNK_SIZE: int = 1 << 16
+WRITE_BUFFER_LINES: int = 1024
+
+
+def _number(value: Union[str, int, float]) -> Union[int, float]:
+    """Привести значение из файла к числу, сохраняя целые как int."""
+    if not isinstance(value, str):
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def read_csv(stream: Iterable[str],
+             errors: Optional[ErrorHandler] = None,
+             with_ids: bool = False) -> Iterator[Package]:
+    """Прочитать пакеты из CSV: код тренировки, затем её параметры.
+
+    Строку, которую не удалось разобрать, передать в errors, а без
+    него — выбросить ValueError. В CSV нет номеров пакетов: при
+    with_ids=True номер всегда None.
+    """
+    for row in csv.reader(stream):
+        if not row or row[0].startswith('#'):
+            continue
+        try:
+            package = row[0].strip(), [_number(value) for value in row[1:]]
+        except ValueError as error:
+            if errors is None:
+                raise
+            errors(','.join(row), str(error))
+            continue
+        yield (*package, None) if with_ids else package
+
+
+def read_ndjson(stream: Iterable[str],
+                errors: Optional[ErrorHandler] = None,
+                with_ids: bool = False) -> Iterator[Package]:
+    """Прочитать пакеты из JSON, по одному объекту на строку.
+
+    Строка — либо ["RUN", [15000, 1, 75]], либо
+    {"workout_type": "RUN", "data": [15000, 1, 75]} с необязательным
+    полем "package_id". При with_ids=True пакеты возвращаются с номером
+    третьим элементом. Ошибки разбора обрабатываются так же, как в
+    read_csv.
+    """
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            package_id = None
+            if isinstance(record, dict):
+                package_id = record.get('package_id')
+                record = record['workout_type'], record['data']
+            workout_type, data = record
+            package = workout_type, [_number(value) for value in data]
+            if with_ids:
+                package += (None if package_id is None
+                            else str(package_id),)
+        except (KeyError, TypeError, ValueError) as error:
+            if errors is None:
+                raise
+            errors(line.strip(), f'{type(error).__name__}: {error}')
+            continue
+        yield package
+
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+    'jsonl': read_ndjson,
+    'json': read_ndjson,
+}
+
+
+def detect_format(path: str) -> str:
+    """Определить формат входного файла по расширению."""
+    suffix = path.rsplit('.', 1)[-1].lower()
+    if suffix not in READERS:
+        raise ValueError(f'Неизвестный формат входного файла: {path}')
+    return suffix
+
+
+def iter_packages(path: str,
+                  fmt: Optional[str] = None,
+                  errors: Optional[ErrorHandler] = None,
+                  with_ids: bool = False) -> Iterator[Package]:
+    """Лениво читать пакеты из файла; путь '-' означает stdin.
+
+    При with_ids=True пакеты идут с номером, как в read_ndjson.
+    """
+    if path == '-':
+        yield from READERS[fmt or 'csv'](sys.stdin, errors, with_ids)
+        return
+    reader = READERS[fmt or detect_format(path)]
+    with open(path, encoding='utf-8', newline='',
+              buffering=READ_CHUNK_SIZE) as stream:
+        yield from reader(stream, errors, with_ids)
+
+
+def process(packages: Iterable[Package],
+            cached: bool = False,
+            stats: Optional['PipelineStats'] = None,
+            errors: Optional[PackageErrorHandler] = None
+            ) -> Iterator[InfoMessage]:
+    """Рассчитать информационные сообщения для потока пакетов.
+
+    При cached=True повторяющиеся пакеты берутся из общего кэша
+    cached_training_info. Если передан stats, время стадий
+    записывается в него. Пакет, расчёт которого выбросил
+    ArithmeticError, передаётся в errors и пропускается, а без errors
+    ошибка выбрасывается.
+    """
+    if stats is not None:
+        yield from stats.process(packages, errors)
+        return
+    for workout_type, data in packages:
+        try:
+            if cached:
+                info = cached_training_info(workout_type, tuple(data))
+            else:
+                info = read_package(workout_type, data).show_training_info()
+        except ArithmeticError as error:
+            if errors is None:
+                raise
+            errors(workout_type, data, error)
+            continue
+        yield info
+
+
+def _package_errors(quarantine: Optional['Quarantine'],
+                    dedup: Optional['DedupStore']
+                    ) -> Optional[PackageErrorHandler]:
+    """Обработчик ошибок расчёта: карантин и снятие ключа из dedup."""
+    if quarantine is None:
+        return None
+    if dedup is None:
+        return quarantine.reject_error
+    from dedup import package_key
+
+    def reject(workout_type: str, data: List[Union[int, float]],
+               error: Exception) -> None:
+        quarantine.reject_error(workout_type, data, error)
+        dedup.forget(package_key(workout_type, data), by_content=True)
+    return reject
+
+
+def write_messages(messages: Iterable[InfoMessage],
+                   out: IO[str],
+                   buffer_lines: int = WRITE_BUFFER_LINES,
+                   stats: Optional['PipelineStats'] = None,
+                   profiler: Optional['BatchProfiler'] = None,
+                   encoder: Optional['Encoder'] = None,
+                   on_written: Optional[Callable[[int], None]] = None
+                   ) -> int:
+    """Записать сообщения в поток порциями по buffer_lines строк.
+
+    stats замеряет форматирование, profiler профилирует порции. С
+    encoder порции кодируются им, а out — поток байтов. on_written
+    получает размер каждой записанной порции.
+    Возвращает количество записанных сообщений.
+    """
+    if encoder is not None:
+        render = encoder.write
+    elif stats is not None:
+        render = stats.render_many
+    else:
+        render = render_many
+    written = 0
+    messages = iter(messages)
+    while True:
+        with nullcontext() if profiler is None else profiler.batch():
+            chunk = list(islice(messages, buffer_lines))
+            if chunk:
+                render(chunk, out)
+        if not chunk:
+            return written
+        written += len(chunk)
+        if on_written is not None:
+            on_written(len(chunk))
+
+
+def run(paths: Iterable[str],
+        out: Optional[IO[str]] = None,
+        fmt: Optional[str] = None,
+        buffer_lines: int = WRITE_BUFFER_LINES,
+        stats: Optional['PipelineStats'] = None,
+        profiler: Optional['BatchProfiler'] = None,
+        quarantine: Optional['Quarantine'] = None,
+        dedup: Optional['DedupStore'] = None,
+        encoder: Optional['Encoder'] = None,
+        cache: Optional['ResultCache'] = None) -> int:
+    """Обработать файлы по очереди и вывести сообщения в out.
+
+    С quarantine пакеты сначала проверяются, а ошибочные пакеты и
+    строки, как и пакеты, расчёт которых не удался, уходят в карантин
+    вместо исключения. С dedup повторно
+    присланные пакеты пропускаются без расчёта и вывода, а новые
+    запоминаются только после записи их сообщений. Ключ dedup включает
+    номер пакета из JSON; без номера отсеиваются только пакеты с теми же
+    кодом и параметрами. С encoder сообщения
+    пишутся в out в его формате, а out — поток байтов; заголовок
+    формата пишется и при пустом выводе. С cache
+    сообщения для уже встречавшихся пакетов берутся из кэша, а stats не
+    замеряет стадию расчёта.
+    """
+    if out is None:
+        out = sys.stdout if encoder is None else sys.stdout.buffer
+    errors = _package_errors(quarantine, dedup)
+    written = 0
+    with_ids = dedup is not None
+    for path in paths:
+        if quarantine is None:
+            packages = iter_packages(path, fmt, with_ids=with_ids)
+        else:
+            packages = quarantine.filter(iter_packages(
+                path, fmt, quarantine.reject_line, with_ids
+            ))
+        if dedup is not None:
+            packages = dedup.filter(packages)
+        if cache is None:
+            messages = process(packages, stats=stats, errors=errors)
+        else:
+            messages = cache.process(packages, errors)
+        written += write_messages(messages, out, buffer_lines, stats,
+                                  profiler, encoder,
+                                  None if dedup is None else dedup.ack)
+    if encoder is not None:
+        encoder.finish(out)
+    out.flush()
+    return written
+
+
+if __name__ == '__main__':
+    run(sys.argv[1:] or ['-'])
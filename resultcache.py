@@ -0,0 +1,233 @@
+"""Кэш рассчитанных сообщений между запусками.
+
+Одни и те же стандартные тренировки приходят день за днём, поэтому
+сообщение для пакета можно посчитать один раз и хранить в SQLite. Ключ
+— хеш кода тренировки и параметров, как в dedup, значения — поля
+InfoMessage. Кэш ограничен по числу записей: при переполнении
+удаляются записи, которые дольше всех не читались. Вместе с записями
+хранится версия формул — хеш констант и кода методов расчёта классов
+тренировок, включая имена атрибутов, которые читает код. Если формулы
+изменились, кэш при открытии очищается.
+"""
+import sqlite3
+from hashlib import blake2b
+from itertools import islice
+from types import CodeType
+from typing import (Callable, Dict, Iterable, Iterator, List, Optional,
+                    Tuple, Type)
+
+from dedup import QUERY_KEYS, Package, package_key
+from homework import TRAINING_TYPES, InfoMessage, Training, read_package
+
+Row = Tuple[str, float, float, float, float]
+
+RESULT_CACHE_SIZE: int = 1_000_000
+FLUSH_KEYS: int = 10_000
+# Методы, от которых зависят поля сообщения.
+FORMULA_METHODS = ('__init__', 'get_distance', 'get_mean_speed',
+                   'get_spent_calories', 'show_training_info')
+
+
+def _hash_code(digest: 'blake2b', code: CodeType) -> None:
+    """Добавить в хеш байт-код, имена и константы, включая вложенный код."""
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for value in code.co_consts:
+        if isinstance(value, CodeType):
+            _hash_code(digest, value)
+        else:
+            digest.update(repr(value).encode())
+
+
+def formula_version(
+    training_types: Optional[Dict[str, Tuple[Type[Training], int]]] = None
+) -> str:
+    """Хеш констант и кода формул зарегистрированных тренировок.
+
+    Константы — атрибуты класса с именами в верхнем регистре, включая
+    унаследованные.
+    """
+    if training_types is None:
+        training_types = TRAINING_TYPES
+    digest = blake2b(digest_size=16)
+    for workout_type, (training_class, arity) in sorted(
+        training_types.items()
+    ):
+        digest.update(f'{workout_type}|{training_class.__module__}.'
+                      f'{training_class.__qualname__}|{arity}\n'.encode())
+        for name in sorted(dir(training_class)):
+            if name.isupper():
+                value = getattr(training_class, name)
+                digest.update(f'{name}={value!r}\n'.encode())
+        for name in FORMULA_METHODS:
+            code = getattr(getattr(training_class, name, None),
+                           '__code__', None)
+            if code is not None:
+                _hash_code(digest, code)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Сообщения по ключу пакета с вытеснением давно не читанных.
+
+    Без path кэш живёт в памяти процесса. Новые записи и отметки о
+    чтении пишутся в базу порциями по FLUSH_KEYS; после записи лишние
+    записи сверх capacity вытесняются. До FLUSH_KEYS прочитанных
+    записей держатся в памяти. Числа сообщений из кэша — float.
+    """
+
+    def __init__(self, path: Optional[str] = None,
+                 capacity: int = RESULT_CACHE_SIZE) -> None:
+        self.capacity = capacity
+        self.db = sqlite3.connect(path or ':memory:')
+        self.db.execute('CREATE TABLE IF NOT EXISTS results '
+                        '(key BLOB PRIMARY KEY, training_type TEXT, '
+                        'duration REAL, distance REAL, speed REAL, '
+                        'calories REAL, used INTEGER) WITHOUT ROWID')
+        self.db.execute('CREATE INDEX IF NOT EXISTS results_used '
+                        'ON results (used)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS meta '
+                        '(name TEXT PRIMARY KEY, value TEXT)')
+        self.version = formula_version()
+        row = self.db.execute(
+            "SELECT value FROM meta WHERE name = 'version'"
+        ).fetchone()
+        self.invalidated = row is not None and row[0] != self.version
+        with self.db:
+            if self.invalidated:
+                self.db.execute('DELETE FROM results')
+            self.db.execute("INSERT OR REPLACE INTO meta "
+                            "VALUES ('version', ?)", (self.version,))
+        self.size, clock = self.db.execute(
+            'SELECT COUNT(*), MAX(used) FROM results'
+        ).fetchone()
+        self.clock: int = clock or 0
+        self.fresh: Dict[bytes, Row] = {}
+        # Прочитанные из базы записи, чтобы повторы не шли в базу.
+        self.loaded: Dict[bytes, Row] = {}
+        self.touched: Dict[bytes, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля пакетов, сообщения для которых взяты из кэша."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _tick(self) -> int:
+        self.clock += 1
+        return self.clock
+
+    def get_many(self, keys: List[bytes]) -> List[Optional[InfoMessage]]:
+        """Сообщения по ключам, None для отсутствующих в кэше."""
+        fresh, loaded = self.fresh, self.loaded
+        wanted = [key for key in keys
+                  if key not in fresh and key not in loaded]
+        if len(loaded) + len(wanted) > FLUSH_KEYS:
+            loaded.clear()
+            wanted = [key for key in keys if key not in fresh]
+        for start in range(0, len(wanted), QUERY_KEYS):
+            part = wanted[start:start + QUERY_KEYS]
+            loaded.update((row[0], row[1:]) for row in self.db.execute(
+                'SELECT key, training_type, duration, distance, speed, '
+                'calories FROM results WHERE key IN '
+                f'({",".join("?" * len(part))})', part
+            ))
+        result: List[Optional[InfoMessage]] = []
+        for key in keys:
+            row = fresh.get(key) or loaded.get(key)
+            if row is None:
+                self.misses += 1
+                result.append(None)
+                continue
+            self.hits += 1
+            self.touched[key] = self._tick()
+            result.append(InfoMessage(*row))
+        if len(self.touched) >= FLUSH_KEYS:
+            self.flush()
+        return result
+
+    def put(self, key: bytes, info: InfoMessage) -> None:
+        """Запомнить сообщение для ключа."""
+        self.fresh[key] = (info.training_type, info.duration, info.distance,
+                           info.speed, info.calories)
+        self.touched[key] = self._tick()
+        if len(self.fresh) >= FLUSH_KEYS:
+            self.flush()
+
+    def process(self, packages: Iterable[Package],
+                errors: Optional[Callable[[str, List, Exception], None]]
+                = None) -> Iterator[InfoMessage]:
+        """Сообщения для пакетов: из кэша или расчётом с запоминанием.
+
+        Пакеты проверяются порциями по QUERY_KEYS. Ошибки расчёта
+        обрабатываются так же, как в pipeline.process.
+        """
+        packages = iter(packages)
+        while True:
+            chunk = list(islice(packages, QUERY_KEYS))
+            if not chunk:
+                return
+            keys = [package_key(workout_type, data)
+                    for workout_type, data in chunk]
+            for (workout_type, data), key, info in zip(
+                chunk, keys, self.get_many(keys)
+            ):
+                if info is None and key in self.fresh:
+                    # Повтор пакета из той же порции.
+                    self.misses -= 1
+                    info = self.get_many([key])[0]
+                if info is None:
+                    try:
+                        info = read_package(workout_type,
+                                            data).show_training_info()
+                    except ArithmeticError as error:
+                        if errors is None:
+                            raise
+                        errors(workout_type, data, error)
+                        continue
+                    self.put(key, info)
+                yield info
+
+    def flush(self) -> None:
+        """Записать новые записи и отметки о чтении, вытеснить лишнее."""
+        with self.db:
+            before = self.db.total_changes
+            self.db.executemany(
+                'INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((key, *row, self.touched[key])
+                 for key, row in self.fresh.items())
+            )
+            self.size += self.db.total_changes - before
+            self.db.executemany('UPDATE results SET used = ? WHERE key = ?',
+                                ((used, key)
+                                 for key, used in self.touched.items()))
+            excess = self.size - self.capacity
+            if excess > 0:
+                self.db.execute(
+                    'DELETE FROM results WHERE key IN (SELECT key FROM '
+                    'results ORDER BY used LIMIT ?)', (excess,)
+                )
+                self.size -= excess
+                self.evictions += excess
+        self.fresh.clear()
+        self.touched.clear()
+
+    def render(self) -> str:
+        """Строка с долей попаданий для отчёта."""
+        lookups = self.hits + self.misses
+        return (f'Кэш результатов: попаданий {self.hits} из {lookups} '
+                f'({self.hit_rate:.1%}), вытеснено {self.evictions}, '
+                f'записей {self.size}\n')
+
+    def close(self) -> None:
+        self.flush()
+        self.db.close()
+
+    def __enter__(self) -> 'ResultCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
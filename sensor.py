@@ -0,0 +1,228 @@
+"""Расчёт показателей тренировки по потоку отсчётов датчика.
+
+Датчик присылает отсчёты: сколько шагов или гребков сделано с прошлого
+отсчёта, для плавания — ещё и сколько бассейнов пройдено. Для открытой
+тренировки хранятся только суммы и время первого и последнего отсчёта,
+поэтому состояние не растёт с длиной тренировки. Показатели считаются
+формулами классов homework. Тренировка, по которой долго нет отсчётов,
+закрывается по таймауту.
+"""
+import json
+from collections import OrderedDict
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from homework import InfoMessage, is_registered, training_class_for
+from validation import check_value, parameter_names
+
+SESSION_TIMEOUT: float = 15 * 60
+# Параметры тренировки, которые накапливаются из отсчётов, а не
+# задаются при её начале.
+ACCUMULATED = ('action', 'duration', 'count_pool')
+Result = Tuple[str, InfoMessage, bool]
+
+
+def start_parameters(workout_type: str) -> Tuple[str, ...]:
+    """Параметры, которые задаются при начале тренировки."""
+    if not is_registered(workout_type):
+        raise ValueError('Не удалось определить тип тренировки')
+    return tuple(name for name in parameter_names(workout_type)
+                 if name not in ACCUMULATED)
+
+
+class Session:
+    """Накопленное состояние одной открытой тренировки."""
+    __slots__ = ('workout_type', 'params', 'started', 'last_seen',
+                 'action', 'pools', 'samples')
+
+    def __init__(self, workout_type: str, params: Dict[str, float],
+                 started: float) -> None:
+        self.workout_type = workout_type
+        self.params = params
+        self.started = started
+        self.last_seen = started
+        self.action = 0
+        self.pools = 0
+        self.samples = 0
+
+    @property
+    def duration_hr(self) -> float:
+        return (self.last_seen - self.started) / 3600
+
+    def add(self, timestamp: float, count: int, pools: int = 0) -> None:
+        """Учесть отсчёт с числом шагов или гребков за интервал."""
+        if timestamp < self.last_seen:
+            raise ValueError(f'Отсчёт {timestamp} раньше предыдущего '
+                             f'{self.last_seen}')
+        self.last_seen = timestamp
+        self.action += count
+        self.pools += pools
+        self.samples += 1
+
+    def info(self) -> Optional[InfoMessage]:
+        """Показатели на момент последнего отсчёта.
+
+        None, пока тренировка длится ноль секунд.
+        """
+        if self.last_seen == self.started:
+            return None
+        values = {'action': self.action, 'duration': self.duration_hr,
+                  'count_pool': self.pools, **self.params}
+        names = parameter_names(self.workout_type)
+        training_class = training_class_for(self.workout_type, len(names))
+        return training_class(
+            *(values[name] for name in names)
+        ).show_training_info()
+
+
+class SensorStream:
+    """Открытые тренировки и их закрытие по таймауту.
+
+    Тренировки хранятся в порядке последнего отсчёта, поэтому закрытие
+    по таймауту смотрит только самые старые из них. Отсчёты разных
+    тренировок должны приходить в порядке времени. feed пропускает
+    опоздавшие отсчёты и считает их в late, повторные начала уже
+    открытых тренировок — в duplicates, а начала с ошибочными
+    параметрами — в rejected.
+    """
+
+    def __init__(self, timeout: float = SESSION_TIMEOUT,
+                 interim_every: int = 0) -> None:
+        self.timeout = timeout
+        self.interim_every = interim_every
+        self.sessions: 'OrderedDict[str, Session]' = OrderedDict()
+        self.late = 0
+        self.duplicates = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def start(self, session_id: str, workout_type: str,
+              params: List[float], timestamp: float) -> None:
+        """Начать тренировку с параметрами вроде веса и роста.
+
+        Параметры проверяются validation.check_value.
+        """
+        if session_id in self.sessions:
+            raise ValueError(f'Тренировка {session_id} уже начата')
+        names = start_parameters(workout_type)
+        if not isinstance(params, (list, tuple)) or len(params) != len(names):
+            raise ValueError(f'Неверные параметры для {workout_type}: '
+                             f'{params!r}, нужно {len(names)}')
+        for name, value in zip(names, params):
+            reason = check_value(name, value)
+            if reason is not None:
+                raise ValueError(f'Тренировка {session_id}: {reason}')
+        self.sessions[session_id] = Session(
+            workout_type, dict(zip(names, params)), timestamp
+        )
+
+    def _session(self, session_id: str) -> Session:
+        if session_id not in self.sessions:
+            raise ValueError(f'Тренировка {session_id} не начата')
+        return self.sessions[session_id]
+
+    def add(self, session_id: str, timestamp: float, count: int,
+            pools: int = 0) -> Optional[InfoMessage]:
+        """Учесть отсчёт.
+
+        Каждый interim_every-й отсчёт тренировки возвращает промежуточные
+        показатели, остальные — None.
+        """
+        session = self._session(session_id)
+        session.add(timestamp, count, pools)
+        self.sessions.move_to_end(session_id)
+        if self.interim_every and not session.samples % self.interim_every:
+            return session.info()
+        return None
+
+    def interim(self, session_id: str) -> Optional[InfoMessage]:
+        """Промежуточные показатели открытой тренировки."""
+        return self._session(session_id).info()
+
+    def finish(self, session_id: str) -> Optional[InfoMessage]:
+        """Закрыть тренировку и вернуть итоговые показатели."""
+        session = self._session(session_id)
+        del self.sessions[session_id]
+        return session.info()
+
+    def evict_idle(self, now: float) -> List[Tuple[str, InfoMessage]]:
+        """Закрыть тренировки без отсчётов дольше timeout к моменту now."""
+        evicted: List[Tuple[str, InfoMessage]] = []
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session.last_seen > now - self.timeout:
+                break
+            del self.sessions[session_id]
+            info = session.info()
+            if info is not None:
+                evicted.append((session_id, info))
+        return evicted
+
+    def _start_event(self, session_id: str, event: Dict,
+                     timestamp: float) -> None:
+        """Начать тренировку по событию, учитывая повторы и ошибки."""
+        if session_id in self.sessions:
+            self.duplicates += 1
+            return
+        try:
+            self.start(session_id, event['workout_type'],
+                       event.get('params', []), timestamp)
+        except ValueError:
+            self.rejected += 1
+
+    def feed(self, events: Iterable[Dict]) -> Iterator[Result]:
+        """Обработать события и выдать (session_id, сообщение, итог ли).
+
+        Событие с workout_type и params начинает тренировку, с end —
+        закрывает её, остальные — отсчёты с count и, для плавания,
+        pools. После последнего события закрываются все тренировки.
+        Отсчёт тренировки, которая уже закрыта или не начата, и отсчёт
+        раньше предыдущего отсчёта тренировки пропускаются и
+        считаются в late. Повторное начало открытой тренировки и начало
+        с ошибочными параметрами пропускаются, не затрагивая другие
+        тренировки.
+        """
+        for event in events:
+            session_id, timestamp = event['session'], event['timestamp']
+            for evicted_id, info in self.evict_idle(timestamp):
+                yield evicted_id, info, True
+            if 'workout_type' in event:
+                self._start_event(session_id, event, timestamp)
+                continue
+            session = self.sessions.get(session_id)
+            if session is None or timestamp < session.last_seen:
+                self.late += 1
+                continue
+            if event.get('end'):
+                self.add(session_id, timestamp, event.get('count', 0),
+                         event.get('pools', 0))
+                final = self.finish(session_id)
+                if final is not None:
+                    yield session_id, final, True
+                continue
+            info = self.add(session_id, timestamp, event.get('count', 0),
+                            event.get('pools', 0))
+            if info is not None:
+                yield session_id, info, False
+        for session_id in list(self.sessions):
+            final = self.finish(session_id)
+            if final is not None:
+                yield session_id, final, True
+
+
+def read_events(stream: Iterable[str]) -> Iterator[Dict]:
+    """Прочитать события датчиков из JSON, по одному объекту на строку."""
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def render_results(results: Iterable[Result], out: IO[str]) -> int:
+    """Вывести сообщения с номером тренировки, вернуть их число."""
+    written = 0
+    for session_id, info, final in results:
+        kind = 'итог' if final else 'сейчас'
+        out.write(f'{session_id} [{kind}]: {info.get_message()}\n')
+        written += 1
+    return written
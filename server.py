@@ -0,0 +1,213 @@
+"""Asyncio-сервер, который принимает пакеты по TCP или Unix-сокету.
+
+Клиент присылает пакеты по одному на строку в формате CSV
+(RUN,15000,1,75) или JSON (["RUN", [15000, 1, 75]]), сервер отвечает
+строкой на каждый пакет в том же порядке.
+"""
+import asyncio
+import json
+import sys
+from collections import deque
+from timeit import default_timer
+from typing import Dict, List, Optional, Tuple
+
+from homework import InfoMessage, compile_message, read_package
+from pipeline import Package, read_csv, read_ndjson
+from validation import check_package
+
+QUEUE_SIZE: int = 1024
+BATCH_SIZE: int = 256
+INFO_FIELDS = ('training_type', 'duration', 'distance', 'speed', 'calories')
+
+
+def parse_line(line: str) -> Package:
+    """Разобрать строку с пакетом в формате CSV или JSON."""
+    reader = read_ndjson if line.lstrip()[:1] in ('[', '{') else read_csv
+    packages = list(reader([line]))
+    if len(packages) != 1:
+        raise ValueError('Ожидался один пакет в строке')
+    return packages[0]
+
+
+def format_reply(info: InfoMessage, fmt: str) -> str:
+    """Ответ на пакет: текст сообщения или JSON с его полями.
+
+    В JSON нет бесконечности и NaN: для них ValueError.
+    """
+    if fmt == 'json':
+        return json.dumps(
+            {name: getattr(info, name) for name in INFO_FIELDS},
+            ensure_ascii=False, allow_nan=False,
+        )
+    template, values = compile_message(info.INFO_MESSAGE)
+    return template % values(info)
+
+
+def format_error(error: Exception, fmt: str) -> str:
+    """Ответ на пакет, который не удалось обработать."""
+    if fmt == 'json':
+        return json.dumps({'error': str(error)}, ensure_ascii=False)
+    return f'Ошибка: {error}'
+
+
+def handle_line(line: str, fmt: str) -> str:
+    """Обработать одну строку запроса и вернуть строку ответа.
+
+    Пакет сначала проверяется validation.check_package, как в карантине
+    пайплайна.
+    """
+    try:
+        workout_type, data = parse_line(line)
+        reason = check_package(workout_type, data)
+        if reason is not None:
+            raise ValueError(reason)
+        info = read_package(workout_type, data).show_training_info()
+        return format_reply(info, fmt)
+    except (ArithmeticError, KeyError, TypeError, ValueError) as error:
+        return format_error(error, fmt)
+
+
+class PackageServer:
+    """Сервер пакетов с ограниченной очередью на каждое соединение.
+
+    Чтение из сокета приостанавливается, пока очередь соединения
+    заполнена, а ответы копятся порциями до batch_size строк и
+    отправляются одним вызовом write().
+    """
+
+    def __init__(self,
+                 fmt: str = 'text',
+                 queue_size: int = QUEUE_SIZE,
+                 batch_size: int = BATCH_SIZE) -> None:
+        if fmt not in ('text', 'json'):
+            raise ValueError(f'Неизвестный формат ответа: {fmt}')
+        self.fmt = fmt
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+
+    async def handle(self,
+                     reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        """Обслужить одно соединение.
+
+        Если отправка ответов упала, соединение закрывается, а очередь
+        очищается, чтобы чтение не ждало места в ней вечно.
+        """
+        queue: 'asyncio.Queue[Optional[str]]' = asyncio.Queue(
+            self.queue_size
+        )
+        replier = asyncio.ensure_future(self._reply(queue, writer))
+
+        def stop(task: asyncio.Future) -> None:
+            if task.cancelled() or task.exception() is not None:
+                writer.close()
+                while not queue.empty():
+                    queue.get_nowait()
+
+        replier.add_done_callback(stop)
+        try:
+            async for raw in reader:
+                if replier.done():
+                    break
+                line = raw.decode('utf-8', errors='replace').strip()
+                if line:
+                    await queue.put(line)
+        finally:
+            if not replier.done():
+                await queue.put(None)
+            try:
+                await replier
+            finally:
+                writer.close()
+
+    async def _reply(self,
+                     queue: 'asyncio.Queue[Optional[str]]',
+                     writer: asyncio.StreamWriter) -> None:
+        """Забирать строки из очереди порциями и отвечать на них."""
+        while True:
+            batch: List[Optional[str]] = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            done = batch[-1] is None
+            lines = [handle_line(line, self.fmt)
+                     for line in batch if line is not None]
+            if lines:
+                lines.append('')
+                writer.write('\n'.join(lines).encode('utf-8'))
+                await writer.drain()
+            if done:
+                return
+
+    async def start(self,
+                    host: str = '127.0.0.1',
+                    port: int = 8765,
+                    path: Optional[str] = None) -> asyncio.AbstractServer:
+        """Запустить сервер на TCP-порту или Unix-сокете path."""
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path)
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def load_test(packages: List[Tuple[str, List[float]]],
+                    host: str = '127.0.0.1',
+                    port: int = 8765,
+                    path: Optional[str] = None,
+                    connections: int = 4,
+                    window: int = 64) -> Dict[str, float]:
+    """Нагрузить сервер пакетами и замерить задержки ответов.
+
+    Пакеты делятся между connections соединениями; в каждом одновременно
+    ожидают ответа не больше window пакетов. Возвращает число пакетов в
+    секунду и задержки p50/p99 в миллисекундах.
+    """
+    latencies: List[float] = []
+
+    async def client(part: List[Tuple[str, List[float]]]) -> None:
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        sent: 'deque[float]' = deque()
+        slots = asyncio.Semaphore(window)
+
+        async def receive() -> None:
+            for _ in part:
+                await reader.readline()
+                latencies.append(default_timer() - sent.popleft())
+                slots.release()
+
+        receiver = asyncio.ensure_future(receive())
+        for workout_type, data in part:
+            await slots.acquire()
+            line = ','.join([workout_type, *map(str, data)]) + '\n'
+            sent.append(default_timer())
+            writer.write(line.encode('utf-8'))
+        await receiver
+        writer.close()
+        await writer.wait_closed()
+
+    start = default_timer()
+    await asyncio.gather(*(client(packages[index::connections])
+                           for index in range(connections)))
+    elapsed = default_timer() - start
+    latencies.sort()
+    return {
+        'packages_per_second': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+async def serve_forever(host: str = '127.0.0.1',
+                        port: int = 8765,
+                        path: Optional[str] = None,
+                        fmt: str = 'text') -> None:
+    """Запустить сервер и обслуживать соединения до остановки."""
+    server = await PackageServer(fmt).start(host, port, path)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    asyncio.run(serve_forever(port=int(sys.argv[1]) if len(sys.argv) > 1
+                              else 8765))
@@ -0,0 +1,128 @@
+import pytest
+
+import aggregation
+import homework
+
+DAY = aggregation.DAY
+
+
+def info(package):
+    return homework.read_package(*package).show_training_info()
+
+
+RUN = info(('RUN', [15000, 1, 75]))
+WLK = info(('WLK', [9000, 1, 75, 180]))
+
+
+@pytest.fixture
+def store():
+    store = aggregation.AggregationStore(
+        tumbling={'week': 7 * DAY}, sliding={'last_2_days': 2 * DAY},
+    )
+    store.add_many([
+        ('anna', 0.5 * DAY, RUN),
+        ('anna', 1.5 * DAY, WLK),
+        ('anna', 3.5 * DAY, RUN),
+        ('anna', 8.0 * DAY, RUN),
+        ('boris', 1.0 * DAY, RUN),
+    ])
+    return store
+
+
+def test_total(store):
+    total = store.snapshot('anna')['total']
+    assert total.sessions == 4
+    assert total.distance == pytest.approx(3 * RUN.distance + WLK.distance)
+    assert total.calories == pytest.approx(3 * RUN.calories + WLK.calories)
+    assert total.mean_speed == pytest.approx(total.distance / 4)
+
+
+def test_per_training_type(store):
+    snapshot = store.snapshot('anna', 'SportsWalking')
+    assert snapshot['total'].sessions == 1
+    assert snapshot['total'].calories == WLK.calories
+
+
+def test_tumbling_window(store):
+    # Момент раньше последней тренировки доступен только фиксированным
+    # окнам.
+    store.sliding.clear()
+    assert store.snapshot('anna', at=2 * DAY)['week'].sessions == 3
+    assert store.snapshot('anna', at=9 * DAY)['week'].sessions == 1
+    store.tumbling['week'].evict_before(7 * DAY)
+    assert store.snapshot('anna', at=2 * DAY)['week'].sessions == 0
+
+
+def test_sliding_window(store):
+    assert store.snapshot('anna')['last_2_days'].sessions == 1
+    assert store.snapshot('anna', 'Running',
+                          at=9.9 * DAY)['last_2_days'].sessions == 1
+    assert store.snapshot('anna', at=11 * DAY)['last_2_days'].sessions == 0
+    store.add('anna', 9.0 * DAY, RUN)
+    assert store.snapshot('anna')['last_2_days'].sessions == 2, (
+        'Запрос не должен менять состояние скользящего окна'
+    )
+
+
+def test_unknown_athlete(store):
+    assert store.snapshot('nobody', at=0)['week'].sessions == 0
+
+
+def test_add_columns():
+    batch = pytest.importorskip('batch')
+    columns = batch.compute_packages([('RUN', [15000, 1, 75]),
+                                      ('WLK', [9000, 1, 75, 180])])
+    store = aggregation.AggregationStore()
+    store.add_columns(['anna', 'anna'], [0, DAY], columns)
+    total = store.snapshot('anna')['total']
+    assert total.calories == pytest.approx(RUN.calories + WLK.calories)
+
+
+def test_tumbling_window_keeps_recent_buckets():
+    window = aggregation.TumblingWindow(DAY, history=2)
+    key = ('anna', 'Running')
+    for day in range(100):
+        window.add(key, (day + 0.5) * DAY, RUN)
+    assert sorted(window.buckets[key]) == [98, 99], (
+        'Старые окна должны забываться при добавлении'
+    )
+    window.add(key, 98.5 * DAY, RUN)
+    window.add(key, 10.5 * DAY, RUN)
+    assert window.get(key, 98.5 * DAY).sessions == 2
+    assert window.get(key, 10.5 * DAY).sessions == 0
+    assert sorted(window.buckets[key]) == [98, 99]
+
+
+def test_all_athletes_per_type(store):
+    snapshot = store.snapshot(aggregation.ALL_ATHLETES, 'Running')
+    assert snapshot['total'].sessions == 4
+    assert snapshot['total'].calories == pytest.approx(4 * RUN.calories)
+    assert store.snapshot(aggregation.ALL_ATHLETES,
+                          at=9 * DAY)['week'].sessions == 1
+    assert store.snapshot(aggregation.ALL_ATHLETES)['total'].sessions == 5
+    with pytest.raises(ValueError):
+        store.add(aggregation.ALL_ATHLETES, 0, RUN)
+
+
+def test_sliding_window_memory_depends_on_size():
+    window = aggregation.SlidingWindow(2 * DAY, step=aggregation.HOUR)
+    key = (aggregation.ALL_ATHLETES, 'Running')
+    for minute in range(20040):
+        window.add(key, minute * 60.0, RUN)
+    assert len(window.buckets[key]) == 48, (
+        'Скользящее окно должно хранить корзины, а не тренировки'
+    )
+    assert window.get(key).sessions == 48 * 60
+    window.add(key, 10.0, RUN)
+    assert window.get(key).sessions == 48 * 60, (
+        'Тренировка старше окна не должна попадать в окно'
+    )
+    window.add(key, 20039 * 60.0 - DAY, RUN)
+    assert window.get(key).sessions == 48 * 60 + 1
+    assert window.get(key, 20040 * 60.0).sessions == 47 * 60 + 1
+
+
+def test_snapshot_rejects_past_moment(store):
+    with pytest.raises(ValueError):
+        store.snapshot(aggregation.ALL_ATHLETES, 'Running', at=0.0)
+    assert store.snapshot('anna', at=8.0 * DAY)['last_2_days'].sessions == 1
@@ -0,0 +1,125 @@
+import os
+
+import pytest
+
+import homework
+from benchmarks import make_packages
+
+pytest.importorskip('numpy')
+archive = pytest.importorskip('archive')
+
+
+def sessions(count, seed, offset=0):
+    return [
+        (f'athlete-{index % 7}', float(offset + count - index),
+         homework.read_package(*package).show_training_info())
+        for index, package in enumerate(make_packages(count, seed=seed))
+    ]
+
+
+@pytest.fixture(params=[True, False], ids=['compressed', 'mmap'])
+def store(request, tmp_path):
+    store = archive.SessionArchive(str(tmp_path / 'archive'),
+                                   compress=request.param)
+    store.append(sessions(100, seed=1))
+    store.append(sessions(100, seed=2, offset=1000))
+    store.append(sessions(100, seed=3, offset=50))
+    return store
+
+
+def test_query_time_range(store):
+    result = store.query(40, 120)
+    timestamps = result['timestamp'].tolist()
+    assert timestamps == sorted(timestamps)
+    assert len(result) == 61 + 70
+    assert all(40 <= value <= 120 for value in timestamps)
+
+
+def test_query_reads_only_matching_chunks(store, monkeypatch):
+    loaded = []
+    original = store._load
+
+    def counting_load(chunk):
+        loaded.append(chunk['file'])
+        return original(chunk)
+
+    monkeypatch.setattr(store, '_load', counting_load)
+    assert len(store.query(1010, 1020)) == 11
+    assert len(loaded) == 1
+
+
+def test_query_filters(store):
+    result = store.query(training_type='Swimming', athlete_id='athlete-3')
+    assert len(result)
+    assert set(result['training_type'].tolist()) == {'Swimming'}
+    assert set(result['athlete_id'].tolist()) == {'athlete-3'}
+
+
+def test_index_persists_and_compaction(store):
+    before = store.query()
+    reopened = archive.SessionArchive(store.path, store.compress)
+    assert len(reopened) == 300
+    reopened.compact(rows=120)
+    assert [chunk['rows'] for chunk in reopened.chunks] == [120, 120, 60]
+    assert sorted(os.listdir(store.path)) == sorted(
+        [chunk['file'] for chunk in reopened.chunks] + ['index.json']
+    )
+    after = reopened.query()
+    assert after['timestamp'].tolist() == before['timestamp'].tolist()
+    assert after['calories'].tolist() == before['calories'].tolist()
+
+
+def test_append_columns(tmp_path):
+    batch = pytest.importorskip('batch')
+    store = archive.SessionArchive(str(tmp_path / 'archive'))
+    columns = batch.compute_packages([('RUN', [15000, 1, 75])])
+    store.append_columns(['anna'], [5.0], columns)
+    session = store.query()[0]
+    assert session['training_type'] == 'Running'
+    assert session['calories'] == 699.75
+
+
+def test_long_identifiers_are_rejected(tmp_path):
+    store = archive.SessionArchive(str(tmp_path / 'archive'))
+    info = homework.read_package('RUN', [15000, 1, 75]).show_training_info()
+    long_id = 'a' * 48
+    with pytest.raises(ValueError):
+        store.append([(long_id, 1.0, info)])
+    batch = pytest.importorskip('batch')
+    columns = batch.compute_packages([('RUN', [15000, 1, 75])])
+    with pytest.raises(ValueError):
+        store.append_columns([long_id], [1.0], columns)
+    assert len(store) == 0, (
+        'Слишком длинный идентификатор не должен обрезаться молча'
+    )
+    store.append([('a' * 32, 1.0, info)])
+    assert len(store.query(athlete_id='a' * 32)) == 1
+
+
+def test_compaction_streams_chunks(store, monkeypatch):
+    store.append(sessions(100, seed=4, offset=2000))
+    before = store.query()
+    loaded = []
+    original = store._load
+
+    def load(chunk):
+        loaded.append(chunk['file'])
+        return original(chunk)
+
+    def whole_archive(*args, **kwargs):
+        raise AssertionError('Уплотнение не должно читать архив целиком')
+
+    monkeypatch.setattr(store, '_load', load)
+    monkeypatch.setattr(store, 'query', whole_archive)
+    store.compact(rows=64)
+    assert len(loaded) == 4
+    assert all(chunk['rows'] == 64 for chunk in store.chunks[:-1])
+    monkeypatch.undo()
+    after = store.query()
+    assert after['timestamp'].tolist() == before['timestamp'].tolist()
+    assert after['athlete_id'].tolist() == before['athlete_id'].tolist()
+    ends = [chunk['end'] for chunk in store.chunks]
+    starts = [chunk['start'] for chunk in store.chunks]
+    assert all(end <= start for end, start in zip(ends, starts[1:])), (
+        'После уплотнения порции не должны пересекаться по времени'
+    )
@@ -0,0 +1,40 @@
+import pytest
+
+import homework
+from benchmarks import make_packages
+
+np = pytest.importorskip('numpy')
+batch = pytest.importorskip('batch')
+
+
+def test_compute_packages_matches_objects():
+    packages = make_packages(3000, seed=1)
+    result = batch.compute_packages(packages)
+    for index, (workout_type, data) in enumerate(packages):
+        info = homework.read_package(workout_type, data).show_training_info()
+        assert result['training_type'][index] == info.training_type
+        assert result['duration'][index] == info.duration
+        assert result['distance'][index] == info.distance
+        assert result['speed'][index] == info.speed
+        assert result['calories'][index] == info.calories, (
+            'Пакетный расчёт должен совпадать с расчётом '
+            f'класса `{info.training_type}`'
+        )
+
+
+def test_compute_batch_walking_floor_division():
+    result = batch.compute_batch(
+        ['WLK', 'WLK'],
+        {'action': [9000, 1206], 'duration': [1, 12],
+         'weight': [75, 6], 'height': [180, 12]},
+    )
+    assert result['calories'].tolist() == [
+        homework.SportsWalking(9000, 1, 75, 180).get_spent_calories(),
+        homework.SportsWalking(1206, 12, 6, 12).get_spent_calories(),
+    ]
+
+
+def test_compute_batch_unknown_type():
+    with pytest.raises(ValueError):
+        batch.compute_batch(['BOX'], {'action': [1], 'duration': [1],
+                                      'weight': [1]})
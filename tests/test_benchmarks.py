@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+import benchmarks
+
+
+@pytest.mark.parametrize('workout_type, size', [
+    ('SWM', 5), ('RUN', 3), ('WLK', 4),
+])
+def test_make_packages_by_type(workout_type, size):
+    packages = benchmarks.make_packages(20, workout_types=(workout_type,))
+    assert {package[0] for package in packages} == {workout_type}
+    assert {len(package[1]) for package in packages} == {size}
+    assert packages == benchmarks.make_packages(
+        20, workout_types=(workout_type,)
+    ), 'Генератор пакетов должен быть воспроизводимым'
+
+
+def test_measure_stages_keys():
+    results = benchmarks.measure_stages('RUN', 50)
+    for stage in ('construct', 'dispatch', 'metrics', 'format'):
+        assert results[f'{stage}_latency_ns'] > 0
+        assert results[f'{stage}_per_second'] > 0
+
+
+def test_compare_finds_regressions():
+    baseline = {'RUN': {'metrics_latency_ns': 100.0,
+                        'metrics_per_second': 1000.0}}
+    results = {'RUN': {'metrics_latency_ns': 130.0,
+                       'metrics_per_second': 950.0,
+                       'format_per_second': 1.0}}
+    regressions = benchmarks.compare(results, baseline, threshold=0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith('RUN.metrics_latency_ns')
+    assert benchmarks.compare(results, baseline, threshold=0.5) == []
+
+
+def test_bench_suite_saves_and_compares(tmp_path, monkeypatch):
+    fake = {'SWM': {'format_per_second': 10.0}}
+    monkeypatch.setattr(benchmarks, 'run_suite', lambda count: fake)
+    save = tmp_path / 'results.json'
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps({'SWM': {'format_per_second': 100.0}}))
+    assert benchmarks.bench_suite(1, str(save), str(baseline)) == 1
+    assert json.loads(save.read_text()) == fake
+    assert benchmarks.bench_suite(1, baseline=str(save)) == 0
@@ -0,0 +1,62 @@
+import pytest
+
+from benchmarks import make_packages, write_csv
+
+pytest.importorskip('numpy')
+batch = pytest.importorskip('batch')
+binary = pytest.importorskip('binary')
+
+
+def test_round_trip_matches_batch(tmp_path):
+    packages = [(workout_type, [int(data[0]), *data[1:]])
+                for workout_type, data in make_packages(500, seed=7)]
+    path = str(tmp_path / 'packages.bin')
+    assert binary.write_packages(packages, path) == 500
+    results = list(binary.iter_batches(path, batch_size=128))
+    assert len(results) == 4
+    expected = batch.compute_packages(packages)
+    for name in ('training_type', 'duration', 'distance', 'speed',
+                 'calories'):
+        got = [value for result in results
+               for value in result[name].tolist()]
+        assert got == expected[name].tolist()
+
+
+def test_columns_are_views(tmp_path):
+    path = str(tmp_path / 'packages.bin')
+    binary.write_packages([('RUN', [15000, 1, 75])], path)
+    records = binary.open_records(path)
+    _, columns = binary.to_columns(records)
+    assert columns['duration'].base is not None
+    assert columns['weight'].tolist() == [75.0]
+
+
+def test_convert_csv(tmp_path):
+    source = str(tmp_path / 'packages.csv')
+    target = str(tmp_path / 'packages.bin')
+    write_csv([('WLK', [9000, 1, 75, 180])], source)
+    assert binary.convert(source, target) == 1
+    result = next(binary.iter_batches(target))
+    assert result['calories'].tolist() == [157.50000000000003]
+
+
+def test_empty_file(tmp_path):
+    path = str(tmp_path / 'packages.bin')
+    binary.write_packages([], path)
+    assert list(binary.iter_batches(path)) == []
+
+
+@pytest.mark.parametrize('package', [
+    ('BOX', [1, 1, 1]),
+    ('RUN', [1, 1, 1, 1]),
+])
+def test_pack_record_rejects_bad_packages(package):
+    with pytest.raises(ValueError):
+        binary.pack_record(*package)
+
+
+def test_open_records_rejects_foreign_file(tmp_path):
+    path = tmp_path / 'packages.bin'
+    path.write_bytes(b'NOPE0000')
+    with pytest.raises(ValueError):
+        binary.open_records(str(path))
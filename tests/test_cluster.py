@@ -0,0 +1,122 @@
+import pytest
+
+import cluster
+from aggregation import Totals
+from benchmarks import make_packages, write_csv
+from homework import read_package
+
+
+@pytest.fixture
+def packages(tmp_path):
+    packages = make_packages(600, seed=4)
+    path = str(tmp_path / 'packages.csv')
+    write_csv(packages, path)
+    return path, packages
+
+
+def expected_totals(packages):
+    totals = {}
+    for package in packages:
+        info = read_package(*package).show_training_info()
+        totals.setdefault(info.training_type, Totals()).add(info)
+    return totals
+
+
+def assert_totals(report, packages):
+    expected = expected_totals(packages)
+    assert sorted(report.totals) == sorted(expected)
+    for name, totals in expected.items():
+        assert report.totals[name].sessions == totals.sessions
+        assert report.totals[name].calories == pytest.approx(
+            totals.calories
+        ), f'Итоги {name} должны совпадать с последовательным расчётом'
+
+
+def test_make_shards_cover_files(packages):
+    path, _ = packages
+    shards = cluster.make_shards([path, path], shard_size=1000)
+    assert [shard.shard_id for shard in shards] == list(range(len(shards)))
+    assert shards[0].start == 0 and shards[-1].fmt == 'csv'
+
+
+def test_run_cluster_matches_sequential(packages):
+    path, expected = packages
+    report = cluster.run_cluster([path], workers=3, shard_size=2000)
+    assert_totals(report, expected)
+    assert not report.failed
+    assert sum(shard.packages for shard in report.shards) == len(expected)
+    assert 'пакетов/с' in report.render()
+
+
+def test_crashed_worker_shard_is_retried(packages):
+    path, expected = packages
+    report = cluster.run_cluster([path], workers=2, shard_size=2000,
+                                 crash_after={0: 2})
+    assert_totals(report, expected)
+    assert report.retries >= 1, 'Шард упавшего обработчика нужно повторить'
+    assert any(shard.attempts > 1 for shard in report.shards)
+
+
+def test_failing_shard_gives_up_after_retries(tmp_path):
+    path = str(tmp_path / 'broken.csv')
+    with open(path, 'w') as stream:
+        stream.write('RUN,15000,1,75\nXYZ,1,2,3\n')
+    report = cluster.run_cluster([path], workers=1, max_retries=1)
+    assert list(report.failed) == [0]
+    assert report.retries == 1
+    assert 'не обработан' in report.render()
+
+
+def test_quarantine_keeps_shard(tmp_path):
+    from io import StringIO
+
+    from validation import Quarantine
+
+    path = str(tmp_path / 'broken.csv')
+    with open(path, 'w') as stream:
+        stream.write('RUN,15000,1,75\nXYZ,1,2,3\n')
+    rejected = StringIO()
+    quarantine = Quarantine(rejected)
+    report = cluster.run_cluster([path], workers=1, max_retries=1,
+                                 quarantine=quarantine)
+    assert not report.failed, (
+        'С карантином ошибочный пакет не должен ронять шард'
+    )
+    assert report.totals['Running'].sessions == 1
+    assert quarantine.count == 1
+    assert 'XYZ' in rejected.getvalue()
+
+
+def test_authkey(packages, monkeypatch):
+    path, _ = packages
+    with pytest.raises(ValueError):
+        cluster.run_cluster([path], workers=0)
+    first = cluster.Coordinator([])
+    second = cluster.Coordinator([])
+    assert len(first.authkey) == cluster.AUTHKEY_BYTES
+    assert first.authkey != second.authkey, (
+        'Без заданного ключа координатор должен выбирать случайный'
+    )
+    first.close()
+    second.close()
+    monkeypatch.delenv(cluster.AUTHKEY_ENV, raising=False)
+    import homework
+
+    with pytest.raises(SystemExit):
+        homework.cli(['worker', '127.0.0.1:1'])
+
+
+def test_all_workers_dead(packages):
+    path, _ = packages
+    report = cluster.run_cluster([path], workers=1, shard_size=2000,
+                                 max_retries=5, crash_after={0: 1})
+    assert report.failed, 'Без живых обработчиков шарды не обработать'
+    assert not report.shards
+
+
+def test_stragglers():
+    report = cluster.ClusterReport(shards=[
+        cluster.ShardResult(index, 'w', 100, seconds, 1)
+        for index, seconds in enumerate([1.0, 1.1, 0.9, 5.0])
+    ])
+    assert [shard.shard_id for shard in report.stragglers] == [3]
@@ -0,0 +1,40 @@
+import pytest
+
+import compact
+import homework
+from benchmarks import make_packages
+
+
+@pytest.mark.parametrize('input_data', [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+])
+def test_compact_training_matches_homework(input_data):
+    training = compact.read_package(*input_data)
+    assert not hasattr(training, '__dict__'), (
+        'У компактных тренировок не должно быть `__dict__`'
+    )
+    assert (training.show_training_info()
+            == homework.read_package(*input_data).show_training_info())
+
+
+def test_compact_read_package_unknown_type():
+    with pytest.raises(ValueError):
+        compact.read_package('BOX', [1, 1, 1])
+
+
+def test_info_message_has_no_dict():
+    info = homework.InfoMessage('Running', 1, 2, 3, 4)
+    assert not hasattr(info, '__dict__')
+
+
+def test_info_columns_round_trip():
+    messages = [homework.read_package(*package).show_training_info()
+                for package in make_packages(200, seed=3)]
+    columns = compact.InfoColumns(messages)
+    assert len(columns) == len(messages)
+    assert list(columns) == messages
+    assert [info.get_message() for info in columns] == [
+        info.get_message() for info in messages
+    ]
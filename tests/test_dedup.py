@@ -0,0 +1,161 @@
+from io import StringIO
+
+import pytest
+
+import dedup
+import pipeline
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+]
+
+
+def test_package_key():
+    key = dedup.package_key('RUN', [15000, 1, 75])
+    assert len(key) == 16
+    assert key == dedup.package_key('RUN', [15000.0, 1.0, 75.0]), (
+        'Целые и дробные записи одного числа должны давать один ключ'
+    )
+    assert key != dedup.package_key('RUN', [15000, 1, 76])
+    assert key != dedup.package_key('WLK', [15000, 1, 75])
+    assert key != dedup.package_key('RUN', [15000, 1, 75], 'id-1')
+
+
+def test_bloom_filter():
+    bloom = dedup.BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [dedup.package_key('RUN', [index, 1, 75])
+            for index in range(2000)]
+    for key in keys[:1000]:
+        bloom.add(key)
+    assert all(key in bloom for key in keys[:1000]), (
+        'Фильтр Блума не должен терять добавленные ключи'
+    )
+    false_positives = sum(key in bloom for key in keys[1000:])
+    assert false_positives < 50
+
+
+def test_filter_drops_replays():
+    store = dedup.DedupStore()
+    feed = PACKAGES + [PACKAGES[1]] + PACKAGES
+    assert list(store.filter(feed)) == PACKAGES
+    assert store.unique == 3
+    assert store.duplicates == 4
+
+
+def test_exact_check_resolves_false_positives():
+    store = dedup.DedupStore(capacity=1, error_rate=0.5)
+    keys = [dedup.package_key('RUN', [index, 1, 75]) for index in range(100)]
+    assert store.seen_many(keys[:50]) == [False] * 50
+    store.ack(50)
+    assert store.seen_many(keys[50:]) == [False] * 50, (
+        'Ложные срабатывания фильтра должны отсеиваться точной проверкой'
+    )
+    assert store.false_positives > 0
+    assert store.seen_many(keys) == [True] * 100
+
+
+def test_state_persists_across_runs(tmp_path):
+    path = str(tmp_path / 'dedup.db')
+    with dedup.DedupStore(path, capacity=100) as store:
+        assert not store.seen(dedup.package_key(*PACKAGES[0]))
+    with dedup.DedupStore(path, capacity=100) as store:
+        assert store.seen(dedup.package_key(*PACKAGES[0]))
+        assert not store.seen(dedup.package_key(*PACKAGES[1]))
+
+
+def test_pipeline_replay_is_idempotent(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text('SWM,720,1,80,25,40\nRUN,15000,1,75\nRUN,15000,1,75\n')
+    db_path = str(tmp_path / 'dedup.db')
+    first, replay = StringIO(), StringIO()
+    with dedup.DedupStore(db_path) as store:
+        assert pipeline.run([str(path)], first, dedup=store) == 2
+    with dedup.DedupStore(db_path) as store:
+        assert pipeline.run([str(path)], replay, dedup=store) == 0
+    assert replay.getvalue() == '', (
+        'Повтор фида не должен выводить сообщения заново'
+    )
+
+
+def test_failed_run_keeps_unwritten_packages(tmp_path):
+    path = tmp_path / 'packages.csv'
+    good = ''.join(f'RUN,{15000 + index},1,75\n' for index in range(700))
+    tail = ''.join(f'RUN,{20000 + index},1,75\n' for index in range(10))
+    path.write_text(good + 'RUN,1000,0,75\n' + tail)
+    db_path = str(tmp_path / 'dedup.db')
+    out = StringIO()
+    with pytest.raises(ZeroDivisionError):
+        with dedup.DedupStore(db_path) as store:
+            pipeline.run([str(path)], out, buffer_lines=300, dedup=store)
+    assert out.getvalue().count('\n') == 600
+    path.write_text(good + tail)
+    replay = StringIO()
+    with dedup.DedupStore(db_path) as store:
+        assert pipeline.run([str(path)], replay, dedup=store) == 110, (
+            'Пакеты, сообщения которых не были записаны, должны '
+            'обрабатываться при повторе'
+        )
+
+
+def test_quarantined_calculation_is_not_remembered(tmp_path, monkeypatch):
+    import validation
+
+    monkeypatch.setattr(validation, 'check_package', lambda *args: None)
+    path = tmp_path / 'packages.csv'
+    path.write_text('RUN,15000,1,75\nRUN,15000,0,75\n')
+    db_path = str(tmp_path / 'dedup.db')
+    for _ in range(2):
+        quarantine = validation.Quarantine(StringIO())
+        with dedup.DedupStore(db_path) as store:
+            pipeline.run([str(path)], StringIO(), quarantine=quarantine,
+                         dedup=store)
+        assert quarantine.count == 1, (
+            'Пакет из карантина должен проверяться и при повторе'
+        )
+
+
+def test_package_ids_separate_identical_sessions(tmp_path):
+    db_path = str(tmp_path / 'dedup.db')
+    day1 = tmp_path / 'day1.jsonl'
+    day1.write_text('{"workout_type": "WLK", "data": [6000, 1, 75, 180], '
+                    '"package_id": "a-1"}\n')
+    day2 = tmp_path / 'day2.jsonl'
+    day2.write_text('{"workout_type": "WLK", "data": [6000, 1, 75, 180], '
+                    '"package_id": "a-2"}\n'
+                    '{"workout_type": "WLK", "data": [6000, 1, 75, 180], '
+                    '"package_id": "a-1"}\n')
+    with dedup.DedupStore(db_path) as store:
+        assert pipeline.run([str(day1)], StringIO(), dedup=store) == 1
+    with dedup.DedupStore(db_path) as store:
+        assert pipeline.run([str(day2)], StringIO(), dedup=store) == 1, (
+            'Одинаковая тренировка с новым номером — не повтор'
+        )
+
+
+def test_without_ids_identical_packages_are_replays(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text('WLK,6000,1,75,180\n')
+    with dedup.DedupStore(str(tmp_path / 'dedup.db')) as store:
+        assert pipeline.run([str(path)], StringIO(), dedup=store) == 1
+        assert pipeline.run([str(path)], StringIO(), dedup=store) == 0, (
+            'Без номера отсеиваются пакеты с теми же кодом и параметрами'
+        )
+
+
+def test_quarantined_numbered_package_is_forgotten(tmp_path, monkeypatch):
+    import validation
+
+    monkeypatch.setattr(validation, 'check_package', lambda *args: None)
+    path = tmp_path / 'packages.jsonl'
+    path.write_text('{"workout_type": "RUN", "data": [15000, 0, 75], '
+                    '"package_id": "b-1"}\n')
+    with dedup.DedupStore() as store:
+        quarantine = validation.Quarantine(StringIO())
+        pipeline.run([str(path)], StringIO(), quarantine=quarantine,
+                     dedup=store)
+        assert quarantine.count == 1
+        assert not store.unacked and store.unique == 0, (
+            'Ключ пакета с номером должен сниматься при ошибке расчёта'
+        )
@@ -0,0 +1,135 @@
+import csv
+import gzip
+import io
+import json
+import lzma
+
+import pytest
+
+import encoders
+import pipeline
+from homework import read_package, render_many
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+]
+MESSAGES = [read_package(*package).show_training_info()
+            for package in PACKAGES]
+
+
+def encode(name, messages=MESSAGES, batch_size=2):
+    out = io.BytesIO()
+    assert encoders.encode_all(messages, encoders.get_encoder(name), out,
+                               batch_size) == len(messages)
+    return out.getvalue()
+
+
+def test_text_matches_render_many():
+    assert encode('text').decode() == render_many(MESSAGES)
+
+
+def test_jsonl_round_trip():
+    records = [json.loads(line)
+               for line in encode('jsonl').decode().splitlines()]
+    assert [encoders.InfoMessage(**record) for record in records] == (
+        MESSAGES
+    ), 'JSON Lines должен сохранять поля сообщения без потери точности'
+
+
+def test_csv_round_trip():
+    rows = list(csv.DictReader(io.StringIO(encode('csv').decode())))
+    assert [
+        encoders.InfoMessage(row['training_type'],
+                             *(float(row[name])
+                               for name in encoders.FIELDS[1:]))
+        for row in rows
+    ] == MESSAGES
+    assert encode('csv').count(b'training_type') == 1, (
+        'Заголовок CSV пишется один раз'
+    )
+
+
+def test_binary_round_trip():
+    data = encode('binary')
+    assert len(data) == encoders.HEADER.size + 3 * encoders.RECORD.size
+    assert encoders.decode_binary(data) == MESSAGES
+    with pytest.raises(ValueError):
+        encoders.decode_binary(b'XXXX' + data[4:])
+
+
+def test_unknown_encoder():
+    with pytest.raises(ValueError):
+        encoders.get_encoder('xml')
+
+
+@pytest.mark.parametrize('suffix, opener', [
+    ('.gz', gzip.open), ('.xz', lzma.open),
+])
+def test_compressed_output(tmp_path, suffix, opener):
+    path = str(tmp_path / f'messages.jsonl{suffix}')
+    with encoders.open_output(path) as out:
+        encoders.encode_all(MESSAGES, encoders.get_encoder('jsonl'), out)
+    with opener(path) as stream:
+        assert stream.read() == encode('jsonl')
+
+
+def test_pipeline_with_encoder(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text('SWM,720,1,80,25,40\nRUN,15000,1,75\nWLK,9000,1,75,180\n')
+    out = io.BytesIO()
+    pipeline.run([str(path)], out, buffer_lines=2,
+                 encoder=encoders.get_encoder('binary'))
+    assert encoders.decode_binary(out.getvalue()) == MESSAGES
+
+
+def test_messages_from_columns():
+    pytest.importorskip('numpy')
+    from batch import compute_packages
+
+    messages = list(encoders.messages_from_columns(
+        compute_packages(PACKAGES)
+    ))
+    assert encode('csv', messages) == encode('csv')
+
+
+@pytest.mark.parametrize('name, header', [
+    ('binary', encoders.HEADER.pack(encoders.MAGIC, encoders.VERSION,
+                                    encoders.RECORD.size)),
+    ('csv', b'training_type,duration,distance,speed,calories\n'),
+    ('jsonl', b''),
+])
+def test_empty_output_has_header(tmp_path, name, header):
+    assert encode(name, []) == header
+    path = tmp_path / 'packages.csv'
+    path.write_text('')
+    out = io.BytesIO()
+    assert pipeline.run([str(path)], out,
+                        encoder=encoders.get_encoder(name)) == 0
+    assert out.getvalue() == header, (
+        'Заголовок должен записываться и для пустого вывода'
+    )
+
+
+def test_decode_binary_rejects_truncated_data():
+    assert encoders.decode_binary(encode('binary', [])) == []
+    for data in (b'', encode('binary')[:-1]):
+        with pytest.raises(ValueError):
+            encoders.decode_binary(data)
+
+
+@pytest.mark.parametrize('value', [float('inf'), float('nan')])
+def test_jsonl_rejects_non_finite(value):
+    message = encoders.InfoMessage('Running', 1.0, value, 1.0, 1.0)
+    with pytest.raises(ValueError):
+        encode('jsonl', [message])
+
+
+def test_binary_rejects_long_names():
+    name = 'НордическаяХодьба'
+    message = encoders.InfoMessage(name, 1.0, 1.0, 1.0, 1.0)
+    with pytest.raises(ValueError):
+        encode('binary', [message])
+    fits = encoders.InfoMessage('Ходьба', 1.0, 1.0, 1.0, 1.0)
+    assert encoders.decode_binary(encode('binary', [fits])) == [fits]
@@ -0,0 +1,97 @@
+import pytest
+
+from benchmarks import make_packages
+from homework import Running, SportsWalking, Swimming, read_package
+
+np = pytest.importorskip('numpy')
+batch = pytest.importorskip('batch')
+
+METRICS = ('distance', 'speed', 'calories')
+
+
+@pytest.fixture(scope='module')
+def computed():
+    packages = make_packages(20000, seed=7)
+    result = batch.compute_packages(packages, np.float32)
+    references = [read_package(*package).show_training_info()
+                  for package in packages]
+    columns = batch.packages_to_columns(packages)
+    types = columns.pop('workout_type')
+    return packages, result, references, types, columns
+
+
+def test_float32_columns(computed):
+    _, result, _, _, _ = computed
+    for name in ('duration', *METRICS):
+        assert result[name].dtype == np.float32, (
+            f'Колонка {name} в режиме float32 должна быть float32'
+        )
+
+
+@pytest.mark.parametrize('training_class',
+                         [Running, SportsWalking, Swimming])
+def test_float32_within_error_bound(computed, training_class):
+    _, result, references, types, columns = computed
+    bounds = batch.error_bound(types, columns, result)
+    rows = [index for index, info in enumerate(references)
+            if info.training_type == training_class.__name__]
+    assert rows
+    for name in METRICS:
+        expected = np.array([getattr(references[index], name)
+                             for index in rows])
+        error = np.abs(result[name][rows].astype(np.float64) - expected)
+        assert (error <= bounds[name][rows]).all(), (
+            f'Ошибка {name} для {training_class.__name__} '
+            'превышает документированную границу'
+        )
+        assert error.max() < 0.001, (
+            f'{name} для {training_class.__name__} должно совпадать с '
+            'эталоном в пределах трёх выводимых знаков'
+        )
+
+
+def test_float32_printed_values(computed):
+    _, result, references, _, _ = computed
+    for name in METRICS:
+        printed = np.round(result[name].astype(np.float64), 3)
+        expected = np.round([getattr(info, name) for info in references], 3)
+        assert np.abs(printed - expected).max() <= 0.001 + 1e-9, (
+            'Выведенные значения могут отличаться не больше чем на '
+            'единицу последнего знака'
+        )
+
+
+def test_float64_is_default(computed):
+    packages, _, references, _, _ = computed
+    result = batch.compute_packages(packages[:100])
+    assert result['calories'].dtype == np.float64
+    assert result['calories'].tolist() == [info.calories
+                                           for info in references[:100]]
+
+
+def test_walking_floor_boundary_within_bound():
+    rnd = np.random.default_rng(3)
+    size = 5000
+    height = rnd.uniform(150, 200, size)
+    duration = rnd.uniform(0.5, 3, size)
+    weight = rnd.uniform(50, 120, size)
+    # Скорость, при которой speed ** 2 / height почти целое.
+    steps = rnd.integers(1, 6, size)
+    speed = np.sqrt(steps * height) * (1 + rnd.uniform(-1e-7, 1e-7, size))
+    action = np.round(speed * duration * SportsWalking.M_IN_KM
+                      / SportsWalking.LEN_STEP)
+    packages = [('WLK', [int(a), float(d), float(w), float(h)])
+                for a, d, w, h in zip(action, duration, weight, height)]
+    packages.append(('WLK', [22880, 0.7706, 78.777, 186.229]))
+    result = batch.compute_packages(packages, np.float32)
+    columns = batch.packages_to_columns(packages)
+    types = columns.pop('workout_type')
+    bounds = batch.error_bound(types, columns, result)
+    expected = np.array([read_package(*package).get_spent_calories()
+                         for package in packages])
+    error = np.abs(result['calories'].astype(np.float64) - expected)
+    assert (error > 0.001).any()
+    assert (error <= bounds['calories']).all(), (
+        'Граница ошибки должна учитывать скачок целой части частного '
+        'у калорий ходьбы'
+    )
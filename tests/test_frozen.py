@@ -0,0 +1,111 @@
+import pickle
+import threading
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+import frozen
+import homework
+from benchmarks import make_packages
+
+
+def test_frozen_matches_reference():
+    for package in make_packages(1000, seed=5):
+        assert (frozen.read_package(*package).show_training_info()
+                == homework.read_package(*package).show_training_info()), (
+            'Неизменяемая тренировка должна давать те же показатели'
+        )
+
+
+def test_frozen_is_immutable_and_hashable():
+    training = frozen.read_package('WLK', [9000, 1, 75, 180])
+    with pytest.raises(FrozenInstanceError):
+        training.weight_kg = 80
+    with pytest.raises(FrozenInstanceError):
+        training.calories = 0
+    assert not hasattr(training, '__dict__')
+    same = frozen.SportsWalking(9000, 1.0, 75, 180)
+    assert training == same and hash(training) == hash(same)
+    assert training != frozen.Running(9000, 1, 75)
+    assert {training: 'a'}[same] == 'a'
+
+
+def test_frozen_pickles():
+    training = frozen.read_package('SWM', [720, 1, 80, 25, 40])
+    restored = pickle.loads(pickle.dumps(training))
+    assert restored == training
+    assert restored.calories == training.calories
+
+
+def test_unknown_package():
+    with pytest.raises(ValueError):
+        frozen.read_package('XYZ', [1, 2, 3])
+    with pytest.raises(ValueError):
+        frozen.read_package('RUN', [1, 2])
+
+
+def test_registered_training_without_frozen_variant(monkeypatch):
+    monkeypatch.setattr(homework, 'TRAINING_TYPES',
+                        dict(homework.TRAINING_TYPES))
+
+    @homework.register_training('CYC')
+    class Cycling(homework.Running):
+        """Тренировка: велосипед."""
+        LEN_STEP: float = 5.0
+
+    with pytest.raises(ValueError):
+        frozen.read_package('CYC', [1000, 1, 70])
+    homework.register_training('RUN')(Cycling)
+    with pytest.raises(ValueError):
+        frozen.read_package('RUN', [1000, 1, 70])
+
+
+def test_concurrent_readers_never_recompute(monkeypatch):
+    packages = make_packages(500, seed=6)
+    expected = [homework.read_package(*package).show_training_info()
+                for package in packages]
+    calls = []
+    for training_class in (homework.Running, homework.SportsWalking,
+                           homework.Swimming):
+        def counted(self, original=training_class.get_spent_calories):
+            calls.append(1)
+            return original(self)
+        monkeypatch.setattr(training_class, 'get_spent_calories', counted)
+
+    trainings = [frozen.read_package(*package) for package in packages]
+    assert len(calls) == len(packages)
+    errors = []
+    barrier = threading.Barrier(8)
+
+    def reader() -> None:
+        barrier.wait()
+        for _ in range(20):
+            for training, info in zip(trainings, expected):
+                if (training.get_spent_calories() != info.calories
+                        or training.show_training_info() != info):
+                    errors.append(training)
+
+    threads = [threading.Thread(target=reader) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, 'Все потоки должны видеть одинаковые показатели'
+    assert len(calls) == len(packages), (
+        'Чтение из потоков не должно пересчитывать показатели'
+    )
+
+
+@pytest.mark.parametrize('package', [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+])
+def test_getters_read_slots(package):
+    training = frozen.read_package(*package)
+    for name in ('distance', 'speed', 'calories'):
+        object.__setattr__(training, name, -1.0)
+    assert (training.get_distance(), training.get_mean_speed(),
+            training.get_spent_calories()) == (-1.0, -1.0, -1.0), (
+        'Методы get_* должны читать посчитанные значения, а не формулы'
+    )
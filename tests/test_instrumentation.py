@@ -0,0 +1,72 @@
+import json
+from io import StringIO
+
+import pytest
+
+import instrumentation
+import pipeline
+from benchmarks import make_packages, write_csv
+
+
+@pytest.fixture
+def packages_file(tmp_path):
+    path = tmp_path / 'packages.csv'
+    write_csv(make_packages(30, seed=8), str(path))
+    return str(path)
+
+
+def test_stats_do_not_change_output(packages_file):
+    expected = StringIO()
+    pipeline.run([packages_file], expected)
+    out = StringIO()
+    stats = instrumentation.PipelineStats()
+    pipeline.run([packages_file], out, buffer_lines=7, stats=stats)
+    assert out.getvalue() == expected.getvalue()
+    counts = {key: histogram.count
+              for key, histogram in stats.histograms.items()}
+    assert sum(count for (stage, _), count in counts.items()
+               if stage == 'dispatch') == 30
+    assert {stage for stage, _ in counts} == {
+        'dispatch', 'construct', 'metrics', 'format',
+    }
+    assert {workout_type for stage, workout_type in counts
+            if stage == 'format'} <= {'Swimming', 'Running', 'SportsWalking'}
+
+
+@pytest.mark.parametrize('elapsed_ns, bucket', [
+    (0, 0), (64, 0), (65, 1), (128, 1), (10 ** 12, -1),
+])
+def test_histogram_buckets(elapsed_ns, bucket):
+    histogram = instrumentation.Histogram()
+    histogram.add(elapsed_ns)
+    assert histogram.counts[bucket] == 1
+
+
+def test_export(tmp_path):
+    stats = instrumentation.PipelineStats()
+    stats.record('metrics', 'RUN', 100)
+    stats.record('metrics', 'RUN', 300)
+    json_path = tmp_path / 'stats.json'
+    stats.export(str(json_path))
+    data = json.loads(json_path.read_text())
+    assert data['metrics']['RUN']['count'] == 2
+    assert data['metrics']['RUN']['total_ns'] == 400
+    prom_path = tmp_path / 'stats.prom'
+    stats.export(str(prom_path), 'prometheus')
+    text = prom_path.read_text()
+    assert ('fitness_stage_duration_seconds_count'
+            '{stage="metrics",workout_type="RUN"} 2') in text
+    assert ('fitness_stage_duration_seconds_bucket'
+            '{stage="metrics",workout_type="RUN",le="+Inf"} 2') in text
+    with pytest.raises(ValueError):
+        stats.export(str(prom_path), 'xml')
+
+
+def test_batch_profiler(packages_file, tmp_path):
+    profiler = instrumentation.BatchProfiler(every=2, memory=True)
+    pipeline.run([packages_file], StringIO(), buffer_lines=10,
+                 profiler=profiler)
+    assert profiler.batches == 4
+    assert len(profiler.snapshots) == 2
+    assert 'show_training_info' in profiler.report()
+    profiler.dump(str(tmp_path / 'profile.out'))
@@ -0,0 +1,55 @@
+from dataclasses import asdict
+from io import StringIO
+
+import pytest
+
+import homework
+from benchmarks import make_packages
+
+EDGE_VALUES = [0, 1, -1, 0.0005, -0.0005, 1e-12, 123456789.98765,
+               -81.32032799999999, float('inf'), float('nan'), 2 ** 70]
+
+
+def reference(info):
+    return info.INFO_MESSAGE.format(**asdict(info))
+
+
+def test_get_message_matches_str_format():
+    for package in make_packages(2000, seed=4):
+        info = homework.read_package(*package).show_training_info()
+        assert info.get_message() == reference(info)
+
+
+@pytest.mark.parametrize('value', EDGE_VALUES)
+def test_get_message_edge_values(value):
+    info = homework.InfoMessage('Тренировка 100%', value, value, value,
+                                value)
+    assert info.get_message() == reference(info)
+
+
+def test_render_many():
+    messages = [homework.read_package(*package).show_training_info()
+                for package in make_packages(50, seed=5)]
+    out = StringIO()
+    text = homework.render_many(messages, out)
+    assert out.getvalue() == text
+    assert text == ''.join(reference(info) + '\n' for info in messages)
+    assert homework.render_many([]) == ''
+
+
+@pytest.mark.parametrize('template', [
+    '{name:>10}', '{name!r}', '{0}', '{name:.3}',
+])
+def test_compile_message_rejects_unsupported_fields(template):
+    with pytest.raises(ValueError):
+        homework.compile_message(template)
+
+
+def test_render_columns():
+    batch = pytest.importorskip('batch')
+    packages = make_packages(300, seed=6)
+    expected = ''.join(
+        reference(homework.read_package(*package).show_training_info())
+        + '\n' for package in packages
+    )
+    assert batch.render_columns(batch.compute_packages(packages)) == expected
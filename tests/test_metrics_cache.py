@@ -0,0 +1,57 @@
+import pytest
+
+import homework
+import pipeline
+
+
+@pytest.mark.parametrize('input_data', [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+])
+def test_cached_metrics_same_message(input_data):
+    cached = homework.read_package(*input_data, cache_metrics=True)
+    plain = homework.read_package(*input_data)
+    assert isinstance(cached, type(plain))
+    assert type(cached).__name__ == type(plain).__name__
+    assert cached.show_training_info() == plain.show_training_info()
+
+
+def test_cached_metrics_computed_once(monkeypatch):
+    training = homework.read_package('RUN', [15000, 1, 75],
+                                      cache_metrics=True)
+    calls = []
+    original = homework.Training.get_distance
+
+    def counting_get_distance(self):
+        calls.append(self)
+        return original(self)
+
+    monkeypatch.setattr(homework.Training, 'get_distance',
+                        counting_get_distance)
+    training.show_training_info()
+    training.show_training_info()
+    assert len(calls) == 1, 'Дистанция должна считаться один раз'
+
+
+@pytest.mark.parametrize('attribute', [
+    'action_count', 'duration_hr', 'weight_kg',
+])
+def test_cached_metrics_invalidated(attribute):
+    training = homework.read_package('RUN', [15000, 1, 75],
+                                      cache_metrics=True)
+    before = training.get_spent_calories()
+    setattr(training, attribute, getattr(training, attribute) * 2)
+    expected = homework.Running(training.action_count, training.duration_hr,
+                                training.weight_kg)
+    assert training.get_spent_calories() != before
+    assert training.get_spent_calories() == expected.get_spent_calories()
+
+
+def test_cached_training_info_stats():
+    homework.cached_training_info.cache_clear()
+    packages = [('RUN', [15000, 1, 75])] * 3 + [('WLK', [9000, 1, 75, 180])]
+    messages = list(pipeline.process(packages, cached=True))
+    assert messages == list(pipeline.process(packages))
+    info = homework.cached_training_info.cache_info()
+    assert (info.hits, info.misses) == (2, 2)
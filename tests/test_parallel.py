@@ -0,0 +1,38 @@
+from io import StringIO
+
+import pytest
+
+import parallel
+import pipeline
+from benchmarks import make_packages, write_csv
+
+
+@pytest.fixture
+def packages_file(tmp_path):
+    path = tmp_path / 'packages.csv'
+    write_csv(make_packages(500, seed=2), str(path))
+    return str(path)
+
+
+def test_byte_ranges_cover_file(packages_file, tmp_path):
+    lines = []
+    for start, end in parallel.byte_ranges(packages_file, chunk_size=100):
+        lines.extend(parallel._read_lines(packages_file, start, end))
+    with open(packages_file, encoding='utf-8') as stream:
+        assert lines == stream.readlines(), (
+            'Каждая строка должна попасть ровно в один диапазон'
+        )
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_run_parallel_matches_pipeline(packages_file, ordered):
+    expected = StringIO()
+    pipeline.run([packages_file], expected)
+    out = StringIO()
+    parallel.run_parallel(packages_file, out, workers=2,
+                          chunk_size=997, ordered=ordered)
+    if ordered:
+        assert out.getvalue() == expected.getvalue()
+    else:
+        assert (sorted(out.getvalue().splitlines())
+                == sorted(expected.getvalue().splitlines()))
@@ -0,0 +1,49 @@
+from io import StringIO
+
+import homework
+import pipeline
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+]
+EXPECTED = [
+    homework.read_package(*package).show_training_info().get_message()
+    for package in PACKAGES
+]
+
+
+def test_run_csv(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text('SWM,720,1,80,25,40\nRUN,15000,1,75\n\nWLK,9000,1,75,180\n')
+    out = StringIO()
+    assert pipeline.run([str(path)], out, buffer_lines=2) == 3
+    assert out.getvalue().splitlines() == EXPECTED
+
+
+def test_run_ndjson(tmp_path):
+    path = tmp_path / 'packages.ndjson'
+    path.write_text(
+        '["SWM", [720, 1, 80, 25, 40]]\n'
+        '{"workout_type": "RUN", "data": [15000, 1, 75]}\n'
+        '["WLK", [9000, 1, 75, 180]]\n'
+    )
+    out = StringIO()
+    pipeline.run([str(path)], out)
+    assert out.getvalue().splitlines() == EXPECTED
+
+
+def test_read_csv_keeps_float_values():
+    packages = list(pipeline.read_csv(StringIO('RUN,15000,1.5,75\n')))
+    assert packages == [('RUN', [15000, 1.5, 75])]
+    assert isinstance(packages[0][1][0], int)
+
+
+def test_process_is_lazy():
+    def packages():
+        yield PACKAGES[0]
+        raise AssertionError('Пакеты должны читаться по одному')
+
+    messages = pipeline.process(packages())
+    assert next(messages).get_message() == EXPECTED[0]
@@ -0,0 +1,147 @@
+import pytest
+
+import homework
+from conftest import Capturing
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(homework, 'TRAINING_TYPES',
+                        dict(homework.TRAINING_TYPES))
+    return homework.TRAINING_TYPES
+
+
+def test_builtin_trainings_registered():
+    assert homework.TRAINING_TYPES == {
+        'SWM': (homework.Swimming, 5),
+        'RUN': (homework.Running, 3),
+        'WLK': (homework.SportsWalking, 4),
+    }
+
+
+def test_register_training_decorator(registry):
+    @homework.register_training('CYC')
+    class Cycling(homework.Running):
+        """Тренировка: велосипед."""
+        LEN_STEP: float = 5.0
+
+    training = homework.read_package('CYC', [1000, 1, 70])
+    assert type(training) is Cycling
+    assert training.get_distance() == 5.0
+    assert registry['CYC'] == (Cycling, 3)
+
+
+@pytest.mark.parametrize('input_data', [
+    ('RUN', [15000, 1]),
+    ('WLK', [9000, 1, 75]),
+    ('SWM', [720, 1, 80, 25, 40, 1]),
+    ('BOX', [1, 1, 1]),
+])
+def test_read_package_rejects_malformed(input_data):
+    with pytest.raises(ValueError):
+        homework.read_package(*input_data)
+
+
+def test_read_packages_groups_by_type():
+    packages = [
+        ('RUN', [15000, 1, 75]),
+        ('SWM', [720, 1, 80, 25, 40]),
+        ('RUN', [9000, 1, 75]),
+    ]
+    groups = homework.read_packages(packages)
+    assert list(groups) == ['RUN', 'SWM']
+    assert [training.action_count for training in groups['RUN']] == [
+        15000, 9000,
+    ]
+    assert isinstance(groups['SWM'][0], homework.Swimming)
+
+
+def test_load_entry_points(registry, monkeypatch):
+    import importlib.metadata
+
+    class EntryPoint:
+        name = 'ROW'
+
+        def load(self):
+            return homework.Running
+
+    class EntryPoints(list):
+        def select(self, group):
+            return self if group == homework.ENTRY_POINT_GROUP else []
+
+    monkeypatch.setattr(importlib.metadata, 'entry_points',
+                        lambda: EntryPoints([EntryPoint()]))
+    assert homework.load_entry_points() == ['ROW']
+    assert registry['ROW'] == (homework.Running, 3)
+
+
+def test_read_packages_looks_up_class_once_per_group(monkeypatch):
+    calls = []
+    lookup = homework.training_class_for
+
+    def counting(workout_type, size):
+        calls.append(workout_type)
+        return lookup(workout_type, size)
+
+    monkeypatch.setattr(homework, 'training_class_for', counting)
+    homework.read_packages([('RUN', [15000, 1, 75])] * 50
+                           + [('WLK', [9000, 1, 75, 180])] * 50)
+    assert calls == ['RUN', 'WLK'], (
+        'Класс должен искаться один раз для группы'
+    )
+    with pytest.raises(ValueError):
+        homework.read_packages([('RUN', [15000, 1, 75]), ('RUN', [1, 1])])
+
+
+def test_cli_loads_entry_points(registry, monkeypatch, tmp_path):
+    import importlib.metadata
+
+    class EntryPoint:
+        name = 'ROW'
+
+        def load(self):
+            return homework.Running
+
+    monkeypatch.setattr(importlib.metadata, 'entry_points',
+                        lambda: {homework.ENTRY_POINT_GROUP: [EntryPoint()]})
+    monkeypatch.setattr(homework, '_plugins_loaded', False)
+    monkeypatch.setattr(homework, 'LOAD_PLUGINS', True)
+    path = tmp_path / 'packages.csv'
+    path.write_text('ROW,15000,1,75\n')
+    with pytest.raises(ValueError):
+        homework.cli(['--no-plugins', 'run', str(path)])
+    assert not homework._plugins_loaded
+    with Capturing() as output:
+        homework.cli(['run', str(path)])
+    assert output == [
+        homework.read_package('RUN', [15000, 1, 75])
+        .show_training_info().get_message()
+    ], 'Тренировки из точек входа должны регистрироваться при промахе'
+
+
+def test_modes_reject_registered_trainings(registry):
+    import compact
+
+    @homework.register_training('CYC')
+    class Cycling(homework.Running):
+        """Тренировка: велосипед."""
+        LEN_STEP: float = 5.0
+
+    packages = [('CYC', [1000, 1, 70])]
+    with pytest.raises(ValueError, match='не поддерживает'):
+        compact.read_package(*packages[0])
+    homework.register_training('RUN')(Cycling)
+    with pytest.raises(ValueError, match='не поддерживает'):
+        compact.read_package('RUN', [1000, 1, 70])
+    pytest.importorskip('numpy')
+    import batch
+    import binary
+
+    for workout_type in ('CYC', 'RUN'):
+        with pytest.raises(ValueError, match='не поддерживает'):
+            batch.packages_to_columns([(workout_type, [1000, 1, 70])])
+        with pytest.raises(ValueError, match='не поддерживает'):
+            binary.pack_record(workout_type, [1000, 1, 70])
+    with pytest.raises(ValueError, match='не поддерживает'):
+        batch.compute_batch(['RUN'], {'action': [1000], 'duration': [1],
+                                      'weight': [70]})
@@ -0,0 +1,115 @@
+from io import StringIO
+
+import dedup
+import homework
+import pipeline
+import resultcache
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+]
+
+
+def expected(packages):
+    return [homework.read_package(*package).show_training_info().get_message()
+            for package in packages]
+
+
+def test_cached_messages_match_computed():
+    cache = resultcache.ResultCache()
+    feed = PACKAGES + [PACKAGES[1]] + PACKAGES
+    messages = [info.get_message() for info in cache.process(feed)]
+    assert messages == expected(feed), (
+        'Сообщения из кэша должны совпадать с рассчитанными'
+    )
+    assert cache.misses == 3
+    assert cache.hits == 4
+    assert cache.hit_rate == 4 / 7
+
+
+def test_cache_persists_across_runs(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    with resultcache.ResultCache(path) as cache:
+        list(cache.process(PACKAGES))
+    with resultcache.ResultCache(path) as cache:
+        messages = [info.get_message() for info in cache.process(PACKAGES)]
+        assert cache.hits == 3 and cache.misses == 0, (
+            'Записи кэша должны сохраняться между запусками'
+        )
+    assert messages == expected(PACKAGES)
+
+
+def test_lru_eviction(tmp_path, monkeypatch):
+    monkeypatch.setattr(resultcache, 'FLUSH_KEYS', 1)
+    path = str(tmp_path / 'cache.db')
+    with resultcache.ResultCache(path, capacity=2) as cache:
+        list(cache.process(PACKAGES[:2]))
+        list(cache.process(PACKAGES[:1]))
+        list(cache.process(PACKAGES[2:]))
+        assert cache.size == 2
+        assert cache.evictions == 1
+    keys = [dedup.package_key(*package) for package in PACKAGES]
+    with resultcache.ResultCache(path, capacity=2) as cache:
+        found = [info is not None for info in cache.get_many(keys)]
+    assert found == [True, False, True], (
+        'Вытесняться должна запись, которую дольше всех не читали'
+    )
+
+
+def test_formula_change_invalidates(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.db')
+    with resultcache.ResultCache(path) as cache:
+        list(cache.process(PACKAGES))
+    monkeypatch.setattr(homework.Running, 'CALORIES_MEAN_SPEED_MULTIPLIER',
+                        19)
+    with resultcache.ResultCache(path) as cache:
+        assert cache.invalidated
+        messages = [info.get_message() for info in cache.process(PACKAGES)]
+        assert cache.hits == 0
+    assert messages == expected(PACKAGES), (
+        'После изменения констант сообщения должны считаться заново'
+    )
+    with resultcache.ResultCache(path) as cache:
+        assert not cache.invalidated
+
+
+def test_pipeline_and_cli(tmp_path, capsys):
+    path = tmp_path / 'packages.csv'
+    path.write_text('SWM,720,1,80,25,40\nRUN,15000,1,75\nRUN,15000,1,75\n')
+    cache = resultcache.ResultCache()
+    out = StringIO()
+    assert pipeline.run([str(path)], out, cache=cache) == 3
+    plain = StringIO()
+    pipeline.run([str(path)], plain)
+    assert out.getvalue() == plain.getvalue()
+    db_path = str(tmp_path / 'cache.db')
+    homework.cli(['run', str(path), '--cache', db_path])
+    homework.cli(['run', str(path), '--cache', db_path])
+    captured = capsys.readouterr()
+    assert captured.out == plain.getvalue() * 2
+    assert 'попаданий 3 из 3 (100.0%)' in captured.err
+
+
+def test_formula_version_sees_attribute_swap(monkeypatch):
+    walking = homework.SportsWalking
+
+    def swapped(self):
+        return ((self.HEIGHT_MULTIPLIER * self.weight_kg
+                 + (self.get_mean_speed() ** 2 // self.height_m)
+                 * self.WEIGHT_MULTIPLIER * self.weight_kg)
+                * self.duration_hr * self.HOUR_TO_MIN)
+
+    def original(self):
+        return ((self.WEIGHT_MULTIPLIER * self.weight_kg
+                 + (self.get_mean_speed() ** 2 // self.height_m)
+                 * self.HEIGHT_MULTIPLIER * self.weight_kg)
+                * self.duration_hr * self.HOUR_TO_MIN)
+
+    monkeypatch.setattr(walking, 'get_spent_calories', original)
+    version = resultcache.formula_version()
+    monkeypatch.setattr(walking, 'get_spent_calories', swapped)
+    assert resultcache.formula_version() != version, (
+        'Замена читаемых констант в формуле должна менять версию'
+    )
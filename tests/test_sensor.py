@@ -0,0 +1,152 @@
+import sys
+from io import StringIO
+
+import pytest
+
+import homework
+import sensor
+
+
+def reference(workout_type, data):
+    return homework.read_package(workout_type, data).show_training_info()
+
+
+def test_samples_match_aggregated_package():
+    stream = sensor.SensorStream()
+    stream.start('a', 'WLK', [75, 180], 0)
+    for second in range(1, 3601):
+        stream.add('a', second, 2 if second % 2 else 3)
+    assert stream.finish('a') == reference('WLK', [9000, 1, 75, 180]), (
+        'Итог по отсчётам должен совпадать с расчётом по пакету'
+    )
+    assert len(stream) == 0
+
+
+def test_swimming_accumulates_pools():
+    stream = sensor.SensorStream()
+    stream.start('s', 'SWM', [80, 25], 0)
+    stream.add('s', 1800, 360, pools=20)
+    assert stream.interim('s') == reference('SWM', [360, 0.5, 80, 25, 20])
+    stream.add('s', 3600, 360, pools=20)
+    assert stream.finish('s') == reference('SWM', [720, 1, 80, 25, 40])
+
+
+def test_interim_messages():
+    stream = sensor.SensorStream(interim_every=2)
+    stream.start('r', 'RUN', [75], 0)
+    assert stream.add('r', 60, 150) is None
+    assert stream.add('r', 120, 150) == reference('RUN', [300, 120 / 3600,
+                                                          75])
+
+
+def test_session_state_does_not_grow():
+    stream = sensor.SensorStream()
+    stream.start('r', 'RUN', [75], 0)
+    session = stream.sessions['r']
+    size = sys.getsizeof(session)
+    for second in range(1, 10001):
+        stream.add('r', second, 3)
+    assert sys.getsizeof(session) == size
+    assert not hasattr(session, '__dict__'), (
+        'Состояние тренировки должно храниться в слотах'
+    )
+
+
+def test_idle_sessions_are_evicted():
+    stream = sensor.SensorStream(timeout=60)
+    stream.start('old', 'RUN', [75], 0)
+    stream.add('old', 30, 100)
+    stream.start('new', 'RUN', [75], 80)
+    stream.add('new', 85, 10)
+    evicted = stream.evict_idle(100)
+    assert [session_id for session_id, _ in evicted] == ['old']
+    assert evicted[0][1] == reference('RUN', [100, 30 / 3600, 75])
+    assert list(stream.sessions) == ['new']
+
+
+def test_feed_events():
+    events = [
+        {'session': 'a', 'timestamp': 0, 'workout_type': 'RUN',
+         'params': [75]},
+        {'session': 'b', 'timestamp': 10, 'workout_type': 'RUN',
+         'params': [70]},
+        {'session': 'a', 'timestamp': 1800, 'count': 7500},
+        {'session': 'a', 'timestamp': 3600, 'count': 7500, 'end': True},
+        {'session': 'b', 'timestamp': 3610, 'count': 100},
+    ]
+    results = list(sensor.SensorStream(timeout=7200).feed(events))
+    assert results == [
+        ('a', reference('RUN', [15000, 1, 75]), True),
+        ('b', reference('RUN', [100, 1, 70]), True),
+    ]
+
+
+def test_late_samples_are_skipped():
+    events = [
+        {'session': 'a', 'timestamp': 0, 'workout_type': 'RUN',
+         'params': [75]},
+        {'session': 'a', 'timestamp': 20, 'count': 100},
+        {'session': 'b', 'timestamp': 25, 'workout_type': 'RUN',
+         'params': [70]},
+        {'session': 'b', 'timestamp': 40, 'count': 50},
+        {'session': 'a', 'timestamp': 55, 'count': 100},
+        {'session': 'b', 'timestamp': 35, 'count': 10},
+        {'session': 'c', 'timestamp': 58, 'count': 10, 'end': True},
+        {'session': 'b', 'timestamp': 60, 'count': 50},
+    ]
+    stream = sensor.SensorStream(timeout=30)
+    results = list(stream.feed(events))
+    assert results == [
+        ('a', reference('RUN', [100, 20 / 3600, 75]), True),
+        ('b', reference('RUN', [100, 35 / 3600, 70]), True),
+    ], 'Опоздавшие отсчёты не должны прерывать обработку потока'
+    assert stream.late == 3
+
+
+def test_bad_start_events_are_skipped():
+    events = [
+        {'session': 'a', 'timestamp': 0, 'workout_type': 'RUN',
+         'params': [75]},
+        {'session': 'b', 'timestamp': 5, 'workout_type': 'WLK',
+         'params': [75, 180]},
+        {'session': 'b', 'timestamp': 6, 'workout_type': 'WLK',
+         'params': [75, 180]},
+        {'session': 'c', 'timestamp': 7, 'workout_type': 'WLK',
+         'params': [75, 0]},
+        {'session': 'd', 'timestamp': 8, 'workout_type': 'XYZ',
+         'params': [75]},
+        {'session': 'e', 'timestamp': 9, 'workout_type': 'RUN',
+         'params': [75, 1]},
+        {'session': 'c', 'timestamp': 10, 'count': 10},
+        {'session': 'a', 'timestamp': 20, 'count': 100},
+        {'session': 'b', 'timestamp': 25, 'count': 50},
+    ]
+    stream = sensor.SensorStream()
+    results = list(stream.feed(events))
+    assert results == [
+        ('a', reference('RUN', [100, 20 / 3600, 75]), True),
+        ('b', reference('WLK', [50, 20 / 3600, 75, 180]), True),
+    ], 'Ошибочные начала не должны прерывать другие тренировки'
+    assert (stream.duplicates, stream.rejected, stream.late) == (1, 3, 1)
+
+
+def test_bad_events_raise():
+    stream = sensor.SensorStream()
+    with pytest.raises(ValueError):
+        stream.start('x', 'XYZ', [75], 0)
+    with pytest.raises(ValueError):
+        stream.start('x', 'WLK', [75], 0)
+    with pytest.raises(ValueError):
+        stream.start('x', 'WLK', [75, 0], 0)
+    with pytest.raises(ValueError):
+        stream.add('missing', 1, 1)
+    stream.start('x', 'RUN', [75], 10)
+    with pytest.raises(ValueError):
+        stream.add('x', 5, 1)
+
+
+def test_render_results():
+    out = StringIO()
+    info = reference('RUN', [15000, 1, 75])
+    assert sensor.render_results([('a', info, True)], out) == 1
+    assert out.getvalue() == f'a [итог]: {info.get_message()}\n'
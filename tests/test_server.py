@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+
+import homework
+import server
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+]
+
+
+async def exchange(lines, fmt='text', **kwargs):
+    package_server = server.PackageServer(fmt, **kwargs)
+    tcp = await package_server.start(port=0)
+    port = tcp.sockets[0].getsockname()[1]
+    async with tcp:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(''.join(line + '\n' for line in lines).encode())
+        writer.write_eof()
+        replies = (await reader.read()).decode().splitlines()
+        writer.close()
+    return replies
+
+
+def test_server_text_replies_in_order():
+    lines = ['SWM,720,1,80,25,40', '["RUN", [15000, 1, 75]]',
+             '{"workout_type": "WLK", "data": [9000, 1, 75, 180]}']
+    replies = asyncio.run(exchange(lines * 50, batch_size=7, queue_size=4))
+    expected = [homework.read_package(*package).show_training_info()
+                .get_message() for package in PACKAGES]
+    assert replies == expected * 50
+
+
+def test_server_json_and_errors():
+    replies = asyncio.run(exchange(['RUN,15000,1,75', 'BOX,1,1,1',
+                                    'RUN,15000,0,75'], fmt='json'))
+    assert json.loads(replies[0]) == {
+        'training_type': 'Running', 'duration': 1, 'distance': 9.75,
+        'speed': 9.75, 'calories': 699.75,
+    }
+    assert 'error' in json.loads(replies[1])
+    assert 'error' in json.loads(replies[2])
+
+
+@pytest.mark.parametrize('line', ['RUN,10000000,1e-320,75', 'RUN,1,nan,75'])
+def test_json_replies_are_valid_json(line):
+    reply = server.handle_line(line, 'json')
+    assert 'error' in json.loads(reply, parse_constant=pytest.fail), (
+        'Ответ в JSON не должен содержать Infinity и NaN'
+    )
+
+
+def test_json_reply_rejects_non_finite():
+    info = homework.InfoMessage('Running', 1.0, float('inf'), 1.0, 1.0)
+    with pytest.raises(ValueError):
+        server.format_reply(info, 'json')
+
+
+def test_server_unknown_format():
+    with pytest.raises(ValueError):
+        server.PackageServer('xml')
+
+
+def test_load_test_reports_latency():
+    async def run():
+        tcp = await server.PackageServer().start(port=0)
+        port = tcp.sockets[0].getsockname()[1]
+        async with tcp:
+            return await server.load_test(PACKAGES * 100, port=port,
+                                          connections=3, window=8)
+
+    stats = asyncio.run(run())
+    assert stats['packages_per_second'] > 0
+    assert 0 < stats['p50_ms'] <= stats['p99_ms']
+
+
+def test_server_survives_arithmetic_errors():
+    replies = asyncio.run(exchange(['WLK,1000000,1e-300,75,180',
+                                    'RUN,15000,1,75']))
+    assert replies[0].startswith('Ошибка:')
+    assert replies[1] == homework.read_package(
+        'RUN', [15000, 1, 75]
+    ).show_training_info().get_message(), (
+        'Ошибочный пакет не должен мешать ответам на следующие пакеты'
+    )
+
+
+def test_server_closes_connection_when_replies_fail(monkeypatch):
+    def broken(line, fmt):
+        raise RuntimeError('сбой')
+
+    monkeypatch.setattr(server, 'handle_line', broken)
+    lines = ['RUN,15000,1,75'] * 100
+    replies = asyncio.run(asyncio.wait_for(
+        exchange(lines, queue_size=2, batch_size=1), timeout=5
+    ))
+    assert replies == []
@@ -0,0 +1,75 @@
+import subprocess
+import sys
+
+import pytest
+
+import benchmarks
+import homework
+from conftest import BASE_DIR, Capturing
+
+
+def test_import_does_not_load_heavy_modules():
+    statement = ('import sys, homework; '
+                 f'print([m for m in {benchmarks.LAZY_MODULES!r} '
+                 'if m in sys.modules])')
+    completed = subprocess.run([sys.executable, '-c', statement],
+                               capture_output=True, text=True, check=True,
+                               cwd=BASE_DIR)
+    assert completed.stdout.strip() == '[]', (
+        'Модули режимов должны импортироваться лениво'
+    )
+
+
+def test_import_time_within_budget():
+    times = benchmarks.import_time()
+    assert times['homework'] < benchmarks.STARTUP_BUDGET_MS, (
+        f'Импорт homework занял {times["homework"]:.1f} мс'
+    )
+
+
+def test_cli_run_within_budget(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text('RUN,15000,1,75\n')
+    statement = ('import sys, homework; '
+                 f'homework.cli(["run", {str(path)!r}]); '
+                 "print('importlib.metadata' in sys.modules)")
+    completed = subprocess.run([sys.executable, '-c', statement],
+                               capture_output=True, text=True, check=True,
+                               cwd=BASE_DIR)
+    assert completed.stdout.splitlines()[-1] == 'False', (
+        'Встроенные тренировки не должны искать точки входа'
+    )
+    elapsed = benchmarks.run_time(['run', str(path)])
+    assert elapsed < benchmarks.STARTUP_BUDGET_MS, (
+        f'Запуск homework.py run занял {elapsed:.1f} мс'
+    )
+
+
+def test_cli_run(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text('RUN,15000,1,75\n')
+    with Capturing() as output:
+        homework.cli(['run', str(path)])
+    assert output == [
+        homework.read_package('RUN', [15000, 1, 75])
+        .show_training_info().get_message()
+    ]
+
+
+def test_cli_batch_matches_run(tmp_path):
+    pytest.importorskip('numpy')
+    path = tmp_path / 'packages.csv'
+    benchmarks.write_csv(benchmarks.make_packages(40, seed=9), str(path))
+    with Capturing() as expected:
+        homework.cli(['run', str(path)])
+    with Capturing() as output:
+        homework.cli(['batch', str(path), '--batch-size', '16'])
+    assert output == expected
+
+
+def test_script_reads_stdin():
+    completed = subprocess.run(
+        [sys.executable, 'homework.py'], input='WLK,9000,1,75,180\n',
+        capture_output=True, text=True, check=True, cwd=BASE_DIR,
+    )
+    assert completed.stdout.startswith('Тип тренировки: SportsWalking;')
@@ -0,0 +1,158 @@
+import json
+import math
+from io import StringIO
+
+import pytest
+
+import homework
+import pipeline
+import validation
+
+GOOD = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+]
+
+
+@pytest.mark.parametrize('workout_type, data, reason', [
+    ('RUN', [15000, 0, 75], 'duration'),
+    ('WLK', [9000, 1, 75, 0], 'height'),
+    ('RUN', [15000, 1], 'неверное число параметров'),
+    ('XYZ', [1, 1, 1], 'неизвестный тип'),
+    ('RUN', [15000, '1', 75], 'duration: ожидалось число'),
+    ('RUN', [15000, math.nan, 75], 'duration'),
+    ('SWM', [720, 1, 80, 25, -1], 'count_pool'),
+    ('WLK', [1000000, 1e-300, 75, 180], 'duration'),
+    ('RUN', [10000000, 0.01, 75], 'speed'),
+])
+def test_check_package_reasons(workout_type, data, reason):
+    result = validation.check_package(workout_type, data)
+    assert result is not None and result.startswith(reason), (
+        f'Для пакета {workout_type} {data} ожидалась причина {reason!r}, '
+        f'получено {result!r}'
+    )
+
+
+def test_check_package_accepts_good_packages():
+    for workout_type, data in GOOD:
+        assert validation.check_package(workout_type, data) is None, (
+            f'Корректный пакет {workout_type} не должен отклоняться'
+        )
+
+
+def test_quarantine_filter():
+    out = StringIO()
+    quarantine = validation.Quarantine(out)
+    packages = [*GOOD, ('RUN', [15000, 0, 75]), ('XYZ', [1])]
+    assert list(quarantine.filter(packages)) == GOOD, (
+        'Корректные пакеты должны проходить без изменений'
+    )
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [record['workout_type'] for record in records] == ['RUN', 'XYZ']
+    assert all(record['reason'] for record in records), (
+        'У пакета в карантине должна быть причина'
+    )
+    assert quarantine.count == 2
+
+
+def test_run_with_quarantine(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text('SWM,720,1,80,25,40\nRUN,abc,1,75\nRUN,15000,0,75\n'
+                    'RUN,15000,1,75\nWLK,9000,1,75\n')
+    out, rejected = StringIO(), StringIO()
+    quarantine = validation.Quarantine(rejected)
+    assert pipeline.run([str(path)], out, quarantine=quarantine) == 2
+    assert out.getvalue().splitlines() == [
+        homework.read_package(*package).show_training_info().get_message()
+        for package in GOOD[:2]
+    ]
+    records = [json.loads(line) for line in rejected.getvalue().splitlines()]
+    assert records[0]['line'] == 'RUN,abc,1,75', (
+        'Неразобранная строка должна попасть в карантин целиком'
+    )
+    assert len(records) == 3
+
+
+def test_read_ndjson_reports_broken_lines():
+    rejected = []
+    stream = StringIO('["RUN", [15000, 1, 75]]\n{"data": [1]}\nnot json\n')
+    packages = list(pipeline.read_ndjson(
+        stream, lambda line, reason: rejected.append(line)
+    ))
+    assert packages == [('RUN', [15000, 1, 75])]
+    assert rejected == ['{"data": [1]}', 'not json']
+
+
+def test_run_without_quarantine_raises(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text('RUN,abc,1,75\n')
+    with pytest.raises(ValueError):
+        pipeline.run([str(path)], StringIO())
+
+
+def test_check_columns_matches_check_package():
+    np = pytest.importorskip('numpy')
+    from batch import packages_to_columns
+
+    packages = [*GOOD, ('RUN', [15000, 0, 75]), ('WLK', [9000, 1, 75, 0]),
+                ('SWM', [720, 1, 80, 25, math.inf])]
+    columns = packages_to_columns(packages)
+    types = columns.pop('workout_type')
+    reasons = validation.check_columns(types, columns)
+    expected = [validation.check_package(*package) is not None
+                for package in packages]
+    assert list(reasons != '') == expected, (
+        'Векторная проверка должна отклонять те же пакеты'
+    )
+    out = StringIO()
+    quarantine = validation.Quarantine(out)
+    kept, kept_columns = quarantine.filter_columns(types, columns)
+    assert list(kept) == ['SWM', 'RUN', 'WLK']
+    assert np.array_equal(kept_columns['action'], [720, 15000, 9000])
+    assert quarantine.count == 3
+
+
+def test_iter_batches_with_quarantine(tmp_path):
+    pytest.importorskip('numpy')
+    import binary
+
+    path = str(tmp_path / 'packages.bin')
+    binary.write_packages([*GOOD, ('RUN', [15000, 0, 75])], path)
+    quarantine = validation.Quarantine(StringIO())
+    results = list(binary.iter_batches(path, quarantine=quarantine))
+    assert list(results[0]['training_type']) == [
+        'Swimming', 'Running', 'SportsWalking'
+    ]
+    assert quarantine.count == 1
+
+
+def test_run_quarantines_calculation_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(validation, 'check_package', lambda *args: None)
+    path = tmp_path / 'packages.csv'
+    path.write_text('RUN,15000,1,75\nWLK,1000000,1e-300,75,180\n'
+                    'RUN,15000,0,75\nSWM,720,1,80,25,40\n')
+    out, rejected = StringIO(), StringIO()
+    quarantine = validation.Quarantine(rejected)
+    assert pipeline.run([str(path)], out, quarantine=quarantine) == 2, (
+        'Ошибка расчёта одного пакета не должна останавливать обработку'
+    )
+    records = [json.loads(line) for line in rejected.getvalue().splitlines()]
+    assert [record['reason'].split(':')[1].strip() for record in records] == [
+        'OverflowError', 'ZeroDivisionError'
+    ]
+    assert quarantine.reasons == {'расчёт': 2}
+
+
+def test_parallel_with_quarantine(tmp_path):
+    import parallel
+
+    path = tmp_path / 'packages.csv'
+    path.write_text('RUN,15000,1,75\nRUN,abc,1,75\nXYZ,1,1,1\n' * 20)
+    out, rejected = StringIO(), StringIO()
+    quarantine = validation.Quarantine(rejected)
+    parallel.run_parallel(str(path), out, workers=2, chunk_size=100,
+                          quarantine=quarantine)
+    assert len(out.getvalue().splitlines()) == 20
+    assert quarantine.count == 40
+    assert len(rejected.getvalue().splitlines()) == 40
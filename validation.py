@@ -0,0 +1,192 @@
+"""Проверка пакетов до расчёта и карантин для ошибочных пакетов.
+
+Пакет проверяется на известный код тренировки, число параметров, их
+типы и физически допустимые значения, включая среднюю скорость.
+Ошибочные пакеты не прерывают обработку: они с причиной записываются в
+поток карантина.
+"""
+import json
+import math
+from collections import Counter
+from typing import (IO, TYPE_CHECKING, Dict, Iterable, Iterator, List,
+                    Optional, Sequence, Tuple)
+
+from homework import TRAINING_TYPES, is_registered
+
+if TYPE_CHECKING:
+    import numpy as np
+
+Package = Tuple[str, List[float]]
+
+# Допустимые значения параметров по имени параметра конструктора:
+# (минимум, включая ли минимум, максимум).
+LIMITS: Dict[str, Tuple[float, bool, float]] = {
+    'action': (0, True, 10_000_000),
+    'duration': (1 / 3600, True, 48),
+    'weight': (0, False, 500),
+    'height': (0, False, 300),
+    'length_pool': (0, False, 1000),
+    'count_pool': (0, True, 100_000),
+}
+# Наибольшая допустимая средняя скорость, км/ч.
+MAX_SPEED: float = 100
+
+
+def parameter_names(workout_type: str) -> Tuple[str, ...]:
+    """Имена параметров конструктора класса тренировки."""
+    training_class, arity = TRAINING_TYPES[workout_type]
+    return training_class.__init__.__code__.co_varnames[1:arity + 1]
+
+
+def check_value(name: str, value: object) -> Optional[str]:
+    """Причина, по которой значение параметра недопустимо, или None."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return f'{name}: ожидалось число, получено {value!r}'
+    if not math.isfinite(value):
+        return f'{name}: недопустимое значение {value!r}'
+    if name not in LIMITS:
+        return None
+    low, inclusive, high = LIMITS[name]
+    if value < low or (value == low and not inclusive) or value > high:
+        return f'{name}: значение {value!r} вне допустимого диапазона'
+    return None
+
+
+def check_package(workout_type: str, data: object) -> Optional[str]:
+    """Причина, по которой пакет нельзя обработать, или None."""
+    if not is_registered(workout_type):
+        return f'неизвестный тип тренировки {workout_type!r}'
+    if not isinstance(data, (list, tuple)):
+        return 'параметры тренировки должны быть списком'
+    names = parameter_names(workout_type)
+    if len(data) != len(names):
+        return (f'неверное число параметров: {len(data)} '
+                f'вместо {len(names)}')
+    for name, value in zip(names, data):
+        reason = check_value(name, value)
+        if reason is not None:
+            return reason
+    return check_speed(workout_type, data)
+
+
+def check_speed(workout_type: str, data: Sequence[float]) -> Optional[str]:
+    """Причина, по которой средняя скорость недопустима, или None."""
+    training_class, _ = TRAINING_TYPES[workout_type]
+    try:
+        speed = training_class(*data).get_mean_speed()
+    except ArithmeticError as error:
+        return f'speed: {type(error).__name__}: {error}'
+    if not math.isfinite(speed) or not 0 <= speed <= MAX_SPEED:
+        return f'speed: значение {speed!r} вне допустимого диапазона'
+    return None
+
+
+class Quarantine:
+    """Поток карантина: ошибочные пакеты в JSON Lines с причиной."""
+
+    def __init__(self, out: IO[str]) -> None:
+        self.out = out
+        self.reasons: Counter = Counter()
+
+    @property
+    def count(self) -> int:
+        return sum(self.reasons.values())
+
+    def _write(self, record: Dict, reason: str) -> None:
+        record['reason'] = reason
+        self.out.write(json.dumps(record, ensure_ascii=False, default=repr)
+                       + '\n')
+        self.reasons[reason.split(':')[0]] += 1
+
+    def reject(self, workout_type: str, data: object, reason: str) -> None:
+        """Отправить пакет в карантин."""
+        self._write({'workout_type': workout_type, 'data': data}, reason)
+
+    def reject_error(self, workout_type: str, data: object,
+                     error: Exception) -> None:
+        """Отправить в карантин пакет, расчёт которого не удался."""
+        self.reject(workout_type, data,
+                    f'расчёт: {type(error).__name__}: {error}')
+
+    def reject_line(self, line: str, reason: str) -> None:
+        """Отправить в карантин строку, которую не удалось разобрать."""
+        self._write({'line': line}, reason)
+
+    def merge(self, text: str, reasons: Dict[str, int]) -> None:
+        """Добавить записи карантина из другого процесса."""
+        self.out.write(text)
+        self.reasons.update(reasons)
+
+    def filter(self, packages: Iterable[Package]) -> Iterator[Package]:
+        """Пропустить корректные пакеты, остальные отправить в карантин.
+
+        Пакеты с номером проходят вместе с номером.
+        """
+        for package in packages:
+            workout_type, data = package[0], package[1]
+            reason = check_package(workout_type, data)
+            if reason is None:
+                yield package
+            else:
+                self.reject(workout_type, data, reason)
+
+    def filter_columns(self,
+                       workout_types: Sequence[str],
+                       columns: Dict[str, Sequence[float]]
+                       ) -> Tuple['np.ndarray', Dict[str, 'np.ndarray']]:
+        """Векторный аналог filter для колонок batch.compute_batch."""
+        import numpy as np
+
+        from batch import WORKOUT_COLUMNS
+
+        types = np.asarray(workout_types)
+        reasons = check_columns(types, columns)
+        bad = reasons != ''
+        for index in np.flatnonzero(bad).tolist():
+            workout_type = str(types[index])
+            names = WORKOUT_COLUMNS.get(workout_type, ('action', 'duration',
+                                                       'weight'))
+            self.reject(workout_type,
+                        [float(columns[name][index]) for name in names],
+                        reasons[index])
+        return types[~bad], {name: np.asarray(values)[~bad]
+                             for name, values in columns.items()}
+
+
+def check_columns(workout_types: Sequence[str],
+                  columns: Dict[str, Sequence[float]]) -> 'np.ndarray':
+    """Векторная проверка колонок для batch.compute_batch.
+
+    Возвращает массив причин той же длины, что и workout_types: пустая
+    строка — запись корректна. Число параметров в колонках уже не
+    проверить, это делает batch.packages_to_columns.
+    """
+    import numpy as np
+
+    from batch import BATCH_FORMULAS, WORKOUT_COLUMNS
+
+    types = np.asarray(workout_types)
+    reasons = np.full(types.shape[0], '', dtype=object)
+    known = np.isin(types, list(WORKOUT_COLUMNS))
+    reasons[~known] = 'неизвестный тип тренировки'
+    for code, names in WORKOUT_COLUMNS.items():
+        rows = (types == code) & (reasons == '')
+        for name in names:
+            values = np.asarray(columns[name], dtype=np.float64)
+            low, inclusive, high = LIMITS[name]
+            too_low = values < low if inclusive else values <= low
+            bad = rows & (~np.isfinite(values) | too_low | (values > high))
+            reasons[bad] = f'{name}: значение вне допустимого диапазона'
+            rows &= ~bad
+        if not rows.any():
+            continue
+        with np.errstate(all='ignore'):
+            speed = BATCH_FORMULAS[code]({
+                name: np.asarray(columns[name], dtype=np.float64)[rows]
+                for name in names
+            })['speed']
+        bad = np.zeros_like(rows)
+        bad[rows] = (~np.isfinite(speed) | (speed < 0)
+                     | (speed > MAX_SPEED))
+        reasons[bad] = 'speed: значение вне допустимого диапазона'
+    return reasons